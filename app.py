@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
-import joblib
-import os
+from synthetic_data import AQ10_SPEC
+from training import train_model
+from model_registry import AQ10_MODEL, publish
+from scoring_service import screen
+from page_metrics import PageTimer
 
 # Page config
 st.set_page_config(page_title="Autism Detection App", page_icon="🧠", layout="wide")
@@ -61,15 +61,17 @@ if page == "Prediction":
         submitted = st.form_submit_button("Get Prediction")
         
         if submitted:
+            timer = PageTimer("app")
             # Prepare input data
             gender_encoded = 1 if gender == "Male" else 0
-            input_data = np.array([[q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, age, gender_encoded]])
+            input_data = np.array([q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, age, gender_encoded])
+            timer.lap('feature_encoding')
             
-            # Load model if exists
-            if os.path.exists("autism_model.pkl"):
-                model = joblib.load("autism_model.pkl")
-                prediction = model.predict(input_data)[0]
-                probability = model.predict_proba(input_data)[0]
+            # Score through the scoring service if configured, else in-process
+            result = screen(AQ10_MODEL, input_data, timer)
+            if result is not None:
+                prediction = result.label
+                probability = result.probabilities
                 
                 st.subheader("Prediction Result")
                 if prediction == 1:
@@ -78,6 +80,8 @@ if page == "Prediction":
                 else:
                     st.success(f"✅ Low likelihood of autism traits (Confidence: {probability[0]:.2%})")
                     st.markdown("**Note:** This is a screening tool only. Consult a professional if you have concerns.")
+                timer.lap('rendering')
+                timer.finish(result.model_version)
             else:
                 st.warning("Model not found. Please train the model first in the 'Model Training' section.")
 
@@ -86,74 +90,14 @@ elif page == "Model Training":
     
     if st.button("Generate Sample Data & Train Model"):
         with st.spinner("Generating data and training model..."):
-            # Generate synthetic autism screening data
-            np.random.seed(42)
-            n_samples = 1000
-            
-            # Generate features (10 AQ questions + age + gender)
-            data = []
-            labels = []
-            
-            for i in range(n_samples):
-                # Simulate autism traits (30% positive cases)
-                has_autism = np.random.choice([0, 1], p=[0.7, 0.3])
-                
-                if has_autism:
-                    # Higher scores on certain questions for autism
-                    features = [
-                        np.random.choice([0, 1], p=[0.3, 0.7]),  # q1: notice sounds
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # q2: whole picture
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # q3: multitask
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # q4: switch tasks
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # q5: read between lines
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # q6: detect boredom
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # q7: character intentions
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # q8: collect info
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # q9: read faces
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # q10: people's intentions
-                        np.random.randint(3, 60),  # age
-                        np.random.choice([0, 1])   # gender
-                    ]
-                else:
-                    # Lower scores for neurotypical
-                    features = [
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # q1
-                        np.random.choice([0, 1], p=[0.3, 0.7]),  # q2
-                        np.random.choice([0, 1], p=[0.3, 0.7]),  # q3
-                        np.random.choice([0, 1], p=[0.3, 0.7]),  # q4
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # q5
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # q6
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # q7
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # q8
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # q9
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # q10
-                        np.random.randint(3, 60),  # age
-                        np.random.choice([0, 1])   # gender
-                    ]
-                
-                data.append(features)
-                labels.append(has_autism)
-            
-            # Create DataFrame
-            columns = [f'Q{i+1}' for i in range(10)] + ['Age', 'Gender']
-            df = pd.DataFrame(data, columns=columns)
-            df['Label'] = labels
-            
-            # Split data
-            X = df.drop('Label', axis=1)
-            y = df['Label']
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-            
-            # Train model
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-            model.fit(X_train, y_train)
-            
-            # Evaluate
-            y_pred = model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
+            # Generate synthetic data (10 AQ questions + age + gender) and train,
+            # reusing the cached artifact when the spec is unchanged
+            result = train_model(AQ10_SPEC, n_samples=1000, test_size=0.2, n_estimators=100, seed=42)
+            accuracy = result.metrics['accuracy']
+            columns = AQ10_SPEC.feature_names
             
             # Save model
-            joblib.dump(model, "autism_model.pkl")
+            publish(result, AQ10_MODEL)
             
             st.success(f"✅ Model trained successfully!")
             st.info(f"📊 Model Accuracy: {accuracy:.2%}")
@@ -161,7 +105,7 @@ elif page == "Model Training":
             # Show feature importance
             feature_importance = pd.DataFrame({
                 'Feature': columns,
-                'Importance': model.feature_importances_
+                'Importance': result.model.feature_importances_
             }).sort_values('Importance', ascending=False)
             
             st.subheader("Feature Importance")
@@ -196,14 +140,4 @@ elif page == "About":
     1. Train model first (Model Training page)
     2. Complete questionnaire (Prediction page)
     3. Get instant ML-based assessment
-    """) AQ-10)
-    - Age and gender demographics
-    - Random Forest algorithm for classification
-    - Feature importance analysis
-    
-    ### 🛠️ Technical Stack
-    - **Frontend**: Streamlit
-    - **ML Library**: Scikit-learn
-    - **Model**: Random Forest Classifier
-    - **Data Processing**: Pandas, NumPy
-    """)
\ No newline at end of file
+    """)
@@ -0,0 +1,404 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+DEFAULT_DB_PATH = "assessments.db"
+SCHEMA_VERSION = 3
+# Per-child result tables; all share one layout and the same two indexes
+RESULT_TABLES = ('questionnaire_results', 'game_results', 'sensor_sessions', 'reports')
+# Row counts kept current by triggers, so totals never need a table scan
+COUNTED_TABLES = ('users', 'children') + RESULT_TABLES
+# Children are also counted per app, by the external_id segment up to the first ':'
+# ('children:srs_user:'), and results per test type ('questionnaire_results:srs_assessment')
+CHILD_PREFIX = "substr({row}.external_id, 1, instr({row}.external_id, ':'))"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    name TEXT,
+    role TEXT NOT NULL DEFAULT 'parent',
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS children (
+    id INTEGER PRIMARY KEY,
+    external_id TEXT UNIQUE,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    name TEXT NOT NULL,
+    age INTEGER,
+    gender TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS children_user ON children(user_id);
+""" + "".join(f"""
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY,
+    child_id INTEGER NOT NULL REFERENCES children(id) ON DELETE CASCADE,
+    timestamp TEXT NOT NULL,
+    test_type TEXT NOT NULL,
+    score REAL,
+    data TEXT NOT NULL DEFAULT '{{}}'
+);
+CREATE INDEX IF NOT EXISTS {table}_child_time ON {table}(child_id, timestamp);
+CREATE INDEX IF NOT EXISTS {table}_type ON {table}(test_type);
+""" for table in RESULT_TABLES) + """
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+""" + "".join(f"""
+CREATE TRIGGER IF NOT EXISTS {table}_count_insert AFTER INSERT ON {table}
+BEGIN UPDATE counters SET value = value + 1 WHERE name = '{table}'; END;
+CREATE TRIGGER IF NOT EXISTS {table}_count_delete AFTER DELETE ON {table}
+BEGIN UPDATE counters SET value = value - 1 WHERE name = '{table}'; END;
+""" for table in COUNTED_TABLES) + "".join(f"""
+CREATE TRIGGER IF NOT EXISTS children_prefix_{event} AFTER {event} ON children
+WHEN instr({row}.external_id, ':') > 0
+BEGIN INSERT INTO counters (name, value) VALUES ('children:' || {CHILD_PREFIX.format(row=row)}, {step})
+ON CONFLICT(name) DO UPDATE SET value = value + {step}; END;
+""" for event, row, step in (('INSERT', 'NEW', 1), ('DELETE', 'OLD', -1))) + "".join(f"""
+CREATE TRIGGER IF NOT EXISTS {table}_type_{event} AFTER {event} ON {table}
+BEGIN INSERT INTO counters (name, value) VALUES ('{table}:' || {row}.test_type, {step})
+ON CONFLICT(name) DO UPDATE SET value = value + {step}; END;
+""" for table in RESULT_TABLES for event, row, step in (('INSERT', 'NEW', 1), ('DELETE', 'OLD', -1)))
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _timestamp(value):
+    if value is None:
+        return _now()
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _prefix_range(prefix):
+    """(low, high) bounds of the external_ids starting with prefix, for an index range scan"""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _row(row):
+    """sqlite3.Row to dict, with the JSON data column decoded in place"""
+    record = dict(row)
+    record['data'] = json.loads(record['data'])
+    return record
+
+
+class AssessmentStore:
+    """SQLite (WAL) storage for users, children and every per-child result.
+
+    Each thread gets one long-lived connection from the store's pool (sqlite3
+    connections cannot be shared across threads, and Streamlit runs sessions on
+    separate threads). Result queries always filter on child_id and order by
+    timestamp, so they are served from the (child_id, timestamp) indexes.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._pid = os.getpid()
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        with conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            # Seed the counters from the rows that existed before their triggers did
+            if version < 2:
+                for table in COUNTED_TABLES:
+                    conn.execute(f"INSERT OR REPLACE INTO counters (name, value) "
+                                 f"SELECT '{table}', COUNT(*) FROM {table}")
+            if version < 3:
+                conn.execute(f"INSERT OR REPLACE INTO counters (name, value) "
+                             f"SELECT 'children:' || {CHILD_PREFIX.format(row='children')}, COUNT(*) FROM children "
+                             f"WHERE instr(external_id, ':') > 0 GROUP BY 1")
+                for table in RESULT_TABLES:
+                    conn.execute(f"INSERT OR REPLACE INTO counters (name, value) "
+                                 f"SELECT '{table}:' || test_type, COUNT(*) FROM {table} GROUP BY test_type")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def connection(self):
+        """This thread's pooled connection (reopened after a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def add_user(self, email, name=None, role='parent', data=None, created_at=None):
+        """Insert a user, or merge into the one with this email; returns the user id.
+
+        An existing user keeps its role and any data keys (a password hash, say)
+        that the new data does not mention.
+        """
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO users (email, name, role, created_at, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(email) DO UPDATE SET name=COALESCE(excluded.name, users.name), "
+                "data=json_patch(users.data, excluded.data)",
+                (email, name, role, _timestamp(created_at), json.dumps(data or {}, default=str)))
+            return conn.execute("SELECT id FROM users WHERE email = ?", (email,)).fetchone()[0]
+
+    def create_user(self, email, name=None, role='parent', data=None, created_at=None):
+        """Insert a new user; returns its id, or None if the email is already registered"""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO users (email, name, role, created_at, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(email) DO NOTHING",
+                (email, name, role, _timestamp(created_at), json.dumps(data or {}, default=str)))
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def get_user(self, email):
+        row = self.connection().execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+        return _row(row) if row else None
+
+    def add_child(self, name, age=None, gender=None, user_id=None, external_id=None, data=None, created_at=None):
+        """Insert or update a child (keyed by external_id when given); returns the child id"""
+        values = (external_id, user_id, name, age, gender, _timestamp(created_at), json.dumps(data or {}, default=str))
+        with self.connection() as conn:
+            if external_id is None:
+                return conn.execute("INSERT INTO children (external_id, user_id, name, age, gender, created_at, data) "
+                                    "VALUES (?, ?, ?, ?, ?, ?, ?)", values).lastrowid
+            conn.execute(
+                "INSERT INTO children (external_id, user_id, name, age, gender, created_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(external_id) DO UPDATE SET user_id=excluded.user_id, "
+                "name=excluded.name, age=excluded.age, gender=excluded.gender, data=excluded.data", values)
+            return conn.execute("SELECT id FROM children WHERE external_id = ?", (external_id,)).fetchone()[0]
+
+    def create_child(self, name, age=None, gender=None, user_id=None, external_id=None, data=None, created_at=None):
+        """Insert a new child (never updates an existing one); returns the child id"""
+        with self.connection() as conn:
+            return conn.execute(
+                "INSERT INTO children (external_id, user_id, name, age, gender, created_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (external_id, user_id, name, age, gender, _timestamp(created_at),
+                 json.dumps(data or {}, default=str))).lastrowid
+
+    def get_child(self, child_id=None, external_id=None):
+        if external_id is not None:
+            row = self.connection().execute("SELECT * FROM children WHERE external_id = ?", (external_id,)).fetchone()
+        else:
+            row = self.connection().execute("SELECT * FROM children WHERE id = ?", (child_id,)).fetchone()
+        return _row(row) if row else None
+
+    def children(self, user_id=None, prefix=None):
+        """Children, optionally one user's or those whose external_id starts with prefix.
+
+        The store is shared by several apps, each keying its children under its own
+        external_id prefix; the prefix filter is a range scan of the unique index.
+        """
+        sql = "SELECT * FROM children WHERE 1"
+        params = []
+        if user_id is not None:
+            sql += " AND user_id = ?"
+            params.append(user_id)
+        if prefix:
+            sql += " AND external_id >= ? AND external_id < ?"
+            params += _prefix_range(prefix)
+        return [_row(row) for row in self.connection().execute(sql + " ORDER BY id", params)]
+
+    def count_children(self, prefix=None):
+        """Number of children, or of those whose external_id starts with prefix.
+
+        Totals and per-app prefixes ('srs_user:') are one counter lookup; longer
+        prefixes are counted on the external_id index.
+        """
+        if not prefix:
+            return self.counter('children')
+        if prefix.find(':') == len(prefix) - 1:
+            return self.counter(f"children:{prefix}")
+        return self.connection().execute(
+            "SELECT COUNT(*) FROM children WHERE external_id >= ? AND external_id < ?",
+            _prefix_range(prefix)).fetchone()[0]
+
+    def delete_child(self, child_id):
+        """Delete a child and, through the foreign keys, all of its results"""
+        with self.connection() as conn:
+            conn.execute("DELETE FROM children WHERE id = ?", (child_id,))
+
+    def add_result(self, table, child_id, test_type, score=None, data=None, timestamp=None):
+        """Record one questionnaire, game, sensor session or report row; returns its id"""
+        if table not in RESULT_TABLES:
+            raise ValueError(f"table must be one of {RESULT_TABLES}")
+        with self.connection() as conn:
+            return conn.execute(
+                f"INSERT INTO {table} (child_id, timestamp, test_type, score, data) VALUES (?, ?, ?, ?, ?)",
+                (child_id, _timestamp(timestamp), test_type, score, json.dumps(data or {}, default=str))).lastrowid
+
+    def history(self, table, child_id, test_type=None, since=None, limit=None, newest_first=False):
+        """One child's results from table in timestamp order (an index range scan)"""
+        if table not in RESULT_TABLES:
+            raise ValueError(f"table must be one of {RESULT_TABLES}")
+        sql = f"SELECT * FROM {table} WHERE child_id = ?"
+        params = [child_id]
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(_timestamp(since))
+        if test_type is not None:
+            sql += " AND test_type = ?"
+            params.append(test_type)
+        sql += " ORDER BY timestamp DESC" if newest_first else " ORDER BY timestamp"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_row(row) for row in self.connection().execute(sql, params)]
+
+    def results(self, table, test_type):
+        """Every child's results of one test_type (a scan of the test_type index)"""
+        if table not in RESULT_TABLES:
+            raise ValueError(f"table must be one of {RESULT_TABLES}")
+        rows = self.connection().execute(f"SELECT * FROM {table} WHERE test_type = ? ORDER BY id", (test_type,))
+        return [_row(row) for row in rows]
+
+    def latest(self, table, child_id, test_type=None):
+        rows = self.history(table, child_id, test_type, limit=1, newest_first=True)
+        return rows[0] if rows else None
+
+    def counts(self, child_id):
+        """{table: number of rows} for one child, each counted from its child index"""
+        conn = self.connection()
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE child_id = ?", (child_id,)).fetchone()[0]
+                for table in RESULT_TABLES}
+
+    def type_counts(self, table):
+        """{test_type: rows} across all children, grouped over the test_type index"""
+        if table not in RESULT_TABLES:
+            raise ValueError(f"table must be one of {RESULT_TABLES}")
+        rows = self.connection().execute(f"SELECT test_type, COUNT(*) FROM {table} GROUP BY test_type")
+        return dict(rows.fetchall())
+
+    def type_count(self, table, test_type):
+        """Rows of one test_type in table (one counter lookup)"""
+        if table not in RESULT_TABLES:
+            raise ValueError(f"table must be one of {RESULT_TABLES}")
+        return self.counter(f"{table}:{test_type}")
+
+    def list_users(self, limit=100, offset=0, prefix=None):
+        """A page of users, newest first, each with its questionnaire count from the child index.
+
+        With prefix, only users owning a child whose external_id starts with it.
+        """
+        sql = ("SELECT users.*, (SELECT COUNT(*) FROM children JOIN questionnaire_results "
+               "ON questionnaire_results.child_id = children.id WHERE children.user_id = users.id) AS assessments "
+               "FROM users")
+        params = []
+        if prefix:
+            sql += " WHERE users.id IN (SELECT user_id FROM children WHERE external_id >= ? AND external_id < ?)"
+            params += _prefix_range(prefix)
+        rows = self.connection().execute(sql + " ORDER BY users.id DESC LIMIT ? OFFSET ?", params + [limit, offset])
+        return [_row(row) for row in rows]
+
+    def counter(self, table):
+        """Current value of a trigger-maintained counter (one primary-key lookup).
+
+        Names are a table in COUNTED_TABLES, 'children:<app prefix>' or '<result table>:<test_type>'.
+        """
+        row = self.connection().execute("SELECT value FROM counters WHERE name = ?", (table,)).fetchone()
+        return row[0] if row else 0
+
+    def explain(self, sql, params=()):
+        """SQLite's query plan for sql, to check a dashboard query hits an index"""
+        return [row[-1] for row in self.connection().execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+_stores = {}
+_lock = threading.Lock()
+
+
+def get_store(path=DEFAULT_DB_PATH):
+    """The process-wide store for path (one pooled connection per thread)"""
+    store = _stores.get(path)
+    if store is None:
+        with _lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = AssessmentStore(path)
+    return store
+
+
+def import_professional_session(store, path):
+    """Load a professional_session_data.json snapshot (user_profile, child_data, ai_results...)"""
+    with open(path) as f:
+        data = json.load(f)
+    users = {key: profile for key, profile in data.get('user_profile', {}).items() if 'email' in profile}
+    child_ids = {}
+    for key, profile in users.items():
+        user_id = store.add_user(profile['email'], profile.get('parent_name'), data=profile,
+                                 created_at=profile.get('registration_date'))
+        child_ids[key] = store.add_child(profile.get('child_name') or key, profile.get('child_age'), None,
+                                         user_id, external_id=f"professional:{key}",
+                                         data=data.get('child_data', {}).get(key, {}),
+                                         created_at=profile.get('registration_date'))
+    # The app keeps one family's results; attribute them to its first registered child
+    child_id = next(iter(child_ids.values()), None)
+    if child_id is None:
+        return 0
+    rows = 0
+    for section, table, type_key in (('ai_results', 'sensor_sessions', 'test_type'),
+                                     ('game_scores', 'game_results', 'game_type'),
+                                     ('prevention_progress', 'sensor_sessions', 'program')):
+        for record in data.get(section, {}).values():
+            score = record.get('accuracy', record.get('success_rate', record.get('attention_score')))
+            store.add_result(table, child_id, record.get(type_key, section), score, record, record.get('timestamp'))
+            rows += 1
+    return rows
+
+
+def report_profile_id(profile):
+    """Stable id of an autism_detection_srs child profile.
+
+    Profiles carry a generated profile_id; older ones are identified by their
+    parent email, child name and registration time instead.
+    """
+    if profile.get('profile_id'):
+        return profile['profile_id']
+    if profile.get('registration_date'):
+        legacy = f"{profile.get('email', '')}|{profile.get('child_name', '')}|{profile['registration_date']}"
+        return uuid.uuid5(uuid.NAMESPACE_URL, legacy).hex
+    return uuid.uuid4().hex
+
+
+def record_report(store, report, path=None):
+    """Record an autism_detection_srs report (and its child) in the reports table; returns the child id"""
+    profile = report.get('child_profile', {})
+    name = profile.get('child_name', 'Child')
+    child_id = store.add_child(name, profile.get('child_age'), profile.get('gender'),
+                               external_id=f"srs:{report_profile_id(profile)}", data=profile)
+    data = dict(report, path=os.path.basename(path)) if path else report
+    store.add_result('reports', child_id, report.get('report_type', 'report'), data=data,
+                     timestamp=report.get('report_generated'))
+    return child_id
+
+
+def import_report(store, path):
+    """Load one report_*.json dump written by autism_detection_srs"""
+    with open(path) as f:
+        return record_report(store, json.load(f), path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assessment database: import JSON data and show table counts")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--import-session', help="professional_session_data.json to import")
+    parser.add_argument('--import-reports', nargs='*', default=[], help="report_*.json files to import")
+    args = parser.parse_args()
+
+    store = AssessmentStore(args.db)
+    if args.import_session:
+        print(f"Imported {import_professional_session(store, args.import_session)} results from {args.import_session}")
+    for path in args.import_reports:
+        import_report(store, path)
+        print(f"Imported {path}")
+    for table in COUNTED_TABLES:
+        print(f"{table:>22}: {store.counter(table):,} rows")
@@ -5,6 +5,14 @@ from datetime import datetime
 import base64
 from PIL import Image
 import io
+import re
+import uuid
+from assessment_store import get_store
+
+# Other apps share the assessment database; this app's children are keyed under
+# this prefix plus the family code of the browser that created them
+PROFILE_PREFIX = "detection:"
+FAMILY_CODE = re.compile(r"[0-9a-f]{32}")
 
 # SRS-Compliant Autism Detection App
 st.set_page_config(
@@ -126,13 +134,34 @@ def init_state():
         'game_scores': [],
         'current_game': None,
         'game_state': {},
-        'child_profiles': {},
         'active_child': None
     }
     
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
+    
+    # Profiles persist in the assessment database, visible only under their family code
+    if 'child_profiles' not in st.session_state:
+        prefix = family_prefix()
+        st.session_state.child_profiles = {
+            child['external_id'][len(prefix):]: dict(child['data'], child_id=child['id'])
+            for child in get_store().children(prefix=prefix)
+        }
+
+def family_prefix():
+    """external_id prefix of this family's children.
+
+    There is no login, so the family code (a random id kept in the page URL) is
+    what keeps one family's profiles private; a bookmark of the page brings them back.
+    """
+    if 'family_code' not in st.session_state:
+        code = st.experimental_get_query_params().get('family', [''])[0]
+        if not FAMILY_CODE.fullmatch(code):
+            code = uuid.uuid4().hex
+            st.experimental_set_query_params(family=code)
+        st.session_state.family_code = code
+    return f"{PROFILE_PREFIX}{st.session_state.family_code}:"
 
 init_state()
 
@@ -152,7 +181,10 @@ col1, col2 = st.columns([2, 1])
 with col1:
     if st.session_state.child_profiles:
         profile_options = ["Select a child..."] + list(st.session_state.child_profiles.keys())
-        selected_child = st.selectbox("👶 Select Child Profile:", profile_options, key="child_selector")
+        selected_child = st.selectbox(
+            "👶 Select Child Profile:", profile_options, key="child_selector",
+            format_func=lambda option: st.session_state.child_profiles[option]['name']
+            if option in st.session_state.child_profiles else option)
         
         if selected_child != "Select a child...":
             st.session_state.active_child = selected_child
@@ -160,6 +192,7 @@ with col1:
             st.success(f"🌟 Active: {child_info['name']} (Age: {child_info['age']})")
     else:
         st.info("👶 No child profiles yet. Create one to get started!")
+    st.caption("🔑 Profiles are private to this page's link. Bookmark it to come back to them.")
 
 with col2:
     if st.button("➕ Add Child Profile", key="add_profile_btn"):
@@ -356,7 +389,7 @@ elif st.session_state.current_page == 'profile':
         
         if submitted:
             if child_name.strip():
-                profile_id = f"{child_name.strip()}_{datetime.now().strftime('%Y%m%d')}"
+                profile_id = uuid.uuid4().hex
                 
                 profile_data = {
                     'name': child_name.strip(),
@@ -370,11 +403,11 @@ elif st.session_state.current_page == 'profile':
                     'school_type': school_type,
                     'communication_level': communication_level,
                     'concerns': concerns,
-                    'created_date': datetime.now().isoformat(),
-                    'game_scores': [],
-                    'questionnaire_results': [],
-                    'image_results': []
+                    'created_date': datetime.now().isoformat()
                 }
+                profile_data['child_id'] = get_store().create_child(
+                    profile_data['name'], child_age, child_gender, external_id=family_prefix() + profile_id,
+                    data=profile_data)
                 
                 st.session_state.child_profiles[profile_id] = profile_data
                 st.session_state.active_child = profile_id
@@ -403,8 +436,9 @@ elif st.session_state.current_page == 'profile':
                     st.write(f"**School:** {profile['school_type']}")
                 
                 with col3:
-                    st.write(f"**Games Played:** {len(profile.get('game_scores', []))}")
-                    st.write(f"**Assessments:** {len(profile.get('questionnaire_results', []))}")
+                    counts = get_store().counts(profile['child_id'])
+                    st.write(f"**Games Played:** {counts['game_results']}")
+                    st.write(f"**Assessments:** {counts['questionnaire_results']}")
                     st.write(f"**Created:** {profile['created_date'][:10]}")
                 
                 if profile.get('concerns'):
@@ -420,6 +454,7 @@ elif st.session_state.current_page == 'profile':
                 
                 with col2:
                     if st.button(f"🗑️ Delete Profile", key=f"delete_{profile_id}"):
+                        get_store().delete_child(profile['child_id'])
                         del st.session_state.child_profiles[profile_id]
                         if st.session_state.active_child == profile_id:
                             st.session_state.active_child = None
@@ -605,7 +640,9 @@ elif st.session_state.current_page == 'games':
                 
                 # Store in active child's profile
                 if st.session_state.active_child:
-                    st.session_state.child_profiles[st.session_state.active_child]['game_scores'].append(result)
+                    child_id = st.session_state.child_profiles[st.session_state.active_child]['child_id']
+                    get_store().add_result('game_results', child_id, result['game'], float(correct), result,
+                                           result['timestamp'])
                 else:
                     st.session_state.game_scores.append(result)
                 st.session_state.game_state['completed'] = True
@@ -1006,7 +1043,9 @@ elif st.session_state.current_page == 'questionnaire':
             
             # Store in active child's profile or general results
             if st.session_state.active_child:
-                st.session_state.child_profiles[st.session_state.active_child]['questionnaire_results'].append(result)
+                child_id = st.session_state.child_profiles[st.session_state.active_child]['child_id']
+                get_store().add_result('questionnaire_results', child_id, 'asd_questionnaire', total_score, result,
+                                       result['timestamp'])
             else:
                 st.session_state.questionnaire_results.append(result)
             
@@ -1060,8 +1099,11 @@ elif st.session_state.current_page == 'questionnaire':
     
     # Show previous results if any
     active_results = []
-    if st.session_state.active_child and st.session_state.child_profiles[st.session_state.active_child].get('questionnaire_results'):
-        active_results = st.session_state.child_profiles[st.session_state.active_child]['questionnaire_results']
+    if st.session_state.active_child:
+        child_id = st.session_state.child_profiles[st.session_state.active_child]['child_id']
+        active_results = [dict(row['data'], timestamp=datetime.fromisoformat(row['timestamp']))
+                          for row in get_store().history('questionnaire_results', child_id)]
+    if active_results:
         st.markdown(f"#### 📈 Results for {st.session_state.child_profiles[st.session_state.active_child]['name']}")
     elif st.session_state.questionnaire_results:
         active_results = st.session_state.questionnaire_results
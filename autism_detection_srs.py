@@ -6,6 +6,8 @@ import time
 import random
 import json
 import os
+import uuid
+from assessment_store import get_store, record_report
 
 # Page config
 st.set_page_config(
@@ -181,6 +183,7 @@ elif page == "👤 Registration":
         if submitted:
             if camera_consent and data_consent and privacy_agreement:
                 profile_data = {
+                    'profile_id': uuid.uuid4().hex,
                     'parent_name': parent_name,
                     'email': email,
                     'phone': phone,
@@ -643,6 +646,7 @@ elif page == "📋 Reports":
             # Save report
             report_filename = f"report_{child_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             save_data(report_filename, report_data)
+            record_report(get_store(), report_data, report_filename)
             
             st.success(f"✅ Report generated successfully!")
             st.info(f"📁 Report saved as: {report_filename}")
@@ -0,0 +1,198 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lookup_engine import DEFAULT_AGE_RANGE
+from model_registry import AQ10_MODEL, REGISTRY_DIR, current_version, load_version
+from predictor import DEFAULT_THRESHOLD, ENGINES, ScreeningPredictor
+from synthetic_data import FEATURE_NAMES
+
+DEFAULT_CHUNK_ROWS = 50_000
+ANSWER_CODES = {'1': 1, '0': 0, 'yes': 1, 'no': 0, 'y': 1, 'n': 0, 'true': 1, 'false': 0}
+GENDER_CODES = {'1': 1, '0': 0, 'male': 1, 'female': 0, 'm': 1, 'f': 0, 'boy': 1, 'girl': 0}
+OUTPUT_COLUMNS = ['row', 'label', 'probability', 'model_version', 'error']
+
+
+def _coded(column, codes):
+    """Numeric column values, mapping text answers through codes; NaN where unusable"""
+    numeric = pd.to_numeric(column, errors='coerce')
+    unparsed = numeric.isna()
+    if unparsed.any():
+        numeric[unparsed] = column[unparsed].astype(str).str.strip().str.lower().map(codes)
+    return numeric.to_numpy(dtype=np.float64)
+
+
+def encode_responses(frame):
+    """Encode a chunk of questionnaire rows in the apps' feature order (Q1..Q10, Age, Gender).
+
+    Column names are matched case-insensitively. Answers may be 0/1 or yes/no,
+    gender 1/0 or male/female (male is 1, as in the apps). Returns the (n, 12)
+    float array and one error string per row ('' for valid rows).
+    """
+    columns = {str(name).strip().lower(): name for name in frame.columns}
+    missing = [name for name in FEATURE_NAMES if name.lower() not in columns]
+    if missing:
+        raise ValueError(f"Input is missing columns: {', '.join(missing)}")
+
+    X = np.empty((len(frame), len(FEATURE_NAMES)))
+    for i, name in enumerate(FEATURE_NAMES[:10]):
+        X[:, i] = _coded(frame[columns[name.lower()]], ANSWER_CODES)
+    X[:, 10] = pd.to_numeric(frame[columns['age']], errors='coerce').to_numpy(dtype=np.float64)
+    X[:, 11] = _coded(frame[columns['gender']], GENDER_CODES)
+
+    errors = np.full(len(frame), '', dtype=object)
+    bad_answers = ~np.isin(X[:, :10], (0, 1)).all(axis=1)
+    bad_age = ~((X[:, 10] >= DEFAULT_AGE_RANGE[0]) & (X[:, 10] <= DEFAULT_AGE_RANGE[1]))
+    bad_gender = ~np.isin(X[:, 11], (0, 1))
+    errors[bad_gender] = "gender must be male/female or 1/0"
+    errors[bad_age] = f"age must be {DEFAULT_AGE_RANGE[0]}-{DEFAULT_AGE_RANGE[1]}"
+    errors[bad_answers] = "answers must be 0/1 or yes/no"
+    return X, errors
+
+
+def read_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Stream a CSV or JSONL file as DataFrame chunks"""
+    if path.endswith(('.jsonl', '.json')):
+        return pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False)
+    return pd.read_csv(path, chunksize=chunk_rows, skipinitialspace=True)
+
+
+class ResultWriter:
+    """Append scored chunks to a CSV or JSONL file as they complete"""
+
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = path.endswith('.jsonl')
+        self.file = sys.stdout if path == '-' else open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, frame):
+        if self.jsonl:
+            text = frame.to_json(orient='records', lines=True)
+            self.file.write(text if text.endswith('\n') else text + '\n')
+        else:
+            frame.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+_worker_predictor = None
+
+
+def _init_worker(name, version, registry_dir, threshold, engine):
+    global _worker_predictor
+    registered = load_version(name, version, registry_dir)
+    _worker_predictor = ScreeningPredictor.from_registered(registered, threshold, engine)
+
+
+def _score_chunk(start_row, X, errors):
+    valid = errors == ''
+    labels = np.full(len(X), -1, dtype=np.int64)
+    probability = np.full(len(X), np.nan)
+    if valid.any():
+        batch = _worker_predictor.predict_batch(X[valid])
+        labels[valid] = batch.labels
+        probability[valid] = batch.probabilities[:, 1]
+    return pd.DataFrame({
+        'row': np.arange(start_row, start_row + len(X)),
+        'label': labels,
+        'probability': probability,
+        'model_version': _worker_predictor.model_version,
+        'error': errors,
+    }, columns=OUTPUT_COLUMNS)
+
+
+def screen_file(input_path, output_path, name=AQ10_MODEL, registry_dir=REGISTRY_DIR,
+                threshold=DEFAULT_THRESHOLD, engine='auto', chunk_rows=DEFAULT_CHUNK_ROWS,
+                workers=None, id_column=None, progress=None):
+    """Score every row of input_path with the current model version, writing results in input order.
+
+    Chunks are encoded in the parent and scored in a process pool; at most two chunks
+    per worker are in flight, so memory stays bounded whatever the file size.
+    progress(rows, seconds) is called as each chunk is written, with the rows completed so far.
+    Returns a summary dict with row counts, invalid rows and throughput.
+    """
+    version = current_version(name, registry_dir)
+    if version is None:
+        raise ValueError(f"No published version of {name} in {registry_dir}")
+    workers = os.cpu_count() if workers is None else workers
+    init_args = (name, version, registry_dir, threshold, engine)
+
+    writer = ResultWriter(output_path)
+    pending = deque()
+    rows = completed = invalid = 0
+    start = time.perf_counter()
+
+    def drain(limit):
+        nonlocal completed, invalid
+        while len(pending) > limit:
+            item, ids = pending.popleft()
+            frame = item.result() if workers else item
+            if ids is not None:
+                frame.insert(1, id_column, ids)
+            invalid += int((frame['error'] != '').sum())
+            writer.write(frame)
+            completed += len(frame)
+            if progress:
+                progress(completed, time.perf_counter() - start)
+
+    executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) if workers else None
+    if executor is None:
+        _init_worker(*init_args)
+    try:
+        for chunk in read_chunks(input_path, chunk_rows):
+            X, errors = encode_responses(chunk)
+            ids = chunk[id_column].to_numpy() if id_column else None
+            if executor is None:
+                pending.append((_score_chunk(rows, X, errors), ids))
+            else:
+                pending.append((executor.submit(_score_chunk, rows, X, errors), ids))
+            rows += len(chunk)
+            drain(2 * max(workers, 1))
+        drain(0)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'invalid_rows': invalid,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'model': name,
+        'model_version': version,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL file of AQ-10 responses (Q1..Q10, Age, Gender)")
+    parser.add_argument('input', help="CSV or JSONL file of questionnaire responses")
+    parser.add_argument('output', help="Results file (.csv or .jsonl), or - for stdout CSV")
+    parser.add_argument('--model', default=AQ10_MODEL, help="Registry model line to score with")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--engine', choices=ENGINES, default='auto')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, help="Scoring processes (0 scores inline; default: CPU count)")
+    parser.add_argument('--id-column', help="Input column copied to the output next to the row number")
+    args = parser.parse_args()
+
+    def report(rows, seconds):
+        print(f"\r{rows:,} rows, {rows / seconds:,.0f} rows/s", end='', file=sys.stderr)
+
+    summary = screen_file(args.input, args.output, args.model, args.registry_dir, args.threshold,
+                          args.engine, args.chunk_rows, args.workers, args.id_column, progress=report)
+    print(f"\nScored {summary['rows']:,} rows ({summary['invalid_rows']:,} invalid) with "
+          f"{summary['model']} {summary['model_version']} in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s)", file=sys.stderr)
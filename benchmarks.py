@@ -0,0 +1,231 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import numpy as np
+import sklearn
+
+from compiled_forest import CompiledForest
+from model_trainer import AutismModelTrainer
+from synthetic_data import AQ10_SPEC, generate_cohort
+
+PRESETS = {
+    'quick': {'samples': [1_000, 10_000], 'trees': [10, 100]},
+    'full': {'samples': [1_000, 10_000, 100_000, 1_000_000, 10_000_000], 'trees': [10, 50, 100, 500]},
+}
+LATENCY_REPEATS = 200
+BATCH_ROWS = 10_000
+EVALUATOR_ROWS = 1_000_000
+# Slower than baseline by more than this factor counts as a regression
+REGRESSION_RATIO = 1.2
+# Timing differences smaller than this are scheduler noise, whatever the ratio
+NOISE_FLOOR = {'_seconds': 0.05, '_ms': 0.5}
+COMPARED_METRICS = ('generate_seconds', 'train_seconds', 'save_seconds', 'artifact_bytes',
+                    'generate_peak_mb', 'train_peak_mb', 'peak_rss_mb', 'predict_row_ms',
+                    'predict_batch_ms')
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where it cannot be read"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: psutil exposes the peak working set, when it is installed
+        try:
+            import psutil
+        except ImportError:
+            return None
+        peak = getattr(psutil.Process().memory_info(), 'peak_wset', None)
+        return peak / (1024 * 1024) if peak is not None else None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _format_mb(value):
+    return "n/a" if value is None else f"{value:.0f} MB"
+
+
+def run_case(n_samples, n_estimators, seed=42):
+    """Benchmark one (n_samples, n_estimators) case; meant to run in a fresh process"""
+    trainer = AutismModelTrainer()
+    trainer.model.set_params(n_estimators=n_estimators)
+    result = {'n_samples': n_samples, 'n_estimators': n_estimators}
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = trainer.generate_synthetic_data(n_samples, seed=seed)
+    result['generate_seconds'] = time.perf_counter() - start
+    result['generate_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.reset_peak()
+
+    start = time.perf_counter()
+    # train_model prints its classification report; keep benchmark output clean
+    with contextlib.redirect_stdout(io.StringIO()):
+        accuracy, cv_scores = trainer.train_model(data)
+    result['train_seconds'] = time.perf_counter() - start
+    result['train_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    result['accuracy'] = float(accuracy)
+    result['cv_mean'] = float(cv_scores.mean())
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "model.pkl")
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            trainer.save_model(path)
+        result['save_seconds'] = time.perf_counter() - start
+        result['artifact_bytes'] = os.path.getsize(path)
+
+    # The apps predict on plain arrays, so measure that path without the feature-name warning
+    warnings.filterwarnings('ignore', message="X does not have valid feature names")
+    X = data.drop('Label', axis=1).to_numpy()
+    row = X[:1]
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        trainer.model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    result['predict_row_ms'] = float(np.median(timings) * 1000)
+    result['predict_row_p99_ms'] = float(np.percentile(timings, 99) * 1000)
+
+    batch = X[:BATCH_ROWS]
+    start = time.perf_counter()
+    trainer.model.predict_proba(batch)
+    result['predict_batch_ms'] = (time.perf_counter() - start) * 1000
+    result['batch_rows'] = len(batch)
+
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def run_suite(samples, trees, seed=42):
+    """Run every case in its own process so peak RSS is measured per case"""
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+    for n_samples in samples:
+        for n_estimators in trees:
+            with ctx.Pool(1) as pool:
+                result = pool.apply(run_case, (n_samples, n_estimators, seed))
+            results.append(result)
+            print(f"n_samples={n_samples:>10,} trees={n_estimators:>4}: "
+                  f"generate {result['generate_seconds']:.2f}s, train {result['train_seconds']:.2f}s, "
+                  f"save {result['save_seconds']:.2f}s, {result['artifact_bytes'] / 2**20:.1f} MiB, "
+                  f"RSS {_format_mb(result['peak_rss_mb'])}, row {result['predict_row_ms']:.2f} ms")
+    return results
+
+
+def run_evaluator_case(n_rows=EVALUATOR_ROWS, n_estimators=100, seed=42):
+    """Time sklearn's predict_proba against the level-synchronous CompiledForest on one core"""
+    trainer = AutismModelTrainer()
+    X_train, y_train = generate_cohort(AQ10_SPEC, 10_000, seed=seed)
+    model = trainer.model.set_params(n_estimators=n_estimators, n_jobs=1).fit(X_train, y_train)
+    compiled = CompiledForest.from_model(model)
+    X, _ = generate_cohort(AQ10_SPEC, n_rows, seed=seed + 1)
+
+    result = {'n_rows': n_rows, 'n_estimators': n_estimators, 'max_depth': compiled.header['max_depth']}
+    start = time.perf_counter()
+    reference = model.predict_proba(X)
+    result['sklearn_seconds'] = time.perf_counter() - start
+    for name, dedupe in (('levelwise', False), ('levelwise_dedupe', True)):
+        start = time.perf_counter()
+        proba = compiled.predict_proba(X, dedupe=dedupe)
+        result[f'{name}_seconds'] = time.perf_counter() - start
+        result[f'{name}_max_diff'] = float(np.abs(proba - reference).max())
+    for name in ('sklearn', 'levelwise', 'levelwise_dedupe'):
+        result[f'{name}_rows_per_second'] = n_rows / result[f'{name}_seconds']
+    return result
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, ratio=REGRESSION_RATIO):
+    """Per-case metric ratios against a baseline run; returns (report lines, regression count)"""
+    base_cases = {(r['n_samples'], r['n_estimators']): r for r in baseline['results']}
+    lines = []
+    regressions = 0
+    for result in results:
+        base = base_cases.get((result['n_samples'], result['n_estimators']))
+        if base is None:
+            lines.append(f"n_samples={result['n_samples']:,} trees={result['n_estimators']}: no baseline")
+            continue
+        parts = []
+        for metric in COMPARED_METRICS:
+            if not base.get(metric) or result.get(metric) is None:
+                continue
+            change = result[metric] / base[metric]
+            floor = next((v for suffix, v in NOISE_FLOOR.items() if metric.endswith(suffix)), 0)
+            flag = ""
+            if change > ratio and result[metric] - base[metric] > floor:
+                flag = " REGRESSION"
+                regressions += 1
+            parts.append(f"{metric} x{change:.2f}{flag}")
+        lines.append(f"n_samples={result['n_samples']:,} trees={result['n_estimators']}: " + ", ".join(parts))
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data generation, training, saving and prediction")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick')
+    parser.add_argument('--samples', type=int, nargs='+', help="Override the preset's n_samples values")
+    parser.add_argument('--trees', type=int, nargs='+', help="Override the preset's n_estimators values")
+    parser.add_argument('--output', default="benchmark_results.json")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--ratio', type=float, default=REGRESSION_RATIO)
+    parser.add_argument('--evaluator', action='store_true',
+                        help="Compare sklearn and compiled-forest batch throughput instead")
+    parser.add_argument('--rows', type=int, default=EVALUATOR_ROWS, help="Rows scored by --evaluator")
+    args = parser.parse_args()
+
+    if args.evaluator:
+        for n_estimators in args.trees or [100]:
+            result = run_evaluator_case(args.rows, n_estimators)
+            print(f"{args.rows:,} rows, {n_estimators} trees (depth {result['max_depth']}): " + ", ".join(
+                f"{name} {result[f'{name}_rows_per_second']:,.0f} rows/s "
+                f"(x{result['sklearn_seconds'] / result[f'{name}_seconds']:.2f} vs sklearn)"
+                for name in ('sklearn', 'levelwise', 'levelwise_dedupe')
+            ) + f"; max proba diff {max(result['levelwise_max_diff'], result['levelwise_dedupe_max_diff']):.2g}")
+            if result['levelwise_seconds'] > result['sklearn_seconds']:
+                print("  the levelwise evaluator alone is slower than sklearn; "
+                      "the speedup comes from deduplicating identical rows")
+        return
+
+    samples = args.samples or PRESETS[args.preset]['samples']
+    trees = args.trees or PRESETS[args.preset]['trees']
+    results = run_suite(samples, trees)
+
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(results, baseline, args.ratio)
+        print(f"\nComparison against {args.baseline} (regression threshold x{args.ratio}):")
+        for line in lines:
+            print("  " + line)
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"AQFOREST"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+# magic, format version, header length
+PREAMBLE = struct.Struct("<8sII")
+
+LEAF = -1
+# Rows per evaluation chunk; working memory is about chunk_rows * n_trees * 20 bytes
+DEFAULT_CHUNK_ROWS = 1024
+
+
+def compile_forest(model, feature_names=None):
+    """Flatten a fitted RandomForestClassifier into contiguous node arrays.
+
+    All trees share one set of arrays; child indices are global and LEAF (-1)
+    marks a leaf. Leaf values hold each tree's normalized class probabilities,
+    so averaging them over trees reproduces predict_proba.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    node_counts = np.array([tree.node_count for tree in trees], dtype=np.int64)
+    roots = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.int32)
+
+    feature = np.concatenate([tree.feature for tree in trees]).astype(np.int32)
+    threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+    left = np.concatenate([
+        np.where(tree.children_left == -1, LEAF, tree.children_left + root)
+        for tree, root in zip(trees, roots)
+    ]).astype(np.int32)
+    right = np.concatenate([
+        np.where(tree.children_right == -1, LEAF, tree.children_right + root)
+        for tree, root in zip(trees, roots)
+    ]).astype(np.int32)
+
+    value = np.concatenate([tree.value[:, 0, :] for tree in trees]).astype(np.float64)
+    totals = value.sum(axis=1, keepdims=True)
+    np.divide(value, totals, out=value, where=totals > 0)
+
+    # Leaves never split; give them a harmless feature so gathers stay in range
+    feature[left == LEAF] = 0
+
+    if feature_names is None:
+        feature_names = list(getattr(model, 'feature_names_in_', [f"x{i}" for i in range(model.n_features_in_)]))
+    header = {
+        'n_trees': len(trees),
+        'n_nodes': int(node_counts.sum()),
+        'n_features': int(model.n_features_in_),
+        'feature_names': [str(name) for name in feature_names],
+        'classes': np.asarray(model.classes_).tolist(),
+        'max_depth': int(max(tree.max_depth for tree in trees)),
+    }
+    arrays = {
+        'roots': roots,
+        'feature': feature,
+        'threshold': threshold,
+        'left': left,
+        'right': right,
+        'value': value,
+    }
+    return header, arrays
+
+
+def save_compiled(model, path, feature_names=None, metadata=None):
+    """Compile a forest and write it as one memory-mappable file"""
+    header, arrays = compile_forest(model, feature_names)
+    header['metadata'] = metadata or {}
+    header['arrays'] = {}
+
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(PREAMBLE.size + len(header_bytes))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+class CompiledForest:
+    """Pure-numpy evaluator over a compiled forest file (memory-mapped, zero-copy)"""
+
+    def __init__(self, header, arrays, buffer=None):
+        self.header = header
+        self.feature_names = header['feature_names']
+        self.classes_ = np.array(header['classes'])
+        self.n_features = header['n_features']
+        self.metadata = header.get('metadata', {})
+        self._buffer = buffer
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_length = PREAMBLE.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled forest file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_length]))
+        data_start = _align(PREAMBLE.size + header_length)
+
+        arrays = {}
+        for name, layout in header['arrays'].items():
+            dtype = np.dtype(layout['dtype'])
+            count = int(np.prod(layout['shape'])) if layout['shape'] else 1
+            arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                         offset=data_start + layout['offset']).reshape(layout['shape'])
+        return cls(header, arrays, buffer)
+
+    @classmethod
+    def from_model(cls, model, feature_names=None):
+        """Build an in-memory evaluator without going through a file"""
+        header, arrays = compile_forest(model, feature_names)
+        return cls(header, arrays)
+
+    def _encode(self, X):
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def _prepare(self):
+        """Derived arrays for level-synchronous evaluation, built once per forest.
+
+        One int32 record per node keeps everything a step reads on one cache line:
+        the feature, the left and right targets, and for int8 inputs the feature and
+        threshold packed together. A target is 4 * child for an inner node, so it
+        is the child's record offset, and ~child for a leaf. All of it is published
+        as one tuple, so a thread that sees it set never sees a partly built evaluator.
+        """
+        prepared = getattr(self, '_levelwise', None)
+        if prepared is not None:
+            return prepared
+        is_leaf = self.left == LEAF
+        # For float32 x, x <= t exactly when x <= the largest float32 not above t
+        threshold32 = self.threshold.astype(np.float32)
+        above = threshold32.astype(np.float64) > self.threshold
+        threshold32[above] = np.nextafter(threshold32[above], np.float32(-np.inf))
+        # For integer x, x <= t exactly when x <= floor(t); stored offset by 128
+        threshold8 = np.clip(np.floor(self.threshold), -128, 127).astype(np.int32) + 128
+        records = np.zeros((len(self.left), 4), dtype=np.int32)
+        records[:, 0] = self.feature
+        records[:, 1] = _targets(self.left, is_leaf)
+        records[:, 2] = _targets(self.right, is_leaf)
+        records[:, 3] = (self.feature.astype(np.int32) << 8) | threshold8
+        roots = _targets(np.asarray(self.roots, dtype=np.int32), is_leaf)
+        values = [np.ascontiguousarray(self.value[:, c]) for c in range(self.value.shape[1])]
+        self._levelwise = (records.ravel(), roots, threshold32, values)
+        return self._levelwise
+
+    def _evaluate(self, X, chunk_rows):
+        """Push every row through all trees at once, one tree level per step.
+
+        (row, tree) pairs that reach a leaf add its values to their row and leave
+        the working set, so each level only touches the pairs still descending.
+        """
+        records, roots, threshold32, values_by_class = self._prepare()
+        # records[offset + 1 + go_right] is the next target
+        children = records[1:]
+        integral = X.dtype == np.int8
+        keys = records[3:] if integral else records
+        n_trees = len(roots)
+        n_features = X.shape[1]
+        proba = np.zeros((len(X), len(self.classes_)))
+        for begin in range(0, len(X), chunk_rows):
+            chunk = X[begin:begin + chunk_rows]
+            n = len(chunk)
+            flat = chunk.ravel().astype(np.int32) + 128 if integral else chunk.ravel()
+            # Tree-major order, so neighbouring pairs read the same tree's records
+            node = np.repeat(roots, n)
+            row_start = np.tile(np.arange(n, dtype=np.int32) * n_features, n_trees)
+            while True:
+                done = node < 0
+                if done.any():
+                    finished = np.flatnonzero(done)
+                    leaf = ~np.take(node, finished)
+                    row = np.take(row_start, finished) // n_features
+                    for c, values in enumerate(values_by_class):
+                        proba[begin:begin + n, c] += np.bincount(
+                            row, weights=np.take(values, leaf, mode='clip'), minlength=n)
+                    descending = np.flatnonzero(~done)
+                    if not len(descending):
+                        break
+                    node = np.take(node, descending)
+                    row_start = np.take(row_start, descending)
+                key = np.take(keys, node, mode='clip')
+                if integral:
+                    index = key >> 8
+                    index += row_start
+                    key &= 255
+                    go_right = np.take(flat, index, mode='clip') > key
+                else:
+                    key += row_start
+                    go_right = np.take(flat, key, mode='clip') > np.take(threshold32, node >> 2, mode='clip')
+                node += go_right
+                node = np.take(children, node, mode='clip')
+        proba /= n_trees
+        return proba
+
+    def predict_proba(self, X, chunk_rows=DEFAULT_CHUNK_ROWS, dedupe=True):
+        """Class probabilities via the level-synchronous numpy evaluator.
+
+        Integer-valued inputs (the questionnaire encoding) are compared as int8, and
+        with dedupe (the default) each distinct row is evaluated once and scattered
+        back. That deduplication is the speedup: on its own the evaluator is slower
+        than sklearn's predict_proba (see benchmarks.py --evaluator).
+        """
+        X = self._encode(X)
+        integral = len(X) and np.array_equal(X, np.round(X)) and X.min() >= -127 and X.max() <= 127
+        if not integral:
+            return self._evaluate(X, chunk_rows)
+        X = X.astype(np.int8)
+        if dedupe and len(X) > 1:
+            keys = _pack_rows(X)
+            if keys is not None:
+                _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+                return self._evaluate(X[first], chunk_rows)[inverse.ravel()]
+        return self._evaluate(X, chunk_rows)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _targets(children, is_leaf):
+    """Step targets for child indices: record offset 4 * child, or ~child for a leaf"""
+    targets = np.where(is_leaf[children], ~children, 4 * children).astype(np.int32)
+    # A leaf's own children are never followed
+    targets[children == LEAF] = 0
+    return targets
+
+
+def _pack_rows(X):
+    """One int64 per integer row (mixed radix over each column's range), or None if it won't fit"""
+    low = X.min(axis=0).astype(np.int64)
+    radix = X.max(axis=0).astype(np.int64) - low + 1
+    if np.prod(radix.astype(float)) >= 2 ** 62:
+        return None
+    keys = np.zeros(len(X), dtype=np.int64)
+    for j in range(X.shape[1]):
+        keys *= radix[j]
+        keys += X[:, j].astype(np.int64) - low[j]
+    return keys
+
+
+def verify_compiled(model, compiled, X, atol=1e-9):
+    """Largest absolute predict_proba difference; raises if it exceeds atol"""
+    diff = float(np.abs(model.predict_proba(X) - compiled.predict_proba(X)).max())
+    if diff > atol:
+        raise AssertionError(f"Compiled forest disagrees with the model (max diff {diff:.3g})")
+    return diff
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+if __name__ == "__main__":
+    import joblib
+    from synthetic_data import AQ10_SPEC, generate_cohort
+
+    if len(sys.argv) != 3:
+        print("Usage: python compiled_forest.py <model.pkl> <output.forest>")
+        raise SystemExit(2)
+    model = joblib.load(sys.argv[1])
+    save_compiled(model, sys.argv[2], feature_names=AQ10_SPEC.feature_names)
+
+    start = time.perf_counter()
+    compiled = CompiledForest.load(sys.argv[2])
+    load_ms = (time.perf_counter() - start) * 1000
+    X, _ = generate_cohort(AQ10_SPEC, 2000, seed=7)
+    diff = verify_compiled(model, compiled, X)
+    print(f"Wrote {sys.argv[2]} ({os.path.getsize(sys.argv[2]) / 1024:.1f} KiB, "
+          f"{compiled.header['n_trees']} trees, {compiled.header['n_nodes']} nodes); "
+          f"loads in {load_ms:.2f} ms, max proba diff {diff:.2g}")
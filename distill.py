@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import brier_score_loss, roc_auc_score
+from sklearn.tree import DecisionTreeClassifier
+
+from lookup_engine import LookupEngine, input_space
+from model_registry import AQ10_MODEL, REGISTRY_DIR, get_model, publish_estimator
+from synthetic_data import AQ10_SPEC, CohortSpec, generate_cohort
+from training import fold_scaler
+
+DISTILL_DIR = "distill_results"
+# Label agreement required on a realistic cohort and over every reachable input
+DEFAULT_AGREEMENT = 0.99
+DEFAULT_SPACE_AGREEMENT = 0.95
+COHORT_SIZE = 20_000
+LATENCY_REPEATS = 200
+CALIBRATION_BINS = 10
+
+
+def student_candidates(seed=42):
+    """Compact students to try, roughly smallest first"""
+    return {
+        'logistic': LogisticRegression(max_iter=1000),
+        'tree_depth4': DecisionTreeClassifier(max_depth=4, random_state=seed),
+        'tree_depth6': DecisionTreeClassifier(max_depth=6, random_state=seed),
+        'tree_depth8': DecisionTreeClassifier(max_depth=8, random_state=seed),
+        'tree_depth12': DecisionTreeClassifier(max_depth=12, random_state=seed),
+        'boosted_30x3': HistGradientBoostingClassifier(max_iter=30, max_depth=3, random_state=seed),
+        'boosted_100x4': HistGradientBoostingClassifier(max_iter=100, max_depth=4, random_state=seed),
+        'boosted_300x6': HistGradientBoostingClassifier(max_iter=300, max_depth=6, random_state=seed),
+    }
+
+
+def soft_label_fit(student, X, soft):
+    """Fit a classifier to soft labels by weighting a 0 and a 1 copy of every row.
+
+    Minimising the weighted log loss (or impurity) on the two copies is the same as
+    fitting P(autism) = soft, so every student is still a plain sklearn classifier.
+    """
+    X_fit = np.concatenate([X, X])
+    y_fit = np.concatenate([np.zeros(len(X), dtype=np.int8), np.ones(len(X), dtype=np.int8)])
+    weight = np.concatenate([1.0 - soft, soft])
+    keep = weight > 0
+    student.fit(X_fit[keep], y_fit[keep], sample_weight=weight[keep])
+    return student
+
+
+def expected_calibration_error(y, p, bins=CALIBRATION_BINS):
+    edges = np.linspace(0, 1, bins + 1)
+    which = np.clip(np.digitize(p, edges[1:-1]), 0, bins - 1)
+    error = 0.0
+    for b in range(bins):
+        mask = which == b
+        if mask.any():
+            error += mask.mean() * abs(p[mask].mean() - y[mask].mean())
+    return float(error)
+
+
+def _latency_ms(model, row):
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _profile(model, X_space, X_cohort, y_cohort):
+    start = time.perf_counter()
+    model.predict_proba(X_cohort)
+    batch_seconds = time.perf_counter() - start
+    p = model.predict_proba(X_cohort)[:, 1]
+    return {
+        'auc': float(roc_auc_score(y_cohort, p)),
+        'brier': float(brier_score_loss(y_cohort, p)),
+        'ece': expected_calibration_error(y_cohort, p),
+        'predict_row_ms': _latency_ms(model, X_space[:1]),
+        'predict_batch_ms': batch_seconds * 1000,
+        'model_bytes': len(pickle.dumps(model)),
+    }
+
+
+def distill(teacher, scaler=None, cohort_spec=AQ10_SPEC, candidates=None, seed=42):
+    """Train each candidate on the teacher's soft labels over the full response space.
+
+    Agreement is the share of identical 0.5-threshold labels over every reachable
+    input and over a synthetic cohort; AUC, Brier and ECE are measured on the
+    cohort's simulated ground truth and reported as student minus teacher.
+    Returns (teacher profile, {name: (student, report)}).
+    """
+    if scaler is not None:
+        # Older behavioural versions ship a separate scaler; fold it so the teacher takes raw rows
+        teacher = fold_scaler(teacher, scaler)
+    X_space = input_space()
+    soft = teacher.predict_proba(X_space)[:, 1]
+    X_cohort, y_cohort = generate_cohort(cohort_spec, COHORT_SIZE, seed=seed + 1)
+    X_cohort = X_cohort.astype(np.float32)
+    teacher_cohort = teacher.predict_proba(X_cohort)[:, 1]
+    teacher_profile = _profile(teacher, X_space, X_cohort, y_cohort)
+
+    students = {}
+    for name, student in (candidates or student_candidates(seed)).items():
+        start = time.perf_counter()
+        soft_label_fit(student, X_space, soft)
+        fit_seconds = time.perf_counter() - start
+        report = _profile(student, X_space, X_cohort, y_cohort)
+        student_soft = student.predict_proba(X_space)[:, 1]
+        student_cohort = student.predict_proba(X_cohort)[:, 1]
+        report.update({
+            'fit_seconds': fit_seconds,
+            'agreement': float(((student_soft > 0.5) == (soft > 0.5)).mean()),
+            'cohort_agreement': float(((student_cohort > 0.5) == (teacher_cohort > 0.5)).mean()),
+            'max_abs_diff': float(np.abs(student_soft - soft).max()),
+            'auc_delta': report['auc'] - teacher_profile['auc'],
+            'brier_delta': report['brier'] - teacher_profile['brier'],
+            'ece_delta': report['ece'] - teacher_profile['ece'],
+            'speedup': teacher_profile['predict_row_ms'] / report['predict_row_ms'],
+            'size_ratio': report['model_bytes'] / teacher_profile['model_bytes'],
+        })
+        students[name] = (student, report)
+    return teacher_profile, students
+
+
+def choose_student(students, teacher_profile, min_agreement=DEFAULT_AGREEMENT,
+                   min_space_agreement=DEFAULT_SPACE_AGREEMENT, max_latency_ms=None):
+    """Name of the smallest qualifying student, or None.
+
+    A student qualifies when it agrees with the teacher often enough, is smaller
+    than the teacher and meets the single-row latency budget.
+    """
+    eligible = [
+        (report['model_bytes'], name) for name, (_, report) in students.items()
+        if report['cohort_agreement'] >= min_agreement and report['agreement'] >= min_space_agreement
+        and report['model_bytes'] < teacher_profile['model_bytes']
+        and (max_latency_ms is None or report['predict_row_ms'] <= max_latency_ms)
+    ]
+    return min(eligible)[1] if eligible else None
+
+
+def promote(name, student_name, student, report, teacher_version, registry_dir=REGISTRY_DIR,
+            feature_names=None):
+    """Publish a distilled student (with its lookup table) as the line's current version"""
+    key = hashlib.sha256(f"{teacher_version}:{student_name}".encode('utf-8')).hexdigest()[:24]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lookup_path = LookupEngine.build(student, metadata={'key': key}).save(
+            os.path.join(tmp_dir, "model.lut.npz"))
+        return publish_estimator(name, student, {
+            'training_key': key,
+            'feature_schema': list(feature_names or AQ10_SPEC.feature_names),
+            'metrics': report,
+            'training_spec': {'distilled_from': teacher_version, 'student': student_name},
+        }, extra_files={'model.lut.npz': lookup_path}, registry_dir=registry_dir)
+
+
+def save_report(teacher_version, teacher_profile, students, chosen, out_dir=DISTILL_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"distill_{teacher_version}.json")
+    with open(path, 'w') as f:
+        json.dump({
+            'teacher_version': teacher_version,
+            'teacher': teacher_profile,
+            'students': {name: report for name, (_, report) in students.items()},
+            'chosen': chosen,
+        }, f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the current forest into a compact student model")
+    parser.add_argument('--model', default=AQ10_MODEL, help="Registry model line to distill")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    parser.add_argument('--min-agreement', type=float, default=DEFAULT_AGREEMENT,
+                        help="Label agreement with the teacher on a synthetic cohort")
+    parser.add_argument('--min-space-agreement', type=float, default=DEFAULT_SPACE_AGREEMENT,
+                        help="Label agreement over every reachable input")
+    parser.add_argument('--max-latency-ms', type=float, help="Single-row latency budget for promotion")
+    parser.add_argument('--promote', action='store_true', help="Publish the chosen student as the current version")
+    args = parser.parse_args()
+
+    registered = get_model(args.model, args.registry_dir)
+    if registered is None:
+        print(f"No published version of {args.model}")
+        raise SystemExit(1)
+    generator = registered.manifest.get('training_spec', {}).get('generator')
+    cohort_spec = CohortSpec.from_dict(generator) if generator else AQ10_SPEC
+
+    teacher_profile, students = distill(registered.model, registered.scaler, cohort_spec)
+    print(f"teacher {registered.version}: auc {teacher_profile['auc']:.4f}, "
+          f"{teacher_profile['predict_row_ms']:.3f} ms/row, {teacher_profile['model_bytes'] / 1024:.0f} KiB")
+    for name, (_, report) in students.items():
+        print(f"{name:>14}: agreement {report['agreement']:.4f} (cohort {report['cohort_agreement']:.4f}), "
+              f"auc {report['auc_delta']:+.4f}, brier {report['brier_delta']:+.4f}, ece {report['ece_delta']:+.4f}, "
+              f"{report['predict_row_ms']:.3f} ms/row (x{report['speedup']:.0f}), "
+              f"{report['model_bytes'] / 1024:.1f} KiB")
+
+    chosen = choose_student(students, teacher_profile, args.min_agreement, args.min_space_agreement,
+                            args.max_latency_ms)
+    print(f"Report written to {save_report(registered.version, teacher_profile, students, chosen)}")
+    if chosen is None:
+        print("No student met the agreement, size and latency requirements; nothing promoted")
+        raise SystemExit(1)
+    print(f"Chosen student: {chosen}")
+    if args.promote:
+        student, report = students[chosen]
+        version = promote(args.model, chosen, student, report, registered.version, args.registry_dir,
+                          registered.feature_names)
+        print(f"Promoted {chosen} as {args.model} version {version}")
@@ -0,0 +1,253 @@
+import argparse
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from assessment_store import DEFAULT_DB_PATH, AssessmentStore
+from compiled_forest import save_compiled
+from lookup_engine import LookupEngine
+from model_registry import AQ10_MODEL, REGISTRY_DIR, SCREENING_MODEL, get_model, model_dir, publish_estimator
+from session_journal import get_journal
+from session_shards import SHARD_DIR, ShardIndex
+from synthetic_data import AQ10_SPEC, CohortSpec, generate_cohort
+
+LEDGER_NAME = "ledger.json"
+# questionnaire_results test types (and the app writing them) that may carry confirmed outcomes
+STORE_SOURCES = {'srs_assessment': 'srs_compliant_app', 'asd_questionnaire': 'autism_detection_app'}
+# Model lines scored from raw Q1..Q10, Age, Gender rows
+UPDATABLE_MODELS = (AQ10_MODEL, SCREENING_MODEL)
+DEFAULT_NEW_TREES = 10
+DEFAULT_MAX_TREES = 200
+DEFAULT_REPLAY_SIZE = 500
+
+
+def submission_id(record):
+    """Stable identifier for a labelled submission (explicit id or content hash)"""
+    if record.get('submission_id'):
+        return str(record['submission_id'])
+    payload = json.dumps([record['features'], record['label'], str(record.get('timestamp', ''))])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def labelled_submission(features, label, source, timestamp=None, record_id=None):
+    """Build the record the updater consumes: 12 encoded features plus a confirmed label"""
+    features = [int(value) for value in features]
+    if len(features) != 12:
+        raise ValueError("features must be Q1..Q10, Age, Gender")
+    return {
+        'submission_id': record_id,
+        'source': source,
+        'features': features,
+        'label': int(label),
+        'timestamp': str(timestamp or datetime.now()),
+    }
+
+
+def extract_submissions(records, source):
+    """Pick the labelled submissions out of stored assessment records.
+
+    Works on srs_compliant_app assessments, autism_detection_app questionnaire_results
+    and professional_autism_app assessment_history entries. Only records that carry
+    the encoded model features ('model_features') and a clinician-confirmed outcome
+    ('confirmed_outcome') can be learned from; everything else is skipped.
+    """
+    submissions = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            continue
+        features = record.get('model_features')
+        outcome = record.get('confirmed_outcome')
+        if features is None or outcome is None:
+            continue
+        timestamp = record.get('date') or record.get('timestamp')
+        record_id = record.get('id') or f"{source}:{timestamp}:{i}"
+        submissions.append(labelled_submission(features, outcome, source, timestamp, record_id))
+    return submissions
+
+
+def store_submissions(store):
+    """Confirmed submissions from srs_compliant_app and autism_detection_app questionnaire results"""
+    submissions = []
+    for test_type, source in STORE_SOURCES.items():
+        records = [dict(row['data'], id=f"questionnaire_results:{row['id']}")
+                   for row in store.results('questionnaire_results', test_type)]
+        submissions += extract_submissions(records, source)
+    return submissions
+
+
+def session_submissions(shard_index):
+    """Confirmed submissions from every family's professional assessment_history"""
+    submissions = []
+    # Families migrated from the old shared file all point at that one shard
+    for shard in dict.fromkeys(entry['shard'] for entry in shard_index.users().values()):
+        source = f"professional:{shard}"
+        history = get_journal(shard).load()['assessment_history']
+        submissions += extract_submissions([dict(record, id=f"{source}:{record['id']}")
+                                            for record in history if isinstance(record, dict) and record.get('id')],
+                                           source)
+    return submissions
+
+
+def confirmed_submissions(db_path=DEFAULT_DB_PATH, shard_dir=SHARD_DIR):
+    """Every clinician-confirmed submission across the assessment database and the family shards"""
+    submissions = []
+    if os.path.exists(db_path):
+        submissions += store_submissions(AssessmentStore(db_path))
+    if os.path.isdir(shard_dir):
+        submissions += session_submissions(ShardIndex(shard_dir))
+    return submissions
+
+
+class ModelLedger:
+    """JSON record of the registry versions incremental updates produced and what each absorbed"""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+        else:
+            self.data = {'versions': []}
+
+    @property
+    def versions(self):
+        return self.data['versions']
+
+    def absorbed_ids(self, version):
+        """Submissions learned by version and the incremental versions it descends from.
+
+        A version the ledger does not know (e.g. a fresh retrain) has absorbed nothing.
+        """
+        parents = {entry['version']: entry for entry in self.versions}
+        absorbed = set()
+        while version in parents:
+            absorbed.update(parents[version]['absorbed'])
+            version = parents[version]['parent']
+        return absorbed
+
+    def delta(self, submissions, version):
+        """Submissions version has not learned from yet"""
+        absorbed = self.absorbed_ids(version)
+        return [record for record in submissions if submission_id(record) not in absorbed]
+
+    def record(self, version, parent, absorbed, details):
+        entry = {
+            'version': version,
+            'parent': parent,
+            'absorbed': absorbed,
+            'created': str(datetime.now()),
+            **details,
+        }
+        self.versions.append(entry)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+        return entry
+
+
+def update_forest(model, X_new, y_new, n_new_trees=DEFAULT_NEW_TREES, max_trees=DEFAULT_MAX_TREES,
+                  replay_spec=AQ10_SPEC, replay_size=DEFAULT_REPLAY_SIZE, seed=42):
+    """Grow a fitted RandomForest by n_new_trees trained on the delta, warm-start style.
+
+    New trees see the delta plus a small replay sample from the training generator so
+    both classes are always present. Once the forest exceeds max_trees the oldest
+    trees are retired. The input model is left untouched.
+    """
+    X_new = np.asarray(X_new)
+    y_new = np.asarray(y_new)
+    if replay_size:
+        X_replay, y_replay = generate_cohort(replay_spec, replay_size, seed=seed)
+        X_fit = np.concatenate([X_new, X_replay])
+        y_fit = np.concatenate([y_new, y_replay])
+    else:
+        X_fit, y_fit = X_new, y_new
+    if len(np.unique(y_fit)) < len(model.classes_):
+        raise ValueError("The update batch must contain every class the model was trained on")
+
+    updated = copy.deepcopy(model)
+    updated.set_params(warm_start=True, n_estimators=len(updated.estimators_) + n_new_trees)
+    updated.fit(X_fit, y_fit)
+
+    retired = max(0, len(updated.estimators_) - max_trees)
+    if retired:
+        updated.estimators_ = updated.estimators_[retired:]
+    updated.set_params(warm_start=False, n_estimators=len(updated.estimators_))
+    return updated, retired
+
+
+def refresh_model(submissions, name=AQ10_MODEL, registry_dir=REGISTRY_DIR,
+                  n_new_trees=DEFAULT_NEW_TREES, max_trees=DEFAULT_MAX_TREES):
+    """Absorb new submissions into the line's current version and publish the result.
+
+    Returns the ledger entry of the new registry version, or None when the current
+    version has already learned every submission.
+    """
+    registered = get_model(name, registry_dir)
+    if registered is None:
+        raise ValueError(f"No published version of {name} to update")
+    if not isinstance(registered.model, RandomForestClassifier):
+        raise ValueError(f"{name} version {registered.version} is not a single random forest")
+    ledger = ModelLedger(os.path.join(model_dir(name, registry_dir), LEDGER_NAME))
+    delta = ledger.delta(submissions, registered.version)
+    if not delta:
+        return None
+
+    generator = registered.manifest.get('training_spec', {}).get('generator')
+    replay_spec = CohortSpec.from_dict(generator) if generator else AQ10_SPEC
+    X_new = np.array([record['features'] for record in delta])
+    y_new = np.array([record['label'] for record in delta])
+
+    start = time.perf_counter()
+    updated, retired = update_forest(registered.model, X_new, y_new, n_new_trees, max_trees,
+                                     replay_spec=replay_spec, seed=len(ledger.versions) + 42)
+    seconds = time.perf_counter() - start
+
+    absorbed = [submission_id(record) for record in delta]
+    key = hashlib.sha256(json.dumps([registered.version] + absorbed).encode('utf-8')).hexdigest()[:24]
+    details = {
+        'n_trees': len(updated.estimators_),
+        'trees_added': n_new_trees,
+        'trees_retired': retired,
+        'update_seconds': seconds,
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Same serving artifacts a trained version ships with
+        forest_path = os.path.join(tmp_dir, "model.forest")
+        save_compiled(updated, forest_path, feature_names=registered.feature_names, metadata={'key': key})
+        lookup_path = LookupEngine.build(updated, metadata={'key': key}).save(os.path.join(tmp_dir, "model.lut.npz"))
+        version = publish_estimator(name, updated, {
+            'training_key': key,
+            'feature_schema': list(registered.feature_names),
+            'metrics': {**registered.metrics, 'incremental': details},
+            'training_spec': {**registered.manifest.get('training_spec', {}), 'updated_from': registered.version},
+        }, extra_files={'model.forest': forest_path, 'model.lut.npz': lookup_path}, registry_dir=registry_dir)
+    return ledger.record(version, registered.version, absorbed, details)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Absorb confirmed screening outcomes into the current model")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help="Assessment database (srs and detection apps)")
+    parser.add_argument('--shard-dir', default=SHARD_DIR, help="Professional app family shards")
+    parser.add_argument('--model', default=AQ10_MODEL, choices=UPDATABLE_MODELS, help="Registry model line to update")
+    parser.add_argument('--registry-dir', default=REGISTRY_DIR)
+    parser.add_argument('--new-trees', type=int, default=DEFAULT_NEW_TREES)
+    parser.add_argument('--max-trees', type=int, default=DEFAULT_MAX_TREES)
+    args = parser.parse_args()
+
+    submissions = confirmed_submissions(args.db, args.shard_dir)
+    print(f"{len(submissions)} clinician-confirmed submissions")
+    version = refresh_model(submissions, args.model, args.registry_dir, args.new_trees, args.max_trees)
+    if version is None:
+        print("No new submissions; model unchanged")
+    else:
+        print(f"Published {args.model} version {version['version']}: absorbed "
+              f"{len(version['absorbed'])} submissions in {version['update_seconds']:.2f}s "
+              f"({version['n_trees']} trees)")
@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import joblib
-import os
+from synthetic_data import KIDS_SPEC
+from training import train_model
+from model_registry import SCREENING_MODEL, get_model, publish
+from scoring_service import screen
 
 # Kid-friendly page config
 st.set_page_config(
@@ -253,13 +254,12 @@ elif page == "🎯 Fun Assessment":
             submitted = st.form_submit_button("✨ Show Me Magic Results!", use_container_width=True)
         
         if submitted:
-            if os.path.exists("model.pkl"):
-                model = joblib.load("model.pkl")
-                gender_code = 1 if child_gender == "Boy" else 0
-                data = [answers + [child_age, gender_code]]
-                
-                prediction = model.predict(data)[0]
-                probability = model.predict_proba(data)[0]
+            gender_code = 1 if child_gender == "Boy" else 0
+            data = answers + [child_age, gender_code]
+            result = screen(SCREENING_MODEL, data)
+            if result is not None:
+                prediction = result.label
+                probability = result.probabilities
                 
                 st.markdown("---")
                 st.markdown("### 🎊 Your Special Results Are Here!")
@@ -309,7 +309,7 @@ elif page == "🤖 Magic Training":
     
     col1, col2 = st.columns(2)
     with col1:
-        if os.path.exists("model.pkl"):
+        if get_model(SCREENING_MODEL) is not None:
             st.success("✅ **Magic Computer:** Ready to help!")
             st.info("🧠 **Brain Status:** Super smart and trained!")
         else:
@@ -337,56 +337,15 @@ elif page == "🤖 Magic Training":
         status_text.text("🎨 Creating colorful practice examples...")
         progress_bar.progress(25)
         
-        np.random.seed(42)
-        training_data, labels = [], []
-        
-        for _ in range(1000):
-            special_kid = np.random.choice([0, 1], p=[0.7, 0.3])
-            
-            if special_kid:
-                features = [
-                    np.random.choice([0, 1], p=[0.3, 0.7]),  # sounds
-                    np.random.choice([0, 1], p=[0.7, 0.3]),  # details
-                    np.random.choice([0, 1], p=[0.7, 0.3]),  # multitask
-                    np.random.choice([0, 1], p=[0.7, 0.3]),  # switching
-                    np.random.choice([0, 1], p=[0.8, 0.2]),  # communication
-                    np.random.choice([0, 1], p=[0.8, 0.2]),  # boredom
-                    np.random.choice([0, 1], p=[0.2, 0.8]),  # intentions
-                    np.random.choice([0, 1], p=[0.2, 0.8]),  # collecting
-                    np.random.choice([0, 1], p=[0.8, 0.2]),  # faces
-                    np.random.choice([0, 1], p=[0.2, 0.8]),  # people
-                    np.random.randint(2, 18),  # age
-                    np.random.choice([0, 1])   # gender
-                ]
-            else:
-                features = [
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.randint(2, 18),
-                    np.random.choice([0, 1])
-                ]
-            
-            training_data.append(features)
-            labels.append(special_kid)
-        
         progress_bar.progress(60)
         status_text.text("🧠 Teaching the computer to be super smart...")
         
-        model = RandomForestClassifier(n_estimators=50, random_state=42)
-        model.fit(training_data, labels)
+        result = train_model(KIDS_SPEC, n_samples=1000, test_size=0, n_estimators=50, seed=42)
         
         progress_bar.progress(90)
         status_text.text("💾 Saving the computer's new brain...")
         
-        joblib.dump(model, "model.pkl")
+        publish(result, SCREENING_MODEL)
         
         progress_bar.progress(100)
         status_text.text("🎉 Magic computer is ready to help kids!")
@@ -0,0 +1,135 @@
+import json
+import sys
+import time
+
+import numpy as np
+
+# Ages the questionnaire forms accept (st.number_input min/max across the apps)
+DEFAULT_AGE_RANGE = (1, 100)
+N_QUESTIONS = 10
+N_PATTERNS = 1 << N_QUESTIONS
+ANSWER_WEIGHTS = (1 << np.arange(N_QUESTIONS)).astype(np.int32)
+MAX_TABLE_ERROR = 1e-3
+
+
+class LookupEngine:
+    """Precomputed P(autism) for every reachable (answers, age, gender) input.
+
+    The table is indexed [age - min_age, gender, answer pattern] where the pattern
+    packs Q1..Q10 into ten bits (Q1 is bit 0). Rows outside the table (ages out of
+    range, non-binary answers) are scored by the fallback model.
+    """
+
+    def __init__(self, table, age_range, classes, fallback=None, metadata=None):
+        self.table = table
+        self.age_range = tuple(age_range)
+        self.classes_ = np.asarray(classes)
+        self.fallback = fallback
+        self.metadata = metadata or {}
+        self.fallback_rows = 0
+
+    @classmethod
+    def build(cls, model, age_range=DEFAULT_AGE_RANGE, metadata=None):
+        """Score the whole input space with the model in one batch and verify the rounding"""
+        exact = model.predict_proba(input_space(age_range))[:, 1]
+        table = exact.astype(np.float16)
+        # Rounding can land a value just above 0.5 on exactly 0.5; nudge it back so labels agree
+        table[(exact > 0.5) & (table <= 0.5)] = np.nextafter(np.float16(0.5), np.float16(1))
+        table = table.reshape(age_range[1] - age_range[0] + 1, 2, N_PATTERNS)
+        engine = cls(table, age_range, model.classes_, fallback=model, metadata=dict(metadata or {}))
+        engine.metadata['max_abs_error'] = engine._compare(exact)
+        return engine
+
+    def verify(self, model=None):
+        """Re-score every table entry with the live forest; returns the max abs difference"""
+        model = model if model is not None else self.fallback
+        return self._compare(model.predict_proba(input_space(self.age_range))[:, 1])
+
+    def _compare(self, exact):
+        stored = self.table.reshape(-1).astype(np.float64)
+        diff = float(np.abs(stored - exact).max())
+        if diff > MAX_TABLE_ERROR or not np.array_equal(stored > 0.5, exact > 0.5):
+            raise AssertionError(f"Lookup table disagrees with the model (max diff {diff:.3g})")
+        return diff
+
+    def indices(self, X):
+        """Table coordinates for each row plus a mask of rows the table covers"""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        answers = X[:, :N_QUESTIONS]
+        age = X[:, 10].astype(np.int64)
+        gender = X[:, 11].astype(np.int64)
+        covered = (
+            ((answers == 0) | (answers == 1)).all(axis=1)
+            & (X[:, 10] == age) & (age >= self.age_range[0]) & (age <= self.age_range[1])
+            & ((gender == 0) | (gender == 1))
+        )
+        pattern = answers.astype(np.int32) @ ANSWER_WEIGHTS
+        return age - self.age_range[0], gender, pattern, covered
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        age_idx, gender, pattern, covered = self.indices(X)
+        positive = np.empty(len(X))
+        positive[covered] = self.table[age_idx[covered], gender[covered], pattern[covered]]
+        if not covered.all():
+            if self.fallback is None:
+                raise ValueError("Input outside the lookup table and no fallback model is set")
+            missing = ~covered
+            self.fallback_rows += int(missing.sum())
+            positive[missing] = self.fallback.predict_proba(X[missing])[:, 1]
+        return np.column_stack([1.0 - positive, positive])
+
+    def lookup(self, answers, age, gender):
+        """P(autism) for one respondent by direct indexing, or None when outside the table"""
+        if not self.age_range[0] <= age <= self.age_range[1] or gender not in (0, 1):
+            return None
+        pattern = 0
+        for bit, answer in enumerate(answers):
+            if answer not in (0, 1):
+                return None
+            pattern |= int(answer) << bit
+        return float(self.table[int(age) - self.age_range[0], int(gender), pattern])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+    def save(self, path):
+        """Write the table and its metadata to an .npz file"""
+        np.savez(path, table=self.table, age_range=np.array(self.age_range),
+                 classes=self.classes_, metadata=np.array(json.dumps(self.metadata)))
+        return path
+
+    @classmethod
+    def load(cls, path, fallback=None):
+        with np.load(path) as data:
+            return cls(data['table'], tuple(int(a) for a in data['age_range']), data['classes'],
+                       fallback=fallback, metadata=json.loads(str(data['metadata'])))
+
+
+def input_space(age_range=DEFAULT_AGE_RANGE):
+    """Every (Q1..Q10, Age, Gender) row, ordered like the table: age, gender, pattern"""
+    ages = np.arange(age_range[0], age_range[1] + 1)
+    X = np.empty((len(ages), 2, N_PATTERNS, 12), dtype=np.float32)
+    X[..., :N_QUESTIONS] = (np.arange(N_PATTERNS)[:, None] >> np.arange(N_QUESTIONS)) & 1
+    X[..., 10] = ages[:, None, None]
+    X[..., 11] = np.array([0, 1])[None, :, None]
+    return X.reshape(-1, 12)
+
+
+if __name__ == "__main__":
+    import joblib
+
+    if len(sys.argv) != 3:
+        print("Usage: python lookup_engine.py <model.pkl> <output.lut.npz>")
+        raise SystemExit(2)
+    model = joblib.load(sys.argv[1])
+    start = time.perf_counter()
+    engine = LookupEngine.build(model)
+    build_seconds = time.perf_counter() - start
+    engine.save(sys.argv[2])
+    print(f"Built {engine.table.size} entries in {build_seconds:.2f}s "
+          f"(max error {engine.metadata['max_abs_error']:.2g}), saved to {sys.argv[2]}")
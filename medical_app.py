@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import joblib
-import os
 from datetime import datetime
+from synthetic_data import AQ10_SPEC
+from training import train_model
+from model_registry import SCREENING_MODEL, get_model, publish
+from scoring_service import screen
+from page_metrics import PageTimer
 
 # Medical-grade page config
 st.set_page_config(
@@ -212,13 +214,14 @@ with tab1:
             submitted = st.form_submit_button("🔍 Generate Assessment Report", use_container_width=True)
         
         if submitted:
-            if os.path.exists("model.pkl"):
-                model = joblib.load("model.pkl")
-                gender_code = 1 if patient_gender == "Male" else 0
-                input_data = [responses + [patient_age, gender_code]]
-                
-                prediction = model.predict(input_data)[0]
-                probability = model.predict_proba(input_data)[0]
+            timer = PageTimer("medical_app")
+            gender_code = 1 if patient_gender == "Male" else 0
+            input_data = responses + [patient_age, gender_code]
+            timer.lap('feature_encoding')
+            result = screen(SCREENING_MODEL, input_data, timer)
+            if result is not None:
+                prediction = result.label
+                probability = result.probabilities
                 
                 st.markdown("---")
                 st.markdown("### 📋 Clinical Assessment Report")
@@ -262,6 +265,8 @@ with tab1:
                 # Score breakdown
                 total_score = sum(responses)
                 st.markdown(f"**AQ-10 Total Score:** {total_score}/10")
+                timer.lap('rendering')
+                timer.finish(result.model_version)
                 
             else:
                 st.error("❌ **System Error:** Assessment model not available. Please contact system administrator.")
@@ -274,7 +279,7 @@ with tab2:
     
     col1, col2 = st.columns(2)
     with col1:
-        if os.path.exists("model.pkl"):
+        if get_model(SCREENING_MODEL) is not None:
             st.success("✅ **Model Status:** Active and Ready")
             st.info("**Last Training:** System initialized")
         else:
@@ -304,59 +309,16 @@ with tab2:
             status_text.text("🔄 Generating clinical training dataset...")
             progress_bar.progress(20)
             
-            np.random.seed(42)
-            training_data, labels = [], []
-            
-            for _ in range(1000):
-                autism_case = np.random.choice([0, 1], p=[0.7, 0.3])
-                
-                if autism_case:
-                    # Autism-positive patterns
-                    features = [
-                        np.random.choice([0, 1], p=[0.3, 0.7]),  # Sensory sensitivity
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # Detail focus
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # Multitasking
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # Task switching
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # Social communication
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # Social awareness
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # Theory of mind
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # Special interests
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # Facial recognition
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # Social intentions
-                        np.random.randint(3, 60),  # Age
-                        np.random.choice([0, 1])   # Gender
-                    ]
-                else:
-                    # Neurotypical patterns
-                    features = [
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.randint(3, 60),
-                        np.random.choice([0, 1])
-                    ]
-                
-                training_data.append(features)
-                labels.append(autism_case)
-            
             progress_bar.progress(60)
             status_text.text("🤖 Training machine learning model...")
             
             # Model training
-            model = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
-            model.fit(training_data, labels)
+            result = train_model(AQ10_SPEC, n_samples=1000, test_size=0, n_estimators=100, max_depth=10, seed=42)
             
             progress_bar.progress(90)
             status_text.text("💾 Saving clinical model...")
             
-            joblib.dump(model, "model.pkl")
+            publish(result, SCREENING_MODEL)
             
             progress_bar.progress(100)
             status_text.text("✅ Clinical system initialized successfully")
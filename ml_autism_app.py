@@ -1,11 +1,11 @@
-          import streamlit as st
+import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from sklearn.preprocessing import StandardScaler
-import joblib
+from synthetic_data import ML_SPEC
+from training import train_model
+from model_registry import BEHAVIOURAL_MODEL, get_model, load_stats, publish
+from predictor import get_predictor
+from model_search import cheapest_meeting, grid_configs, pareto_front, random_configs, run_search, save_search
 try:
     import matplotlib.pyplot as plt
     import seaborn as sns
@@ -51,107 +51,45 @@ elif page == "📊 Data & Training":
         n_estimators = st.slider("Random Forest Trees", 50, 200, 100)
         max_depth = st.slider("Max Tree Depth", 5, 20, 10)
     
-    if st.button("🚀 Generate Data & Train Model"):
+    training_mode = st.radio("Training Mode", ["🚀 Single Model", "🔬 Hyperparameter Search"], horizontal=True)
+    if training_mode == "🚀 Single Model":
+        deploy_ensemble = st.checkbox("Deploy the 5 cross-validation fold models as one merged forest")
+    
+    if training_mode == "🚀 Single Model" and st.button("🚀 Generate Data & Train Model"):
         with st.spinner("Training ML model..."):
-            # Generate synthetic autism dataset
-            np.random.seed(42)
-            
-            # Feature names
-            features = ['sensory_sensitivity', 'detail_focus', 'multitasking', 'task_switching',
-                       'social_communication', 'social_awareness', 'theory_of_mind', 'special_interests',
-                       'facial_recognition', 'social_intentions', 'age', 'gender']
-            
-            data = []
-            labels = []
-            
-            for _ in range(n_samples):
-                # 30% autism cases
-                has_autism = np.random.choice([0, 1], p=[0.7, 0.3])
-                
-                if has_autism:
-                    # Autism pattern probabilities
-                    sample = [
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # High sensory sensitivity
-                        np.random.choice([0, 1], p=[0.6, 0.4]),  # Detail focused
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # Difficulty multitasking
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # Difficulty task switching
-                        np.random.choice([0, 1], p=[0.9, 0.1]),  # Social communication challenges
-                        np.random.choice([0, 1], p=[0.9, 0.1]),  # Social awareness challenges
-                        np.random.choice([0, 1], p=[0.1, 0.9]),  # Theory of mind difficulties
-                        np.random.choice([0, 1], p=[0.1, 0.9]),  # Strong special interests
-                        np.random.choice([0, 1], p=[0.9, 0.1]),  # Facial recognition challenges
-                        np.random.choice([0, 1], p=[0.1, 0.9]),  # Social intention difficulties
-                        np.random.randint(3, 60),               # Age
-                        np.random.choice([0, 1])                # Gender
-                    ]
-                else:
-                    # Neurotypical pattern probabilities
-                    sample = [
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # Lower sensory sensitivity
-                        np.random.choice([0, 1], p=[0.4, 0.6]),  # Balanced detail focus
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # Good multitasking
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # Good task switching
-                        np.random.choice([0, 1], p=[0.1, 0.9]),  # Good social communication
-                        np.random.choice([0, 1], p=[0.1, 0.9]),  # Good social awareness
-                        np.random.choice([0, 1], p=[0.9, 0.1]),  # Good theory of mind
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # Moderate special interests
-                        np.random.choice([0, 1], p=[0.1, 0.9]),  # Good facial recognition
-                        np.random.choice([0, 1], p=[0.9, 0.1]),  # Good social intentions
-                        np.random.randint(3, 60),               # Age
-                        np.random.choice([0, 1])                # Gender
-                    ]
-                
-                data.append(sample)
-                labels.append(has_autism)
-            
-            # Create DataFrame
-            df = pd.DataFrame(data, columns=features)
-            df['autism'] = labels
+            # Generate synthetic autism dataset and train; an unchanged spec
+            # reuses the cached artifact instead of refitting
+            features = ML_SPEC.feature_names
+            result = train_model(
+                ML_SPEC,
+                n_samples=n_samples,
+                test_size=test_size,
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                seed=42,
+                class_weight='balanced',
+                stratify=True,
+                cv_folds=5,
+                scale_features=True
+            )
+            metrics = result.metrics
+            rf_model = result.model
+            accuracy = metrics['accuracy']
+            cv_scores = np.array(metrics['cv_scores'])
             
             # Display dataset info
-            st.success(f"✅ Generated {n_samples} samples")
+            st.success(f"✅ Generated {n_samples} samples" + (" (cached model reused)" if result.cached else ""))
             
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Total Samples", n_samples)
             with col2:
-                st.metric("Autism Cases", sum(labels))
+                st.metric("Autism Cases", metrics['positives'])
             with col3:
-                st.metric("Neurotypical Cases", n_samples - sum(labels))
-            
-            # Train model
-            X = df.drop('autism', axis=1)
-            y = df['autism']
-            
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42, stratify=y
-            )
+                st.metric("Neurotypical Cases", n_samples - metrics['positives'])
             
-            # Scale features
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
-            
-            # Train Random Forest
-            rf_model = RandomForestClassifier(
-                n_estimators=n_estimators,
-                max_depth=max_depth,
-                random_state=42,
-                class_weight='balanced'
-            )
-            
-            rf_model.fit(X_train_scaled, y_train)
-            
-            # Predictions
-            y_pred = rf_model.predict(X_test_scaled)
-            accuracy = accuracy_score(y_test, y_pred)
-            
-            # Cross-validation
-            cv_scores = cross_val_score(rf_model, X_train_scaled, y_train, cv=5)
-            
-            # Save model and scaler
-            joblib.dump(rf_model, "autism_rf_model.pkl")
-            joblib.dump(scaler, "feature_scaler.pkl")
+            # Publish one artifact; the feature scaling is folded into its split thresholds
+            publish(result, BEHAVIOURAL_MODEL, use_ensemble=deploy_ensemble)
             
             # Display results
             st.subheader("🎯 Model Performance")
@@ -164,9 +102,20 @@ elif page == "📊 Data & Training":
             with col3:
                 st.metric("CV Std", f"{cv_scores.std():.3f}")
             
+            # Folds are fit in parallel and kept as a deployable ensemble
+            fold_df = pd.DataFrame({
+                'Fold': range(1, len(cv_scores) + 1),
+                'Accuracy': cv_scores,
+                'Fit Time (s)': metrics['cv_fit_seconds'],
+                'Score Time (s)': metrics['cv_score_seconds']
+            })
+            st.dataframe(fold_df.set_index('Fold'))
+            st.caption(f"Merged fold ensemble ({result.ensemble.n_estimators} trees) test accuracy: "
+                       f"{metrics['ensemble_accuracy']:.3f}" + (" — deployed" if deploy_ensemble else ""))
+            
             # Confusion Matrix
+            cm = np.array(metrics['confusion_matrix'])
             if PLOTS_AVAILABLE:
-                cm = confusion_matrix(y_test, y_pred)
                 fig, ax = plt.subplots(figsize=(6, 4))
                 sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax)
                 ax.set_title('Confusion Matrix')
@@ -174,7 +123,6 @@ elif page == "📊 Data & Training":
                 ax.set_ylabel('Actual')
                 st.pyplot(fig)
             else:
-                cm = confusion_matrix(y_test, y_pred)
                 st.write(f"Confusion Matrix: TN={cm[0,0]}, FP={cm[0,1]}, FN={cm[1,0]}, TP={cm[1,1]}")
             
             # Feature Importance
@@ -194,20 +142,75 @@ elif page == "📊 Data & Training":
             
             # Classification Report
             st.subheader("📋 Detailed Classification Report")
-            report = classification_report(y_test, y_pred, output_dict=True)
-            report_df = pd.DataFrame(report).transpose()
+            report_df = pd.DataFrame(metrics['classification_report']).transpose()
             st.dataframe(report_df)
+    
+    if training_mode == "🔬 Hyperparameter Search":
+        st.subheader("🔬 Hyperparameter Search")
+        st.write("Trials run in parallel on all CPU cores using the sample count and test split above.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            search_type = st.selectbox("Search Strategy", ["Grid", "Random"])
+            accuracy_floor = st.slider("Accuracy Floor", 0.80, 1.00, 0.95)
+        with col2:
+            if search_type == "Grid":
+                tree_grid = st.multiselect("Trees", [10, 25, 50, 100, 200, 300], [50, 100, 200])
+                depth_grid = st.multiselect("Max Depth", [3, 5, 10, 15, 20], [5, 10, 20])
+            else:
+                n_trials = st.slider("Trials", 4, 64, 16)
+        
+        if st.button("🔬 Run Search"):
+            if search_type == "Grid":
+                configs = grid_configs(sorted(tree_grid), sorted(depth_grid))
+            else:
+                configs = random_configs(n_trials)
+            
+            if not configs:
+                st.warning("Select at least one value for each parameter.")
+            else:
+                progress_bar = st.progress(0)
+                trial_table = st.empty()
+                trials = []
+                
+                # Stream trials into the page as workers finish them
+                for trial in run_search(configs, ML_SPEC, n_samples=n_samples, test_size=test_size, seed=42):
+                    trials.append(trial)
+                    progress_bar.progress(len(trials) / len(configs))
+                    trial_table.dataframe(pd.DataFrame([
+                        {**t['config'], **{k: v for k, v in t.items() if k != 'config'}} for t in trials
+                    ]).sort_values('accuracy', ascending=False))
+                
+                saved_path = save_search(trials, {
+                    'mode': search_type.lower(),
+                    'n_samples': n_samples,
+                    'test_size': test_size,
+                    'accuracy_floor': accuracy_floor,
+                })
+                
+                st.subheader("📉 Pareto Front (Accuracy vs Latency & Size)")
+                front = pareto_front(trials)
+                st.dataframe(pd.DataFrame([
+                    {**t['config'], 'accuracy': t['accuracy'], 'predict_ms': t['predict_ms'],
+                     'model_bytes': t['model_bytes']} for t in front
+                ]))
+                st.caption(f"Saved to {saved_path}")
+                
+                best = cheapest_meeting(trials, accuracy_floor)
+                if best:
+                    st.success(f"✅ Cheapest model meeting {accuracy_floor:.0%}: {best['config']} "
+                               f"(accuracy {best['accuracy']:.3f}, {best['predict_ms']:.2f} ms/prediction)")
+                else:
+                    st.warning(f"No trial reached the {accuracy_floor:.0%} accuracy floor.")
 
 elif page == "🔍 Prediction":
     st.header("🔍 Autism Screening Prediction")
     
-    if not (os.path.exists("autism_rf_model.pkl") and os.path.exists("feature_scaler.pkl")):
+    # Scores raw inputs with the current registry version (feature scaling is folded into the forest)
+    predictor = get_predictor(BEHAVIOURAL_MODEL)
+    if predictor is None:
         st.error("❌ Model not found! Please train the model first.")
     else:
-        # Load model and scaler
-        model = joblib.load("autism_rf_model.pkl")
-        scaler = joblib.load("feature_scaler.pkl")
-        
         st.subheader("Patient Information & Behavioral Assessment")
         
         with st.form("ml_prediction"):
@@ -239,7 +242,7 @@ elif page == "🔍 Prediction":
             
             if submitted:
                 # Prepare input data
-                input_data = np.array([[
+                input_data = np.array([
                     1 if sensory == "Yes" else 0,
                     1 if detail_focus == "Yes" else 0,
                     1 if multitask == "Yes" else 0,
@@ -252,14 +255,12 @@ elif page == "🔍 Prediction":
                     1 if social_int == "Yes" else 0,
                     age,
                     1 if gender == "Male" else 0
-                ]])
-                
-                # Scale input
-                input_scaled = scaler.transform(input_data)
+                ])
                 
                 # Predict
-                prediction = model.predict(input_scaled)[0]
-                probability = model.predict_proba(input_scaled)[0]
+                result = predictor.predict(input_data)
+                prediction = result.label
+                probability = result.probabilities
                 
                 st.markdown("---")
                 st.subheader("🎯 ML Prediction Results")
@@ -318,54 +319,71 @@ elif page == "🔍 Prediction":
 elif page == "📈 Model Analysis":
     st.header("📈 Model Analysis & Insights")
     
-    if not os.path.exists("autism_rf_model.pkl"):
+    registered = get_model(BEHAVIOURAL_MODEL)
+    if registered is None:
         st.error("❌ Model not found! Please train the model first.")
     else:
-        model = joblib.load("autism_rf_model.pkl")
+        model = registered.model
+        # Distillation can publish a compact student (logistic, tree, boosted) to this line
+        is_forest = hasattr(model, 'estimators_')
         
         st.subheader("🔍 Model Architecture")
         
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Algorithm", "Random Forest")
+            st.metric("Algorithm", "Random Forest" if is_forest else type(model).__name__)
         with col2:
-            st.metric("Trees", model.n_estimators)
+            st.metric("Trees", len(model.estimators_) if is_forest else "—")
         with col3:
-            st.metric("Max Depth", model.max_depth)
+            st.metric("Max Depth", getattr(model, 'max_depth', None) or "—")
+        
+        stats = load_stats().get(BEHAVIOURAL_MODEL)
+        if stats:
+            st.caption(f"Serving version {registered.version}: loaded {stats['loads']}x in this process "
+                       f"({stats['load_seconds'] * 1000:.1f} ms total), {stats['hits']} cache hits")
         
         # Feature importance analysis
         features = ['sensory_sensitivity', 'detail_focus', 'multitasking', 'task_switching',
                    'social_communication', 'social_awareness', 'theory_of_mind', 'special_interests',
                    'facial_recognition', 'social_intentions', 'age', 'gender']
         
-        importance_df = pd.DataFrame({
-            'Feature': features,
-            'Importance': model.feature_importances_
-        }).sort_values('Importance', ascending=True)
+        importances = getattr(model, 'feature_importances_', None)
+        if importances is None and hasattr(model, 'coef_'):
+            # Linear students: coefficient magnitudes (inputs are on comparable 0/1 scales except age)
+            importances = np.abs(model.coef_[0])
         
         st.subheader("🎯 Feature Importance Analysis")
         
-        if PLOTS_AVAILABLE:
-            fig, ax = plt.subplots(figsize=(10, 8))
-            bars = ax.barh(importance_df['Feature'], importance_df['Importance'])
-            ax.set_xlabel('Feature Importance')
-            ax.set_title('Random Forest Feature Importance for Autism Detection')
+        if importances is None:
+            st.info(f"ℹ️ {type(model).__name__} does not expose feature importances.")
+        else:
+            importance_df = pd.DataFrame({
+                'Feature': features,
+                'Importance': importances
+            }).sort_values('Importance', ascending=True)
             
-            # Color bars by importance
-            colors = plt.cm.viridis(importance_df['Importance'] / importance_df['Importance'].max())
-            for bar, color in zip(bars, colors):
-                bar.set_color(color)
+            if PLOTS_AVAILABLE:
+                fig, ax = plt.subplots(figsize=(10, 8))
+                bars = ax.barh(importance_df['Feature'], importance_df['Importance'])
+                ax.set_xlabel('Feature Importance')
+                ax.set_title(f"{'Random Forest' if is_forest else type(model).__name__} "
+                             f"Feature Importance for Autism Detection")
+                
+                # Color bars by importance
+                colors = plt.cm.viridis(importance_df['Importance'] / importance_df['Importance'].max())
+                for bar, color in zip(bars, colors):
+                    bar.set_color(color)
+                
+                st.pyplot(fig)
+            else:
+                st.bar_chart(importance_df.set_index('Feature')['Importance'])
             
-            st.pyplot(fig)
-        else:
-            st.bar_chart(importance_df.set_index('Feature')['Importance'])
-        
-        # Top features
-        st.subheader("🏆 Top Predictive Features")
-        top_features = importance_df.tail(5)
-        
-        for idx, row in top_features.iterrows():
-            st.write(f"**{row['Feature'].replace('_', ' ').title()}**: {row['Importance']:.3f}")
+            # Top features
+            st.subheader("🏆 Top Predictive Features")
+            top_features = importance_df.tail(5)
+            
+            for idx, row in top_features.iterrows():
+                st.write(f"**{row['Feature'].replace('_', ' ').title()}**: {row['Importance']:.3f}")
         
         # Model interpretation
         st.subheader("🧠 Clinical Insights")
@@ -0,0 +1,294 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import joblib
+
+from synthetic_data import FEATURE_NAMES, ML_FEATURE_NAMES
+
+REGISTRY_DIR = "model_registry"
+CURRENT_POINTER = "CURRENT"
+MANIFEST_NAME = "manifest.json"
+
+# Model lines served by the apps. Each replaces one of the old ad-hoc pickle paths.
+AQ10_MODEL = "aq10"                # app.py (was autism_model.pkl)
+SCREENING_MODEL = "screening"      # kids/medical/simple/ui/super_kids apps (was model.pkl)
+BEHAVIOURAL_MODEL = "behavioural"  # ml_autism_app.py (was autism_rf_model.pkl + feature_scaler.pkl)
+
+LEGACY_PATHS = {
+    AQ10_MODEL: ("autism_model.pkl", None),
+    SCREENING_MODEL: ("model.pkl", None),
+    BEHAVIOURAL_MODEL: ("autism_rf_model.pkl", "feature_scaler.pkl"),
+}
+LEGACY_SCHEMAS = {
+    AQ10_MODEL: FEATURE_NAMES,
+    SCREENING_MODEL: FEATURE_NAMES,
+    BEHAVIOURAL_MODEL: ML_FEATURE_NAMES,
+}
+
+# Artifact files copied from a training result; only model.joblib is required
+ARTIFACT_FILES = ("model.joblib", "scaler.joblib", "model.forest", "model.lut.npz")
+
+# (registry_dir, name) -> (CURRENT pointer stamp, RegisteredModel)
+_loaded = {}
+_stats = {}
+_lock = threading.RLock()
+
+
+class RegisteredModel:
+    """A loaded registry version: the estimator plus its manifest"""
+
+    def __init__(self, name, version, path, manifest, model, scaler=None):
+        self.name = name
+        self.version = version
+        self.path = path
+        self.manifest = manifest
+        self.model = model
+        self.scaler = scaler
+
+    @property
+    def feature_names(self):
+        return self.manifest['feature_schema']
+
+    @property
+    def metrics(self):
+        return self.manifest.get('metrics', {})
+
+    def artifact(self, filename):
+        """Path of an optional artifact file, or None if this version lacks it"""
+        path = os.path.join(self.path, filename)
+        return path if os.path.exists(path) else None
+
+
+def model_dir(name, registry_dir=REGISTRY_DIR):
+    return os.path.join(registry_dir, name)
+
+
+def list_versions(name, registry_dir=REGISTRY_DIR):
+    versions_dir = os.path.join(model_dir(name, registry_dir), "versions")
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(v for v in os.listdir(versions_dir) if not v.startswith('.'))
+
+
+def current_version(name, registry_dir=REGISTRY_DIR):
+    """Version id the CURRENT pointer names, or None"""
+    try:
+        with open(os.path.join(model_dir(name, registry_dir), CURRENT_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(name, version, registry_dir=REGISTRY_DIR):
+    path = os.path.join(model_dir(name, registry_dir), "versions", version, MANIFEST_NAME)
+    with open(path) as f:
+        return json.load(f)
+
+
+def publish(result, name, registry_dir=REGISTRY_DIR, use_ensemble=False):
+    """Publish a training.TrainingResult as a new immutable version and make it current.
+
+    Publishing a result whose training key is already current is a no-op.
+    use_ensemble publishes the merged cross-validation fold forest instead.
+    """
+    current = current_version(name, registry_dir)
+    if current is not None:
+        manifest = read_manifest(name, current, registry_dir)
+        if manifest.get('training_key') == result.key and manifest.get('ensemble') == use_ensemble:
+            return current
+    if use_ensemble and result.ensemble is None:
+        raise ValueError("This training result has no fold ensemble (cv_folds=0)")
+
+    files = {}
+    for filename in ARTIFACT_FILES:
+        src = os.path.join(result.artifact_dir, filename)
+        if use_ensemble and filename == "model.joblib":
+            src = result.ensemble_path
+        elif use_ensemble and filename in ("model.forest", "model.lut.npz"):
+            # Compiled forms describe the single forest, not the ensemble
+            continue
+        if os.path.exists(src):
+            files[filename] = src
+
+    return _publish_files(name, files, {
+        'training_key': result.key,
+        'ensemble': use_ensemble,
+        'feature_schema': result.spec['generator']['feature_names'],
+        'metrics': result.metrics,
+        'training_spec': result.spec,
+    }, registry_dir)
+
+
+def publish_estimator(name, model, details, extra_files=None, registry_dir=REGISTRY_DIR):
+    """Publish a fitted estimator that did not come from training.train_model.
+
+    details must carry training_key, feature_schema and metrics like publish() does;
+    extra_files maps artifact names (e.g. model.lut.npz) to files to copy along.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, "model.joblib")
+        joblib.dump(model, model_path)
+        return _publish_files(name, {'model.joblib': model_path, **(extra_files or {})},
+                              {'ensemble': False, **details}, registry_dir)
+
+
+def import_legacy(name, registry_dir=REGISTRY_DIR):
+    """Publish a pre-registry pickle (e.g. model.pkl) as the first version of a model line"""
+    model_path, scaler_path = LEGACY_PATHS[name]
+    if not os.path.exists(model_path):
+        return None
+    files = {'model.joblib': model_path}
+    if scaler_path and os.path.exists(scaler_path):
+        files['scaler.joblib'] = scaler_path
+    return _publish_files(name, files, {
+        'training_key': None,
+        'ensemble': False,
+        'feature_schema': list(LEGACY_SCHEMAS[name]),
+        'metrics': {},
+        'training_spec': {'imported_from': model_path},
+    }, registry_dir)
+
+
+def get_model(name, registry_dir=REGISTRY_DIR):
+    """Current version of a model line, or None if nothing is published.
+
+    One deserialized model is kept per process. Each call only stats the CURRENT
+    pointer; the model is reloaded once when the pointer changes to a new version
+    (published by this or any other process).
+    """
+    key = (registry_dir, name)
+    stamp = _pointer_stamp(name, registry_dir)
+    entry = _loaded.get(key)
+    if entry is not None and stamp is not None and entry[0] == stamp:
+        _record(key, hits=1)
+        return entry[1]
+    with _lock:
+        entry = _loaded.get(key)
+        if entry is not None and stamp is not None and entry[0] == stamp:
+            _record(key, hits=1)
+            return entry[1]
+        version = current_version(name, registry_dir) or import_legacy(name, registry_dir)
+        if version is None:
+            _loaded.pop(key, None)
+            return None
+        stamp = _pointer_stamp(name, registry_dir)
+        if entry is not None and entry[1].version == version:
+            # Pointer rewritten without a version change (e.g. republished): keep the model
+            _loaded[key] = (stamp, entry[1])
+            _record(key, hits=1)
+            return entry[1]
+        start = time.perf_counter()
+        registered = load_version(name, version, registry_dir)
+        _loaded[key] = (stamp, registered)
+        _record(key, loads=1, seconds=time.perf_counter() - start, version=version)
+        return registered
+
+
+def load_stats(registry_dir=REGISTRY_DIR):
+    """Per model line: loads, cache hits, total/last load seconds and the loaded version"""
+    with _lock:
+        return {name: dict(stats) for (directory, name), stats in _stats.items() if directory == registry_dir}
+
+
+def clear_loaded():
+    with _lock:
+        _loaded.clear()
+        _stats.clear()
+
+
+def _pointer_stamp(name, registry_dir):
+    # _set_current always replaces the file, so the inode changes on every publish
+    try:
+        st = os.stat(os.path.join(model_dir(name, registry_dir), CURRENT_POINTER))
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _record(key, hits=0, loads=0, seconds=None, version=None):
+    stats = _stats.setdefault(key, {'loads': 0, 'hits': 0, 'load_seconds': 0.0,
+                                    'last_load_seconds': None, 'version': None})
+    stats['hits'] += hits
+    stats['loads'] += loads
+    if seconds is not None:
+        stats['load_seconds'] += seconds
+        stats['last_load_seconds'] = seconds
+    if version is not None:
+        stats['version'] = version
+
+
+def load_version(name, version, registry_dir=REGISTRY_DIR):
+    """Load a specific registry version (bypasses the per-process cache)"""
+    path = os.path.join(model_dir(name, registry_dir), "versions", version)
+    manifest = read_manifest(name, version, registry_dir)
+    model = joblib.load(os.path.join(path, "model.joblib"))
+    scaler_path = os.path.join(path, "scaler.joblib")
+    scaler = joblib.load(scaler_path) if os.path.exists(scaler_path) else None
+    return RegisteredModel(name, version, path, manifest, model, scaler)
+
+
+def _publish_files(name, files, details, registry_dir):
+    versions_dir = os.path.join(model_dir(name, registry_dir), "versions")
+    os.makedirs(versions_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".publish-", dir=versions_dir)
+    for filename, src in files.items():
+        shutil.copyfile(src, os.path.join(tmp_dir, filename))
+
+    start = time.perf_counter()
+    model = joblib.load(os.path.join(tmp_dir, "model.joblib"))
+    load_seconds = time.perf_counter() - start
+
+    key = details.get('training_key') or "legacy"
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}-{key[:8]}"
+    manifest = {
+        'name': name,
+        'version': version,
+        'created': datetime.now().isoformat(),
+        'n_estimators': len(getattr(model, 'estimators_', [])),
+        'files': {filename: os.path.getsize(os.path.join(tmp_dir, filename)) for filename in files},
+        'size_bytes': sum(os.path.getsize(os.path.join(tmp_dir, filename)) for filename in files),
+        'load_seconds': load_seconds,
+        **details,
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.rename(tmp_dir, os.path.join(versions_dir, version))
+
+    _set_current(name, version, registry_dir)
+    path = os.path.join(versions_dir, version)
+    scaler = joblib.load(os.path.join(path, "scaler.joblib")) if 'scaler.joblib' in files else None
+    with _lock:
+        _loaded[(registry_dir, name)] = (_pointer_stamp(name, registry_dir),
+                                         RegisteredModel(name, version, path, manifest, model, scaler))
+        _record((registry_dir, name), loads=1, seconds=load_seconds, version=version)
+    return version
+
+
+def _set_current(name, version, registry_dir):
+    pointer = os.path.join(model_dir(name, registry_dir), CURRENT_POINTER)
+    # A unique temp file per call: threads of one process may publish concurrently
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{CURRENT_POINTER}-", suffix=".tmp", dir=os.path.dirname(pointer))
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pointer)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+if __name__ == "__main__":
+    for name in (AQ10_MODEL, SCREENING_MODEL, BEHAVIOURAL_MODEL):
+        current = current_version(name)
+        print(f"{name}: current={current or '-'} versions={len(list_versions(name))}")
+        if current:
+            manifest = read_manifest(name, current)
+            print(f"  size={manifest['size_bytes'] / 1024:.0f} KiB load={manifest['load_seconds'] * 1000:.1f} ms "
+                  f"metrics={ {k: v for k, v in manifest['metrics'].items() if isinstance(v, float)} }")
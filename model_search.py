@@ -0,0 +1,153 @@
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import cross_val_score, train_test_split
+
+from synthetic_data import ML_SPEC, generate_cohort
+
+SEARCH_DIR = "search_results"
+LATENCY_REPEATS = 50
+
+
+def grid_configs(n_estimators=(50, 100, 200), max_depth=(5, 10, 20), min_samples_leaf=(1,)):
+    """Every combination of the given RandomForest settings"""
+    return [
+        {'n_estimators': int(n), 'max_depth': None if d is None else int(d), 'min_samples_leaf': int(leaf)}
+        for n, d, leaf in itertools.product(n_estimators, max_depth, min_samples_leaf)
+    ]
+
+
+def random_configs(n_trials, n_estimators=(10, 300), max_depth=(2, 20), min_samples_leaf=(1, 10), seed=42):
+    """Uniformly sampled RandomForest settings from inclusive integer ranges"""
+    rng = np.random.default_rng(seed)
+    configs = []
+    seen = set()
+    # Small spaces may hold fewer distinct configs than requested
+    for _ in range(n_trials * 20):
+        if len(configs) == n_trials:
+            break
+        config = (
+            int(rng.integers(n_estimators[0], n_estimators[1] + 1)),
+            int(rng.integers(max_depth[0], max_depth[1] + 1)),
+            int(rng.integers(min_samples_leaf[0], min_samples_leaf[1] + 1)),
+        )
+        if config not in seen:
+            seen.add(config)
+            configs.append({'n_estimators': config[0], 'max_depth': config[1], 'min_samples_leaf': config[2]})
+    return configs
+
+
+def run_trial(config, cohort_spec=ML_SPEC, n_samples=1000, test_size=0.2, seed=42, cv_folds=5):
+    """Fit and score one configuration; runs inside a worker process"""
+    X, y = generate_cohort(cohort_spec, n_samples, seed=seed)
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=seed, stratify=y
+    )
+    model = RandomForestClassifier(random_state=seed, class_weight='balanced', n_jobs=1, **config)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    batch_seconds = time.perf_counter() - start
+
+    row = X_test[:1]
+    timings = []
+    for _ in range(LATENCY_REPEATS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    cv_scores = cross_val_score(
+        RandomForestClassifier(random_state=seed, class_weight='balanced', n_jobs=1, **config),
+        X_train, y_train, cv=cv_folds
+    ) if cv_folds else np.array([np.nan])
+
+    return {
+        'config': config,
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'cv_mean': float(cv_scores.mean()),
+        'cv_std': float(cv_scores.std()),
+        'fit_seconds': fit_seconds,
+        'predict_ms': float(np.median(timings) * 1000),
+        'batch_predict_ms': batch_seconds * 1000,
+        'model_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        'n_nodes': int(sum(tree.tree_.node_count for tree in model.estimators_)),
+    }
+
+
+def run_search(configs, cohort_spec=ML_SPEC, n_samples=1000, test_size=0.2, seed=42,
+               cv_folds=5, max_workers=None):
+    """Run trials across a process pool, yielding each result as soon as it finishes"""
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(configs))) as pool:
+        futures = [
+            pool.submit(run_trial, config, cohort_spec, n_samples, test_size, seed, cv_folds)
+            for config in configs
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def pareto_front(trials, cost_keys=('predict_ms', 'model_bytes')):
+    """Trials not dominated on higher accuracy and lower cost, cheapest first"""
+    front = []
+    for trial in trials:
+        dominated = False
+        for other in trials:
+            if other is trial:
+                continue
+            no_worse = other['accuracy'] >= trial['accuracy'] and all(
+                other[key] <= trial[key] for key in cost_keys)
+            better = other['accuracy'] > trial['accuracy'] or any(
+                other[key] < trial[key] for key in cost_keys)
+            if no_worse and better:
+                dominated = True
+                break
+        if not dominated:
+            front.append(trial)
+    return sorted(front, key=lambda trial: tuple(trial[key] for key in cost_keys))
+
+
+def cheapest_meeting(trials, accuracy_floor, cost_key='predict_ms'):
+    """Lowest-cost trial whose accuracy reaches the floor, or None"""
+    eligible = [trial for trial in trials if trial['accuracy'] >= accuracy_floor]
+    return min(eligible, key=lambda trial: trial[cost_key]) if eligible else None
+
+
+def save_search(trials, search_spec, out_dir=SEARCH_DIR):
+    """Persist all trials and their Pareto front; returns the written path"""
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"search_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    payload = {
+        'search': search_spec,
+        'trials': trials,
+        'pareto_front': pareto_front(trials),
+    }
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    latest = os.path.join(out_dir, "pareto_front.json")
+    with open(latest + ".tmp", 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(latest + ".tmp", latest)
+    return path
+
+
+if __name__ == "__main__":
+    configs = grid_configs()
+    print(f"Running {len(configs)} trials...")
+    results = []
+    for trial in run_search(configs):
+        results.append(trial)
+        print(f"{trial['config']}: acc={trial['accuracy']:.3f} cv={trial['cv_mean']:.3f} "
+              f"fit={trial['fit_seconds']:.2f}s predict={trial['predict_ms']:.2f}ms")
+    print(f"Saved to {save_search(results, {'mode': 'grid', 'n_trials': len(configs)})}")
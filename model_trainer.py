@@ -1,63 +1,22 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 import joblib
+from shards import ShardedDataset
+from synthetic_data import AQ10_SPEC, FEATURE_NAMES, cohort_dataframe
+from training import cross_validate_folds, merge_forests
 
 class AutismModelTrainer:
     def __init__(self):
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.feature_names = [f'Q{i+1}' for i in range(10)] + ['Age', 'Gender']
+        self.feature_names = list(FEATURE_NAMES)
+        self.fold_estimators = []
     
-    def generate_synthetic_data(self, n_samples=1000):
+    def generate_synthetic_data(self, n_samples=1000, seed=42, spec=AQ10_SPEC):
         """Generate synthetic autism screening data"""
-        np.random.seed(42)
-        data = []
-        labels = []
-        
-        for i in range(n_samples):
-            has_autism = np.random.choice([0, 1], p=[0.7, 0.3])
-            
-            if has_autism:
-                # Autism-like response patterns
-                features = [
-                    np.random.choice([0, 1], p=[0.3, 0.7]),  # Notice sounds
-                    np.random.choice([0, 1], p=[0.7, 0.3]),  # Whole picture focus
-                    np.random.choice([0, 1], p=[0.7, 0.3]),  # Multitasking difficulty
-                    np.random.choice([0, 1], p=[0.7, 0.3]),  # Task switching
-                    np.random.choice([0, 1], p=[0.8, 0.2]),  # Reading between lines
-                    np.random.choice([0, 1], p=[0.8, 0.2]),  # Detecting boredom
-                    np.random.choice([0, 1], p=[0.2, 0.8]),  # Character intentions
-                    np.random.choice([0, 1], p=[0.2, 0.8]),  # Collecting information
-                    np.random.choice([0, 1], p=[0.8, 0.2]),  # Reading faces
-                    np.random.choice([0, 1], p=[0.2, 0.8]),  # People's intentions
-                    np.random.randint(3, 60),               # Age
-                    np.random.choice([0, 1])                # Gender
-                ]
-            else:
-                # Neurotypical response patterns
-                features = [
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.randint(3, 60),
-                    np.random.choice([0, 1])
-                ]
-            
-            data.append(features)
-            labels.append(has_autism)
-        
-        df = pd.DataFrame(data, columns=self.feature_names)
-        df['Label'] = labels
-        return df
+        return cohort_dataframe(spec, n_samples, seed=seed)
     
     def train_model(self, df):
         """Train the autism detection model"""
@@ -76,21 +35,36 @@ class AutismModelTrainer:
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         
-        # Cross-validation
-        cv_scores = cross_val_score(self.model, X, y, cv=5)
+        # Cross-validation (folds fit in parallel; fold models are kept for export)
+        folds = cross_validate_folds(self.model, X, y, cv=5)
+        cv_scores = folds['scores']
+        self.fold_estimators = folds['estimators']
         
         print(f"Test Accuracy: {accuracy:.3f}")
         print(f"CV Accuracy: {cv_scores.mean():.3f} (+/- {cv_scores.std() * 2:.3f})")
+        print("Fold fit times: " + ", ".join(f"{t:.2f}s" for t in folds['fit_seconds']))
         print("\nClassification Report:")
         print(classification_report(y_test, y_pred))
         
         return accuracy, cv_scores
     
+    def train_model_from_shards(self, path, max_rows=200_000, seed=42):
+        """Train on a uniform subsample of a sharded dataset (see shards.py)"""
+        dataset = ShardedDataset(path)
+        return self.train_model(dataset.sample_dataframe(max_rows, seed=seed))
+    
     def save_model(self, filename="autism_model.pkl"):
         """Save the trained model"""
         joblib.dump(self.model, filename)
         print(f"Model saved as {filename}")
     
+    def save_fold_ensemble(self, filename="autism_fold_ensemble.pkl"):
+        """Save the cross-validation fold models merged into one forest"""
+        if not self.fold_estimators:
+            raise ValueError("Train the model before exporting the fold ensemble")
+        joblib.dump(merge_forests(self.fold_estimators), filename)
+        print(f"Fold ensemble saved as {filename}")
+    
     def get_feature_importance(self):
         """Get feature importance from the trained model"""
         importance_df = pd.DataFrame({
@@ -0,0 +1,150 @@
+import bisect
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+# Page spans include Streamlit rendering (and the kids page's progress animation)
+PAGE_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SPANS = ('model_resolution', 'feature_encoding', 'inference', 'rendering')
+QUANTILES = (0.5, 0.95, 0.99)
+# Set to a path to have each process keep a text metrics file up to date
+METRICS_FILE_ENV = "PAGE_METRICS_FILE"
+METRICS_WRITE_INTERVAL = 5.0
+
+
+class Histogram:
+    """Cumulative-bucket histogram (upper bounds are inclusive; the last bucket is +Inf)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (inf past the last bucket)"""
+        if not self.count:
+            return 0.0
+        i = bisect.bisect_left(np.cumsum(self.counts).tolist(), q * self.count)
+        return float(self.buckets[i]) if i < len(self.buckets) else float('inf')
+
+    def snapshot(self):
+        cumulative = np.cumsum(self.counts).tolist()
+        return {
+            'buckets': {str(bound): n for bound, n in zip(self.buckets + ('+Inf',), cumulative)},
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+        }
+
+
+_histograms = {}
+_lock = threading.Lock()
+_last_write = [0.0]
+
+
+class PageTimer:
+    """Times one prediction on a page as consecutive spans.
+
+    Each lap(span) charges the time since the previous lap (or since the timer
+    was created) to that span; finish() records every span plus the total into
+    the per-(page, model version) histograms.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.spans = {}
+        self.started = self._mark = time.perf_counter()
+
+    def lap(self, span):
+        now = time.perf_counter()
+        self.spans[span] = self.spans.get(span, 0.0) + (now - self._mark) * 1000
+        self._mark = now
+
+    def finish(self, model_version):
+        total = (time.perf_counter() - self.started) * 1000
+        version = str(model_version)
+        with _lock:
+            for span, ms in list(self.spans.items()) + [('total', total)]:
+                key = (self.page, version, span)
+                if key not in _histograms:
+                    _histograms[key] = Histogram(PAGE_BUCKETS_MS)
+                _histograms[key].observe(ms)
+        path = os.environ.get(METRICS_FILE_ENV)
+        if path and time.monotonic() - _last_write[0] >= METRICS_WRITE_INTERVAL:
+            _last_write[0] = time.monotonic()
+            write_metrics(path)
+        return total
+
+
+def page_stats():
+    """{(page, model version, span): histogram snapshot with estimated quantiles}"""
+    with _lock:
+        stats = {}
+        for key, histogram in _histograms.items():
+            stats[key] = histogram.snapshot()
+            stats[key]['quantiles'] = {str(q): histogram.quantile(q) for q in QUANTILES}
+        return stats
+
+
+def render_text():
+    """Page latency histograms in the Prometheus text exposition format"""
+    lines = [
+        "# HELP screening_page_latency_ms Time spent per span of a page's prediction path",
+        "# TYPE screening_page_latency_ms histogram",
+    ]
+    quantile_lines = [
+        "# HELP screening_page_latency_quantile_ms Bucket-bound latency quantile estimates",
+        "# TYPE screening_page_latency_quantile_ms gauge",
+    ]
+    for (page, version, span), stats in sorted(page_stats().items()):
+        labels = f'page="{page}",model_version="{version}",span="{span}"'
+        for bound, n in stats['buckets'].items():
+            lines.append(f'screening_page_latency_ms_bucket{{{labels},le="{bound}"}} {n}')
+        lines.append(f'screening_page_latency_ms_sum{{{labels}}} {stats["sum"]:.6f}')
+        lines.append(f'screening_page_latency_ms_count{{{labels}}} {stats["count"]}')
+        for q, value in stats['quantiles'].items():
+            quantile_lines.append(f'screening_page_latency_quantile_ms{{{labels},quantile="{q}"}} {value}')
+    return "\n".join(lines + quantile_lines) + "\n"
+
+
+def write_metrics(path):
+    """Atomically replace path with the current text metrics"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(render_text())
+    os.replace(tmp_path, path)
+    return path
+
+
+def clear():
+    with _lock:
+        _histograms.clear()
+
+
+if __name__ == "__main__":
+    # Usage: python page_metrics.py [rows] -- time the in-process scoring spans for each page's model line
+    from model_registry import AQ10_MODEL, SCREENING_MODEL
+    from scoring_service import screen
+    from synthetic_data import AQ10_SPEC, generate_cohort
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    X, _ = generate_cohort(AQ10_SPEC, n_rows, seed=3)
+    for page, name in (('app', AQ10_MODEL), ('medical_app', SCREENING_MODEL), ('super_kids_app', SCREENING_MODEL)):
+        for row in X:
+            timer = PageTimer(page)
+            data = [int(v) for v in row]
+            timer.lap('feature_encoding')
+            result = screen(name, data, timer)
+            if result is not None:
+                timer.finish(result.model_version)
+    print(render_text(), end='')
@@ -0,0 +1,264 @@
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from compiled_forest import CompiledForest
+from lookup_engine import ANSWER_WEIGHTS, MAX_TABLE_ERROR, N_QUESTIONS, LookupEngine
+from model_registry import REGISTRY_DIR, get_model
+
+DEFAULT_THRESHOLD = 0.5
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_CACHE_SIZE = 4096
+ENGINES = ('auto', 'lookup', 'compiled', 'model')
+
+
+class ScreeningResult(namedtuple('ScreeningResult', 'label probabilities model_version latency_ms')):
+    """One screening: the label, (P(neurotypical), P(autism)), the model version and scoring time"""
+    __slots__ = ()
+
+    @property
+    def probability(self):
+        """P(autism)"""
+        return self.probabilities[1]
+
+    @property
+    def confidence(self):
+        return max(self.probabilities)
+
+
+class ScreeningBatch(namedtuple('ScreeningBatch', 'labels probabilities model_version latency_ms')):
+    """Screenings for many rows: read-only label and (n, 2) probability arrays"""
+    __slots__ = ()
+
+    @property
+    def n_rows(self):
+        return len(self.labels)
+
+    def result(self, i):
+        return ScreeningResult(self.labels[i].item(), tuple(self.probabilities[i].tolist()),
+                               self.model_version, self.latency_ms / max(self.n_rows, 1))
+
+
+def pack_features(row):
+    """Pack a Q1..Q10, Age, Gender row into one int (answers bits 0-9, gender bit 10, age above).
+
+    Returns None for rows that are not binary answers with a finite integer age and 0/1 gender.
+    """
+    if len(row) != N_QUESTIONS + 2:
+        return None
+    answers = row[:N_QUESTIONS]
+    age, gender = row[N_QUESTIONS], row[N_QUESTIONS + 1]
+    if gender not in (0, 1) or not math.isfinite(age) or age != int(age) or age < 0:
+        return None
+    if not ((answers == 0) | (answers == 1)).all():
+        return None
+    return int(answers @ ANSWER_WEIGHTS) | int(gender) << N_QUESTIONS | int(age) << (N_QUESTIONS + 1)
+
+
+class PredictionCache:
+    """Bounded LRU of ScreeningResults keyed by (model version, packed features).
+
+    Entries from an older model version are dropped as soon as a newer version
+    is seen, so a publish never serves stale predictions.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, version, packed):
+        with self._lock:
+            if version != self.version:
+                self._invalidate(version)
+            result = self.entries.get((version, packed))
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end((version, packed))
+            self.hits += 1
+            return result
+
+    def put(self, version, packed, result):
+        with self._lock:
+            if version != self.version:
+                self._invalidate(version)
+            self.entries[(version, packed)] = result
+            self.entries.move_to_end((version, packed))
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def _invalidate(self, version):
+        if self.version is not None:
+            self.invalidations += 1
+        self.entries.clear()
+        self.version = version
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'version': self.version,
+        }
+
+
+class ScreeningPredictor:
+    """Scores questionnaire rows with one probability pass and labels them by threshold.
+
+    A row is labelled positive when P(autism) > threshold, which matches the forest's
+    own predict() at the default 0.5. The scorer is anything with predict_proba and
+    classes_: the lookup table, a compiled forest or the estimator itself. A scaler,
+    when the model line has one, is applied first.
+    """
+
+    def __init__(self, scorer, threshold=DEFAULT_THRESHOLD, model_version=None, scaler=None,
+                 n_features=None, cache=None):
+        if not 0 <= threshold <= 1:
+            raise ValueError("threshold must be between 0 and 1")
+        self.scorer = scorer
+        self.threshold = threshold
+        self.model_version = model_version
+        self.scaler = scaler
+        self.n_features = n_features
+        self.cache = cache
+        self.classes_ = np.asarray(scorer.classes_)
+
+    @classmethod
+    def from_registered(cls, registered, threshold=DEFAULT_THRESHOLD, engine='auto', cache=None):
+        """Predictor over a registry version, preferring its precomputed lookup table"""
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}")
+        lookup_path = registered.artifact("model.lut.npz")
+        forest_path = registered.artifact("model.forest")
+        scorer = registered.model
+        # The table is indexed by raw answers, so it only serves unscaled model lines
+        if engine in ('auto', 'lookup') and lookup_path and registered.scaler is None:
+            scorer = LookupEngine.load(lookup_path, fallback=registered.model)
+        elif engine == 'compiled' and forest_path:
+            scorer = CompiledForest.load(forest_path)
+        elif engine not in ('auto', 'model'):
+            raise ValueError(f"{registered.name} version {registered.version} has no {engine} artifact")
+        return cls(scorer, threshold, registered.version, registered.scaler,
+                   n_features=len(registered.feature_names), cache=cache)
+
+    def _encode(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.n_features is not None and X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+
+    def _score(self, X):
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        proba = self.scorer.predict_proba(X)
+        # Table entries are within MAX_TABLE_ERROR of the forest and agree at 0.5 by
+        # construction; rows that close to any other threshold are rescored exactly
+        if isinstance(self.scorer, LookupEngine) and self.threshold != 0.5 and self.scorer.fallback is not None:
+            near = np.abs(proba[:, 1] - self.threshold) <= MAX_TABLE_ERROR
+            if near.any():
+                proba[near] = self.scorer.fallback.predict_proba(X[near])
+        return proba
+
+    def _label(self, proba):
+        return self.classes_[(proba[:, 1] > self.threshold).astype(np.intp)]
+
+    def predict(self, row):
+        """Screen one respondent (Q1..Q10, Age, Gender as a list or 1-D array)"""
+        start = time.perf_counter()
+        X = self._encode(row)
+        if len(X) != 1:
+            raise ValueError("predict() takes one row; use predict_batch() for several")
+        packed = pack_features(X[0]) if self.cache is not None else None
+        if packed is not None:
+            cached = self.cache.get(self.model_version, packed)
+            if cached is not None:
+                return cached._replace(latency_ms=(time.perf_counter() - start) * 1000)
+        proba = self._score(X)
+        label = self._label(proba)[0].item()
+        result = ScreeningResult(label, tuple(proba[0].tolist()), self.model_version,
+                                 (time.perf_counter() - start) * 1000)
+        if packed is not None:
+            self.cache.put(self.model_version, packed, result)
+        return result
+
+    def predict_batch(self, X, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Screen a 2-D array of rows, scoring chunk_rows at a time to bound peak memory"""
+        start = time.perf_counter()
+        X = self._encode(X)
+        proba = np.empty((len(X), len(self.classes_)))
+        for begin in range(0, len(X), chunk_rows):
+            proba[begin:begin + chunk_rows] = self._score(X[begin:begin + chunk_rows])
+        labels = self._label(proba)
+        labels.setflags(write=False)
+        proba.setflags(write=False)
+        return ScreeningBatch(labels, proba, self.model_version, (time.perf_counter() - start) * 1000)
+
+
+_predictors = {}
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_predictor(name, threshold=DEFAULT_THRESHOLD, engine='auto', registry_dir=REGISTRY_DIR):
+    """Predictor for the current version of a model line, rebuilt only when the version changes.
+
+    Single-row predictions go through a per-line PredictionCache that survives the
+    rebuild but discards entries from the previous version.
+    """
+    registered = get_model(name, registry_dir)
+    if registered is None:
+        return None
+    key = (registry_dir, name, threshold, engine)
+    predictor = _predictors.get(key)
+    if predictor is None or predictor.model_version != registered.version:
+        with _lock:
+            predictor = _predictors.get(key)
+            if predictor is None or predictor.model_version != registered.version:
+                cache = _caches.setdefault(key, PredictionCache())
+                predictor = ScreeningPredictor.from_registered(registered, threshold, engine, cache)
+                _predictors[key] = predictor
+    return predictor
+
+
+def cache_stats(registry_dir=REGISTRY_DIR):
+    """PredictionCache counters per (model line, threshold, engine)"""
+    return {key[1:]: cache.stats() for key, cache in _caches.items() if key[0] == registry_dir}
+
+
+if __name__ == "__main__":
+    from model_registry import AQ10_MODEL
+    from synthetic_data import AQ10_SPEC, generate_cohort
+
+    name = sys.argv[1] if len(sys.argv) > 1 else AQ10_MODEL
+    registered = get_model(name)
+    if registered is None:
+        print(f"No published version of {name}")
+        raise SystemExit(1)
+    X, _ = generate_cohort(AQ10_SPEC, 100_000, seed=7)
+    reference = registered.model.predict_proba(registered.scaler.transform(X) if registered.scaler else X)
+    for engine in ENGINES:
+        try:
+            predictor = ScreeningPredictor.from_registered(registered, engine=engine)
+        except ValueError as error:
+            print(f"{engine:>8}: {error}")
+            continue
+        single = [predictor.predict(X[i]).latency_ms for i in range(200)]
+        batch = predictor.predict_batch(X)
+        diff = float(np.abs(batch.probabilities - reference).max())
+        print(f"{engine:>8}: single row {np.median(single):.3f} ms, {batch.n_rows:,} rows in "
+              f"{batch.latency_ms:.0f} ms, max proba diff {diff:.2g}")
@@ -8,6 +8,8 @@ import json
 import os
 import base64
 from io import BytesIO
+from session_journal import SECTIONS, get_journal, get_view
+from session_shards import get_shard_index
 try:
     import plotly.express as px
     import plotly.graph_objects as go
@@ -190,36 +192,83 @@ page = st.sidebar.selectbox(
     ]
 )
 
+# Each family's data lives in its own shard; pick the one this session works on
+families = get_shard_index().users()
+family_options = [None] + list(families)
+if st.session_state.get('current_user') not in family_options:
+    st.session_state.current_user = None
+st.session_state.current_user = st.sidebar.selectbox(
+    "👪 Active Family",
+    family_options,
+    index=family_options.index(st.session_state.current_user),
+    format_func=lambda user_id: "Select a family..." if user_id is None else
+        f"{families[user_id].get('child_name') or user_id} ({families[user_id].get('parent_name') or user_id})"
+)
+
 # Data management functions
-def save_session_data():
-    session_data = {
-        'user_profile': st.session_state.user_profile,
-        'child_data': st.session_state.child_data,
-        'ai_results': st.session_state.ai_results,
-        'game_scores': st.session_state.game_scores,
-        'prevention_progress': st.session_state.prevention_progress,
-        'assessment_history': st.session_state.assessment_history,
-        'last_updated': str(datetime.now())
-    }
-    
-    with open('professional_session_data.json', 'w') as f:
-        json.dump(session_data, f, indent=2)
+def session_shard():
+    """Shard file of the active family, or None before one is chosen"""
+    user_id = st.session_state.get('current_user')
+    return get_shard_index().shard(user_id) if user_id else None
+
+def save_session_data(*changes):
+    """Journal the changed (section, key) entries; with no arguments, every section this session loaded.
 
-def load_session_data():
+    Returns False (the changes stay in this session only) when no family is active,
+    e.g. for a therapist who has not picked one yet.
+    """
+    shard = session_shard()
+    if shard is None:
+        st.warning("⚠️ Select an active family in the sidebar to save these results")
+        return False
+    journal = get_journal(shard)
+    if not changes:
+        for section in st.session_state.get('loaded_sections', SECTIONS):
+            journal.replace(section, getattr(st.session_state, section))
+    for section, key in changes:
+        journal.set(section, key, getattr(st.session_state, section)[key])
+    return True
+
+def append_history(entry):
+    """Journal one assessment_history entry for the active family; False if none is active"""
+    shard = session_shard()
+    if shard is None:
+        st.warning("⚠️ Select an active family in the sidebar to save these results")
+        return False
+    st.session_state.assessment_history.append(entry)
+    get_journal(shard).append('assessment_history', entry)
+    return True
+
+def load_session_data(sections=tuple(SECTIONS)):
+    """Point this session at the saved sections; files are re-read only when they change"""
     try:
-        with open('professional_session_data.json', 'r') as f:
-            data = json.load(f)
-            st.session_state.user_profile = data.get('user_profile', {})
-            st.session_state.child_data = data.get('child_data', {})
-            st.session_state.ai_results = data.get('ai_results', {})
-            st.session_state.game_scores = data.get('game_scores', {})
-            st.session_state.prevention_progress = data.get('prevention_progress', {})
-            st.session_state.assessment_history = data.get('assessment_history', [])
+        shard = session_shard()
+        loaded = st.session_state.setdefault('loaded_sections', {})
+        if shard is None:
+            for section in sections:
+                if loaded.get(section) is not None:
+                    setattr(st.session_state, section, SECTIONS[section]())
+                    loaded[section] = None
+            return None
+        view = get_view(shard)
+        for section in sections:
+            # Keep this session's objects (and anything unsaved in them) until the data changes
+            if loaded.get(section) != (shard, view.stamp):
+                setattr(st.session_state, section, view.section(section))
+                loaded[section] = (shard, view.stamp)
+        return view
     except:
-        pass
+        return None
+
+def section_size(section):
+    """Entries in a saved section, counted without decoding it where possible"""
+    if session_view is None:
+        return len(getattr(st.session_state, section))
+    return session_view.size(section)
 
-# Load existing data
-load_session_data()
+# Load existing data; the dashboard only counts the heavy sections
+PAGE_SECTIONS = {"🏠 Dashboard Home": ('user_profile',)}
+session_view = load_session_data(PAGE_SECTIONS.get(page, tuple(SECTIONS)))
 
 if page == "🏠 Dashboard Home":
     st.markdown("### 🌸 Professional Dashboard Overview")
@@ -228,22 +277,22 @@ if page == "🏠 Dashboard Home":
     
     with col1:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("👤 Registered Users", len(st.session_state.user_profile))
+        st.metric("👤 Registered Users", len(families))
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("🎮 Games Completed", len(st.session_state.game_scores))
+        st.metric("🎮 Games Completed", section_size('game_scores'))
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col3:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("🤖 AI Assessments", len(st.session_state.ai_results))
+        st.metric("🤖 AI Assessments", section_size('ai_results'))
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col4:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("📊 Total Sessions", len(st.session_state.assessment_history))
+        st.metric("📊 Total Sessions", section_size('assessment_history'))
         st.markdown('</div>', unsafe_allow_html=True)
     
     # System architecture overview
@@ -329,7 +378,15 @@ elif page == "👤 User Authentication":
             
             if submitted:
                 if password == confirm_password and camera_consent and data_consent and privacy_consent:
-                    user_id = f"user_{len(st.session_state.user_profile) + 1}"
+                    user_id, _ = get_shard_index().register({
+                        'parent_name': parent_name,
+                        'email': email,
+                        'child_name': child_name,
+                        'registration_date': str(datetime.now())
+                    })
+                    # Switch this session to the new family's (empty) shard
+                    st.session_state.current_user = user_id
+                    load_session_data()
                     
                     st.session_state.user_profile[user_id] = {
                         'parent_name': parent_name,
@@ -350,7 +407,7 @@ elif page == "👤 User Authentication":
                         'last_session': None
                     }
                     
-                    save_session_data()
+                    save_session_data(('user_profile', user_id), ('child_data', user_id))
                     st.success("✅ Professional account created successfully!")
                     st.balloons()
                 else:
@@ -385,6 +442,9 @@ elif page == "👤 User Authentication":
                         'access_granted': str(datetime.now()),
                         'account_type': 'therapist'
                     }
+                    save_session_data(('user_profile', 'therapist_mode'))
+                    # Clinician-only tools check this session flag, not the saved profile
+                    st.session_state.therapist_access = therapist_id or True
                     st.success("✅ Therapist access granted!")
                     st.info("🔓 Professional dashboard unlocked")
                 else:
@@ -467,7 +527,7 @@ elif page == "🤖 AI Image Detection":
                     'timestamp': str(datetime.now())
                 }
                 
-                save_session_data()
+                save_session_data(('ai_results', ai_result_id))
                 
                 # Display results
                 st.success("✅ AI Gaze Analysis Complete!")
@@ -546,7 +606,7 @@ elif page == "🤖 AI Image Detection":
                     'timestamp': str(datetime.now())
                 }
                 
-                save_session_data()
+                save_session_data(('ai_results', ai_result_id))
                 
                 # Summary metrics
                 accuracy = sum(r['detected'] for r in expression_results) / len(expression_results)
@@ -654,7 +714,7 @@ elif page == "🎮 Cognitive Games":
                         'timestamp': str(datetime.now())
                     }
                     
-                    save_session_data()
+                    save_session_data(('game_scores', game_id))
                     
                     # Display comprehensive results
                     st.markdown("### 🏆 Game Results")
@@ -752,7 +812,7 @@ elif page == "🌱 Prevention Module":
                     'timestamp': str(datetime.now())
                 }
                 
-                save_session_data()
+                save_session_data(('prevention_progress', training_id))
                 
                 # Display training results
                 st.markdown("### 🏆 Training Session Complete!")
@@ -965,6 +1025,36 @@ elif page == "📋 Professional Reports":
             with col3:
                 if st.button("🔗 Share with Therapist"):
                     st.info("🔗 Secure sharing link would be generated for healthcare professionals")
+        
+        # Diagnoses confirmed by a clinician are the labels incremental.py learns from
+        if st.session_state.get('therapist_access'):
+            st.markdown("#### 🩺 Record Confirmed Diagnosis")
+            with st.form("confirmed_diagnosis"):
+                st.markdown("AQ-10 answers from the child's screening and the diagnosis you confirmed")
+                answer_cols = st.columns(5)
+                answers = [answer_cols[i % 5].selectbox(f"Q{i + 1}", [0, 1], key=f"confirm_q{i + 1}",
+                                                        format_func=lambda x: "Yes" if x else "No")
+                           for i in range(10)]
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    confirm_age = st.number_input("Age", min_value=1, max_value=100, value=5)
+                with col2:
+                    confirm_gender = st.selectbox("Gender", ["Female", "Male"])
+                with col3:
+                    outcome = st.selectbox("Confirmed Outcome", [1, 0],
+                                           format_func=lambda x: "Autism confirmed" if x else "Autism ruled out")
+                
+                if st.form_submit_button("🩺 Save Diagnosis"):
+                    saved = append_history({
+                        'id': f"diagnosis_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}",
+                        'test_type': 'confirmed_diagnosis',
+                        'model_features': answers + [int(confirm_age), 1 if confirm_gender == "Male" else 0],
+                        'confirmed_outcome': outcome,
+                        'confirmed_by': st.session_state.therapist_access,
+                        'timestamp': str(datetime.now())
+                    })
+                    if saved:
+                        st.success("✅ Confirmed diagnosis saved for the next model update")
 
 # Professional footer
 st.markdown("---")
@@ -0,0 +1,379 @@
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from lookup_engine import DEFAULT_AGE_RANGE
+from model_registry import AQ10_MODEL
+from page_metrics import LATENCY_BUCKETS_MS, Histogram
+from predictor import ScreeningResult, get_predictor
+from synthetic_data import FEATURE_NAMES
+from warmup import readiness, warm_up
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_MAX_BATCH = 256
+# Set to e.g. http://127.0.0.1:8765 to make the apps score through the service
+SERVICE_URL_ENV = "SCORING_SERVICE_URL"
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ServiceError(Exception):
+    """The scoring service was unreachable or failed the request (not the caller's input)"""
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row requests into one predict_batch call per model line.
+
+    The first queued row opens a batch; rows arriving within max_wait_ms join it,
+    up to max_batch rows. Scoring runs on a worker thread so the event loop keeps
+    accepting requests meanwhile.
+    """
+
+    def __init__(self, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+
+    async def submit(self, name, row):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((name, row, future, time.perf_counter()))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            if self.max_wait:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            by_model = {}
+            for item in batch:
+                by_model.setdefault(item[0], []).append(item)
+            for name, items in by_model.items():
+                rows = [item[1] for item in items]
+                try:
+                    results = await loop.run_in_executor(self.executor, self._score, name, rows)
+                except Exception as error:
+                    # Rescore row by row so one bad row only fails its own request
+                    results = ([error] if len(rows) == 1 else
+                               await loop.run_in_executor(self.executor, self._score_each, name, rows))
+                self.batch_size.observe(len(items))
+                done = time.perf_counter()
+                for (_, _, future, queued), result in zip(items, results):
+                    self.latency_ms.observe((done - queued) * 1000)
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        # Report what the caller waited for: queueing plus scoring
+                        future.set_result(result._replace(latency_ms=(done - queued) * 1000))
+
+    @staticmethod
+    def _score(name, rows):
+        predictor = get_predictor(name)
+        if predictor is None:
+            return [LookupError(f"No published version of {name}")] * len(rows)
+        batch = predictor.predict_batch(np.array(rows, dtype=np.float64))
+        return [batch.result(i) for i in range(batch.n_rows)]
+
+    @classmethod
+    def _score_each(cls, name, rows):
+        results = []
+        for row in rows:
+            try:
+                results.extend(cls._score(name, [row]))
+            except Exception as error:
+                results.append(error)
+        return results
+
+
+def row_error(row):
+    """Why a Q1..Q10, Age, Gender row cannot be scored, or None if it is valid"""
+    if len(row) != len(FEATURE_NAMES):
+        return f"Each row needs {len(FEATURE_NAMES)} features: {', '.join(FEATURE_NAMES)}"
+    if not all(np.isfinite(row)):
+        return "Features must be finite numbers"
+    if any(value not in (0, 1) for value in row[:10]):
+        return "Answers Q1..Q10 must be 0 or 1"
+    if not DEFAULT_AGE_RANGE[0] <= row[10] <= DEFAULT_AGE_RANGE[1]:
+        return f"Age must be {DEFAULT_AGE_RANGE[0]}-{DEFAULT_AGE_RANGE[1]}"
+    if row[11] not in (0, 1):
+        return "Gender must be 0 or 1"
+    return None
+
+
+class ScoringService:
+    """Minimal HTTP/1.1 JSON server in front of a MicroBatcher.
+
+    POST /predict  {"model": "aq10", "features": [Q1..Q10, Age, Gender]}
+                   or {"model": ..., "rows": [[...], ...]}
+    GET  /metrics  request latency and batch size histograms
+    GET  /health   liveness
+    GET  /ready    warm-up report; 503 until the models are loaded and exercised
+    """
+
+    def __init__(self, max_wait_ms=DEFAULT_MAX_WAIT_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.max_wait_ms = max_wait_ms
+        self.max_batch = max_batch
+        self.batcher = None
+        self.requests = 0
+        self.started = time.time()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.batcher = MicroBatcher(self.max_wait_ms, self.max_batch)
+        # Warm up on the scoring thread so the first batch does not pay for loading
+        asyncio.get_running_loop().run_in_executor(self.batcher.executor, warm_up)
+        batch_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"Scoring service on http://{host}:{port} (max wait {self.max_wait_ms} ms, "
+              f"max batch {self.max_batch})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batch_task.cancel()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self._route(method, path, body)
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok'}
+        if path == '/ready':
+            ready, report = readiness()
+            return (200 if ready else 503), report
+        if path == '/metrics':
+            return 200, self.metrics()
+        if path != '/predict':
+            return 404, {'error': f"Unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}
+
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                return 400, {'error': "Request body must be a JSON object"}
+            name = request.get('model', AQ10_MODEL)
+            rows = request['rows'] if 'rows' in request else [request['features']]
+            rows = [[float(value) for value in row] for row in rows]
+        except (ValueError, KeyError, TypeError) as error:
+            return 400, {'error': f"Malformed request: {error}"}
+        for i, row in enumerate(rows):
+            error = row_error(row)
+            if error:
+                return 400, {'error': f"Row {i}: {error}" if len(rows) > 1 else error}
+
+        self.requests += 1
+        try:
+            results = await asyncio.gather(*(self.batcher.submit(name, row) for row in rows))
+        except KeyError:
+            return 404, {'error': f"Unknown model {name!r}"}
+        except LookupError as error:
+            return 404, {'error': str(error)}
+        except Exception as error:
+            return 500, {'error': str(error)}
+        return 200, {'results': [result._asdict() for result in results]}
+
+    def metrics(self):
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'requests': self.requests,
+            'request_latency_ms': self.batcher.latency_ms.snapshot(),
+            'batch_size': self.batcher.batch_size.snapshot(),
+        }
+
+
+class ServiceClient:
+    """Blocking client for the scoring service; one keep-alive connection per thread"""
+
+    def __init__(self, url, timeout=5.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _request(self, method, path, payload=None):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        body = json.dumps(payload) if payload is not None else None
+        try:
+            connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        except (OSError, http.client.HTTPException, ValueError) as error:
+            connection.close()
+            self._local.connection = None
+            raise ServiceError(f"Scoring service request failed: {error}") from error
+
+    def predict(self, name, row):
+        """ScreeningResult for one row, or None if the model line has no published version.
+
+        Raises ValueError when the service rejects the row and ServiceError for
+        any other failure.
+        """
+        status, payload = self._request('POST', '/predict', {'model': name, 'features': [float(v) for v in row]})
+        if status == 404:
+            return None
+        if status == 400:
+            raise ValueError(payload.get('error', "Invalid input row"))
+        if status != 200:
+            raise ServiceError(payload.get('error', f"Scoring service returned {status}"))
+        result = payload['results'][0]
+        return ScreeningResult(result['label'], tuple(result['probabilities']),
+                               result['model_version'], result['latency_ms'])
+
+    def metrics(self):
+        return self._request('GET', '/metrics')[1]
+
+
+_clients = {}
+
+
+def screen(name, row, timer=None):
+    """Score one row through the service when SCORING_SERVICE_URL is set, else in-process.
+
+    Returns a ScreeningResult, or None when the model line has nothing published.
+    If the service cannot be reached, fails the request or rejects the row, the
+    row is scored in-process instead (which raises ValueError if it cannot be). A page_metrics.PageTimer, if given, gets model_resolution
+    and inference laps.
+    """
+    url = os.environ.get(SERVICE_URL_ENV)
+    if url:
+        client = _clients.get(url)
+        if client is None:
+            client = _clients[url] = ServiceClient(url)
+        if timer is not None:
+            timer.lap('model_resolution')
+        try:
+            result = client.predict(name, row)
+            if timer is not None:
+                timer.lap('inference')
+            return result
+        except (ServiceError, ValueError):
+            pass
+    predictor = get_predictor(name)
+    if timer is not None:
+        timer.lap('model_resolution')
+    if predictor is None:
+        return None
+    result = predictor.predict(row)
+    if timer is not None:
+        timer.lap('inference')
+    return result
+
+
+def run_load(url, name, n_requests, concurrency, seed=7):
+    """Fire n_requests single-row predictions from concurrency threads; returns latencies in ms"""
+    from synthetic_data import AQ10_SPEC, generate_cohort
+
+    X, _ = generate_cohort(AQ10_SPEC, n_requests, seed=seed)
+    client = ServiceClient(url)
+
+    def one(i):
+        start = time.perf_counter()
+        client.predict(name, X[i])
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(one, range(n_requests)))
+    return np.array(latencies), client.metrics()
+
+
+def _wait_until_up(url, timeout=30):
+    client = ServiceClient(url, timeout=1)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            client._request('GET', '/health')
+            return
+        except ServiceError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Scoring service at {url} did not come up")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching prediction service")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve', help="Run the service")
+    serve.add_argument('--host', default=DEFAULT_HOST)
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    serve.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH)
+    load = sub.add_parser('load', help="Stub client: send concurrent requests and print histograms")
+    load.add_argument('--url', help="Running service (default: start one locally for the test)")
+    load.add_argument('--model', default=AQ10_MODEL)
+    load.add_argument('--requests', type=int, default=2000)
+    load.add_argument('--concurrency', type=int, default=32)
+    load.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        service = ScoringService(args.max_wait_ms, args.max_batch)
+        try:
+            asyncio.run(service.serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        url, server = args.url, None
+        if url is None:
+            url = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}"
+            server = subprocess.Popen([sys.executable, __file__, 'serve', '--max-wait-ms', str(args.max_wait_ms)])
+        try:
+            _wait_until_up(url)
+            latencies, metrics = run_load(url, args.model, args.requests, args.concurrency)
+        finally:
+            if server is not None:
+                server.terminate()
+        print(f"{args.requests} requests x {args.concurrency} threads: p50 {np.percentile(latencies, 50):.2f} ms, "
+              f"p99 {np.percentile(latencies, 99):.2f} ms, mean batch "
+              f"{metrics['batch_size']['mean']:.1f} rows, server latency mean "
+              f"{metrics['request_latency_ms']['mean']:.2f} ms")
+        print(json.dumps({'batch_size': metrics['batch_size']['buckets'],
+                          'request_latency_ms': metrics['request_latency_ms']['buckets']}, indent=2))
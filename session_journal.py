@@ -0,0 +1,499 @@
+import atexit
+import copy
+import glob
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_PATH = "professional_session_data.json"
+# Section name -> empty value, in the order the app has always written them
+SECTIONS = OrderedDict([
+    ('user_profile', dict),
+    ('child_data', dict),
+    ('ai_results', dict),
+    ('game_scores', dict),
+    ('prevention_progress', dict),
+    ('assessment_history', list),
+])
+# Saves within this window share one write and fsync
+FLUSH_INTERVAL = 0.25
+# Journal size that triggers a background compaction into the snapshot
+COMPACT_BYTES = 4 * 2**20
+# Last line of a compacted snapshot: byte spans, keys and sizes of each section
+INDEX_PREFIX = b'"section_index": '
+# Journal lines start with op, section and (for keyed ops) key, so they can be
+# bucketed and counted without decoding their values
+EVENT_PREFIX = re.compile(rb'\{"op": "(\w+)", "section": "(\w+)"(?:, "key": ("(?:[^"\\]|\\.)*"))?')
+
+
+def empty_state():
+    state = {name: kind() for name, kind in SECTIONS.items()}
+    state['last_updated'] = None
+    return state
+
+
+def apply_event(state, event):
+    """Apply one journal event: set/delete a keyed entry, append to a list, or replace a section"""
+    op, section = event['op'], event['section']
+    if op == 'set':
+        state[section][event['key']] = event['value']
+    elif op == 'delete':
+        state[section].pop(event['key'], None)
+    elif op == 'append':
+        state[section].append(event['value'])
+    elif op == 'replace':
+        state[section] = event['value']
+    else:
+        raise ValueError(f"Unknown journal op {op!r}")
+    state['last_updated'] = event.get('time', state['last_updated'])
+
+
+def replay(path, state):
+    """Apply every complete event in a journal file; a torn final line from a crash is ignored"""
+    if not os.path.exists(path):
+        return state
+    with open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            if i >= len(lines) - 2:
+                break
+            raise
+        apply_event(state, event)
+    return state
+
+
+class FileLock:
+    """Exclusive lock across threads (re-entrant) and processes (an advisory lock on path)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._file = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+def _file_id(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (path, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def _parse_event(line):
+    """(op, section, key) of a journal line, reading only its prefix where possible"""
+    match = EVENT_PREFIX.match(line)
+    if match is None:
+        event = json.loads(line)
+        return event['op'], event['section'], event.get('key')
+    op, section, key = match.groups()
+    return op.decode(), section.decode(), json.loads(key) if key else None
+
+
+def write_snapshot(path, state, generation):
+    """Write state as JSON with one section per line and a trailing section index.
+
+    The file is still a plain JSON object, but its last line records each
+    section's byte span, keys and size, so SessionView can decode one section
+    (or just count entries) without parsing the rest.
+    """
+    head = json.dumps({'journal_generation': generation, 'last_updated': state['last_updated']})[:-1].encode()
+    parts, index, offset = [head], {}, len(head)
+    for name in SECTIONS:
+        prefix = f",\n{json.dumps(name)}: ".encode()
+        body = json.dumps(state[name]).encode()
+        start = offset + len(prefix)
+        index[name] = {'span': [start, start + len(body)], 'size': len(state[name]),
+                       'keys': list(state[name]) if isinstance(state[name], dict) else None}
+        parts += [prefix, body]
+        offset = start + len(body)
+    parts.append(b",\n" + INDEX_PREFIX + json.dumps(index).encode() + b"}")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(b"".join(parts))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_index(path):
+    """The section index of a compacted snapshot, or None for files written any other way"""
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        tail = b""
+        while end > 0 and b"\n" not in tail:
+            step = min(65536, end)
+            end -= step
+            f.seek(end)
+            tail = f.read(step) + tail
+    line = tail.rsplit(b"\n", 1)[-1]
+    if not line.startswith(INDEX_PREFIX) or not line.endswith(b"}"):
+        return None
+    return json.loads(line[len(INDEX_PREFIX):-1])
+
+
+class SessionJournal:
+    """Append-only change journal in front of the professional app's JSON snapshot.
+
+    Saves queue small events (one entry per change) instead of rewriting the whole
+    state. Events queued within flush_interval are coalesced, later writes to the
+    same entry replacing earlier ones, and written with a single fsync. Once the
+    journal passes compact_bytes it is rotated to a numbered generation and folded
+    into the snapshot on a background thread. The snapshot records the last
+    generation it absorbed, so replay after a crash mid-compaction never applies
+    an event twice. Loading replays snapshot, absorbed-pending generations, then
+    the live journal. Appends, rotation and compaction all hold file_lock, so
+    several app processes can share one journal safely.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=FLUSH_INTERVAL, compact_bytes=COMPACT_BYTES):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.pending = OrderedDict()
+        self.writes = self.events = self.compactions = 0
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        # Held (by any thread or process) while the journal, generations or snapshot change
+        self.file_lock = FileLock(f"{path}.lock")
+        self._timer = None
+        self._compactor = None
+
+    def set(self, section, key, value):
+        self._queue(('set', section, key), {'op': 'set', 'section': section, 'key': key, 'value': value})
+
+    def delete(self, section, key):
+        self._queue(('set', section, key), {'op': 'delete', 'section': section, 'key': key})
+
+    def append(self, section, value):
+        self._queue(('append', next(self._sequence)), {'op': 'append', 'section': section, 'value': value})
+
+    def replace(self, section, value):
+        self._queue(('replace', section), {'op': 'replace', 'section': section, 'value': value})
+
+    def _queue(self, slot, event):
+        if event['section'] not in SECTIONS:
+            raise KeyError(f"Unknown section {event['section']!r}")
+        event['time'] = str(datetime.now())
+        # Serialise now: the caller keeps mutating its dicts while the flush thread writes
+        line = json.dumps(event)
+        with self._lock:
+            self.pending.pop(slot, None)
+            self.pending[slot] = line
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write queued events with one append and fsync; returns the number written"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            lines, self.pending = list(self.pending.values()), OrderedDict()
+            size = 0
+            if lines:
+                with self.file_lock, open(self.journal_path, 'a') as f:
+                    f.write('\n'.join(lines) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                    # Measured under the lock: another process may rotate the journal once it is released
+                    size = f.tell()
+                self.writes += 1
+                self.events += len(lines)
+        if size >= self.compact_bytes:
+            self.compact(wait=False)
+        return len(lines)
+
+    def _generations(self):
+        prefix = f"{self.journal_path}."
+        return sorted(int(name[len(prefix):]) for name in glob.glob(glob.escape(prefix) + '*')
+                      if name[len(prefix):].isdigit())
+
+    def _read_snapshot(self):
+        state = empty_state()
+        generation = 0
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return state, generation
+        for name, kind in SECTIONS.items():
+            state[name] = data.get(name, kind())
+        state['last_updated'] = data.get('last_updated')
+        return state, data.get('journal_generation', 0)
+
+    def _absorbed(self):
+        """Last generation folded into the snapshot, read from its first line when compacted"""
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.readline()
+        except FileNotFoundError:
+            return 0
+        if head.startswith(b'{"journal_generation": ') and head.endswith(b",\n"):
+            return json.loads(head[:-2] + b"}")['journal_generation']
+        return self._read_snapshot()[1]
+
+    def _replay_generations(self, state, absorbed):
+        generations = [g for g in self._generations() if g > absorbed]
+        for generation in generations:
+            replay(f"{self.journal_path}.{generation}", state)
+        return generations
+
+    def stamp(self):
+        """Identity (inode, size, mtime) of the snapshot, every generation and the live journal"""
+        paths = [self.path] + [f"{self.journal_path}.{g}" for g in self._generations()] + [self.journal_path]
+        return tuple(_file_id(path) for path in paths)
+
+    def load(self):
+        """Current state: snapshot, then unabsorbed generations, then the live journal"""
+        self.flush()
+        with self.file_lock:
+            state, absorbed = self._read_snapshot()
+            self._replay_generations(state, absorbed)
+            return replay(self.journal_path, state)
+
+    def compact(self, wait=True):
+        """Rotate the live journal and fold every pending generation into the snapshot"""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                compactor = self._compactor
+            else:
+                with self.file_lock:
+                    if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path):
+                        generation = max(self._generations() + [self._absorbed()]) + 1
+                        os.replace(self.journal_path, f"{self.journal_path}.{generation}")
+                compactor = self._compactor = threading.Thread(target=self._compact, name="journal-compactor",
+                                                               daemon=True)
+                compactor.start()
+        if wait:
+            compactor.join()
+
+    def _compact(self):
+        # Another process may be compacting the same files; the lock serialises them
+        with self.file_lock:
+            state, absorbed = self._read_snapshot()
+            generations = self._replay_generations(state, absorbed)
+            if not generations:
+                return
+            write_snapshot(self.path, state, generations[-1])
+            for generation in generations:
+                os.remove(f"{self.journal_path}.{generation}")
+        self.compactions += 1
+
+    def close(self):
+        self.flush()
+        if self._compactor is not None:
+            self._compactor.join()
+
+
+class SessionView:
+    """The saved session data as of one stamp, decoding each section only when asked.
+
+    refresh() is a stat() of the snapshot and journal files when nothing changed.
+    When only the live journal grew, just the new lines are read; otherwise the
+    view is rebuilt from the snapshot's section index. Sections are decoded on
+    first use (the snapshot span, then that section's journal events), and
+    size() counts entries from the index and event prefixes without decoding
+    values at all. section() hands each caller its own shallow copy, since the
+    decoded section is shared by the process and later events are applied to it
+    in place; changes to the copy are persisted only through the journal.
+    """
+
+    def __init__(self, journal):
+        self.journal = journal
+        self.stamp = None
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        if getattr(self, '_snapshot', None) is not None:
+            self._snapshot.close()
+        self._snapshot = None
+        self._index = None
+        self._legacy = None
+        self._sections = {}
+        self._events = {name: [] for name in SECTIONS}
+        self._tail = (None, 0)
+
+    def refresh(self):
+        """Bring the view up to date with the files; returns True if anything changed"""
+        journal = self.journal
+        journal.flush()
+        with self._lock, journal.file_lock:
+            stamp = journal.stamp()
+            if stamp == self.stamp:
+                return False
+            live = stamp[-1]
+            tail_id, tail_offset = self._tail
+            if self.stamp is None or stamp[:-1] != self.stamp[:-1] or live is None or live[2] < tail_offset \
+                    or (tail_offset and live[1] != tail_id):
+                self._rebuild(stamp)
+            elif live[2] > tail_offset:
+                self._read_journal(journal.journal_path, tail_offset, live[2])
+            self.stamp = stamp
+            return True
+
+    def _rebuild(self, stamp):
+        self._reset()
+        self.rebuilds += 1
+        journal = self.journal
+        absorbed = 0
+        if stamp[0] is not None:
+            self._index = read_index(journal.path)
+            if self._index is None:
+                # Written before compaction kept an index: decode it whole, once
+                self._legacy, absorbed = journal._read_snapshot()
+            else:
+                # Keep the file open so a compaction replacing it cannot move the spans
+                self._snapshot = open(journal.path, 'rb')
+                absorbed = json.loads(self._snapshot.readline()[:-2] + b"}").get('journal_generation', 0)
+        for generation in journal._generations():
+            if generation > absorbed:
+                path = f"{journal.journal_path}.{generation}"
+                self._read_journal(path, 0, os.path.getsize(path), live=False)
+        if stamp[-1] is not None:
+            self._read_journal(journal.journal_path, 0, stamp[-1][2])
+
+    def _read_journal(self, path, start, end, live=True):
+        with open(path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        # Only whole lines count; a torn final line is ignored, as in replay()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].split(b"\n"):
+            if not line.strip():
+                continue
+            op, section, key = _parse_event(line)
+            if section in self._sections:
+                self._apply(section, [line])
+            else:
+                self._events[section].append((op, key, line))
+        if live:
+            self._tail = (os.stat(path).st_ino, start + complete)
+
+    def _apply(self, name, lines):
+        state = {name: self._sections[name], 'last_updated': None}
+        for line in lines:
+            apply_event(state, json.loads(line))
+        self._sections[name] = state[name]
+
+    def section(self, name):
+        """A copy of one decoded section as of the current stamp"""
+        with self._lock:
+            return copy.copy(self._decoded(name))
+
+    def _decoded(self, name):
+        # Called with self._lock held
+        if name not in self._sections:
+            if self._legacy is not None:
+                self._sections[name] = self._legacy[name]
+            elif self._index is not None:
+                start, end = self._index[name]['span']
+                self._snapshot.seek(start)
+                self._sections[name] = json.loads(self._snapshot.read(end - start))
+            else:
+                self._sections[name] = SECTIONS[name]()
+            self._apply(name, [line for _, _, line in self._events[name]])
+            self._events[name] = []
+        return self._sections[name]
+
+    def size(self, name):
+        """Number of entries in a section, without decoding its values where possible"""
+        with self._lock:
+            events = list(self._events[name])
+            if name in self._sections or self._legacy is not None or any(op == 'replace' for op, _, _ in events):
+                return len(self._decoded(name))
+        entry = self._index[name] if self._index is not None else {'size': 0, 'keys': []}
+        if SECTIONS[name] is list:
+            return entry['size'] + sum(op == 'append' for op, _, _ in events)
+        keys = set(entry['keys'])
+        for op, key, _ in events:
+            if op == 'set':
+                keys.add(key)
+            elif op == 'delete':
+                keys.discard(key)
+        return len(keys)
+
+
+_journals = {}
+_views = {}
+
+
+def get_journal(path=DEFAULT_PATH):
+    """The process-wide journal for path; pending events are flushed at interpreter exit"""
+    if path is None:
+        raise ValueError("get_journal needs a journal path")
+    journal = _journals.get(path)
+    if journal is None:
+        journal = _journals.setdefault(path, SessionJournal(path))
+    return journal
+
+
+def get_view(path=DEFAULT_PATH):
+    """The process-wide SessionView for path, refreshed against the files on disk"""
+    view = _views.get(path)
+    if view is None:
+        view = _views.setdefault(path, SessionView(get_journal(path)))
+    view.refresh()
+    return view
+
+
+@atexit.register
+def _close_all():
+    for journal in list(_journals.values()):
+        journal.close()
+
+
+if __name__ == "__main__":
+    # Usage: python session_journal.py [path] -- fold the journal into the snapshot now
+    journal = SessionJournal(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH)
+    start = time.perf_counter()
+    journal.compact()
+    state = journal.load()
+    print(f"Compacted {journal.path} in {(time.perf_counter() - start) * 1000:.1f} ms: " + ", ".join(
+        f"{name} {len(state[name])}" for name in SECTIONS))
@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from session_journal import DEFAULT_PATH, FileLock, _file_id, get_view
+
+SHARD_DIR = "professional_sessions"
+INDEX_NAME = "index.json"
+INDEX_FORMAT_VERSION = 1
+# Profile fields copied into the index so picking a family never opens its shard
+SUMMARY_FIELDS = ('parent_name', 'email', 'child_name', 'registration_date')
+
+
+class ShardIndex:
+    """Directory of per-family session shards: user id -> shard file and a short summary.
+
+    Each registered family gets its own SessionJournal snapshot/journal pair under
+    shard_dir, so opening a session reads only that family's data and concurrent
+    sessions of different families never write the same file. The index itself is
+    small, cached by file identity, and rewritten (under a file lock, via an atomic
+    rename) only when a family registers. Families from the old shared
+    professional_session_data.json are indexed against that file on first use.
+    """
+
+    def __init__(self, shard_dir=SHARD_DIR, legacy_path=DEFAULT_PATH):
+        self.shard_dir = shard_dir
+        self.legacy_path = legacy_path
+        self.path = os.path.join(shard_dir, INDEX_NAME)
+        os.makedirs(shard_dir, exist_ok=True)
+        self.lock = FileLock(f"{self.path}.lock")
+        self._cache = (None, None)
+        self._thread_lock = threading.Lock()
+        if not os.path.exists(self.path):
+            with self.lock:
+                if not os.path.exists(self.path):
+                    self._write(self._legacy_index())
+
+    def _legacy_index(self):
+        index = {'format': INDEX_FORMAT_VERSION, 'next_id': 1, 'users': {}}
+        if not any(os.path.exists(path) for path in (self.legacy_path, f"{self.legacy_path}.journal")):
+            return index
+        for user_id, profile in get_view(self.legacy_path).section('user_profile').items():
+            if 'email' not in profile:
+                continue
+            index['users'][user_id] = dict(_summary(profile), shard=self.legacy_path)
+            if user_id.startswith('user_') and user_id[5:].isdigit():
+                index['next_id'] = max(index['next_id'], int(user_id[5:]) + 1)
+        return index
+
+    def _write(self, index):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def read(self):
+        """The index, re-read only when the file's identity changes"""
+        stamp = _file_id(self.path)
+        with self._thread_lock:
+            if stamp != self._cache[0]:
+                with open(self.path) as f:
+                    self._cache = (stamp, json.load(f))
+            return self._cache[1]
+
+    def users(self):
+        """{user id: summary with its shard path}"""
+        return self.read()['users']
+
+    def shard(self, user_id):
+        entry = self.users().get(user_id)
+        return entry['shard'] if entry else None
+
+    def register(self, profile):
+        """Allocate a user id and shard for a new family; returns (user id, shard path)"""
+        with self.lock:
+            with open(self.path) as f:
+                index = json.load(f)
+            user_id = f"user_{index['next_id']}"
+            index['next_id'] += 1
+            # One directory per family keeps the journal's generation scan to that family's files
+            shard = os.path.join(self.shard_dir, user_id, "session.json")
+            os.makedirs(os.path.dirname(shard), exist_ok=True)
+            index['users'][user_id] = dict(_summary(profile), shard=shard)
+            self._write(index)
+        return user_id, shard
+
+
+def _summary(profile):
+    return {field: profile.get(field) for field in SUMMARY_FIELDS}
+
+
+_indexes = {}
+
+
+def get_shard_index(shard_dir=SHARD_DIR):
+    index = _indexes.get(shard_dir)
+    if index is None:
+        index = _indexes.setdefault(shard_dir, ShardIndex(shard_dir))
+    return index
+
+
+if __name__ == "__main__":
+    # Usage: python session_shards.py [families] -- time opening one family's session as the clinic grows
+    import tempfile
+
+    from session_journal import get_journal
+
+    n_families = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ShardIndex(os.path.join(tmp_dir, SHARD_DIR), os.path.join(tmp_dir, DEFAULT_PATH))
+        raw_data = [{'x': i, 'y': i, 'eye_contact': i % 2 == 0} for i in range(100)]
+        for i in range(n_families):
+            user_id, shard = index.register({'parent_name': f"Parent {i}", 'email': f"parent{i}@example.com"})
+            journal = get_journal(shard)
+            journal.set('user_profile', user_id, {'parent_name': f"Parent {i}", 'email': f"parent{i}@example.com"})
+            for run in range(5):
+                journal.set('ai_results', f"gaze_{run}", {'test_type': 'gaze_tracking', 'raw_data': raw_data})
+            journal.flush()
+        timings = []
+        for user_id in list(index.users())[::max(1, n_families // 50)]:
+            start = time.perf_counter()
+            view = get_view(index.shard(user_id))
+            view.section('user_profile')
+            view.size('ai_results')
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{n_families:,} families: opening one session takes {sorted(timings)[len(timings) // 2]:.2f} ms (median)")
@@ -0,0 +1,250 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import AQ10_SPEC, KIDS_SPEC, ML_SPEC, CohortSpec, generate_cohort
+
+MANIFEST_NAME = "manifest.json"
+SHARD_FORMAT_VERSION = 1
+DEFAULT_SHARD_SIZE = 1_000_000
+
+# Column files written for every shard: name -> (dtype, trailing shape)
+SHARD_COLUMNS = {
+    'answers': (np.int8, (10,)),
+    'age': (np.uint8, ()),
+    'gender': (np.uint8, ()),
+    'label': (np.uint8, ()),
+}
+
+SPECS = {spec.name: spec for spec in (AQ10_SPEC, KIDS_SPEC, ML_SPEC)}
+
+
+class ShardWriter:
+    """Buffer (X, y) batches and flush them as fixed-size .npy shards plus a manifest"""
+
+    def __init__(self, out_dir, shard_size=DEFAULT_SHARD_SIZE, spec=None, seed=None):
+        os.makedirs(out_dir, exist_ok=True)
+        if os.path.exists(os.path.join(out_dir, MANIFEST_NAME)):
+            raise FileExistsError(f"{out_dir} already contains a sharded dataset")
+        self.out_dir = out_dir
+        self.shard_size = int(shard_size)
+        self.spec = spec
+        self.seed = seed
+        self.shards = []
+        self._pending_X = []
+        self._pending_y = []
+        self._pending_rows = 0
+
+    def append(self, X, y):
+        """Queue a batch of encoded rows (Q1..Q10, Age, Gender) with labels"""
+        X = np.asarray(X)
+        y = np.asarray(y)
+        if X.ndim != 2 or X.shape[1] != 12 or len(X) != len(y):
+            raise ValueError("expected X of shape (n, 12) and y of shape (n,)")
+        self._pending_X.append(X)
+        self._pending_y.append(y)
+        self._pending_rows += len(X)
+        while self._pending_rows >= self.shard_size:
+            self._flush(self.shard_size)
+
+    def close(self):
+        """Flush the last partial shard and write the manifest"""
+        if self._pending_rows:
+            self._flush(self._pending_rows)
+        manifest = {
+            'format_version': SHARD_FORMAT_VERSION,
+            'n_samples': sum(shard['rows'] for shard in self.shards),
+            'shard_size': self.shard_size,
+            'seed': self.seed,
+            'spec': self.spec.to_dict() if self.spec is not None else None,
+            'columns': {name: np.dtype(dtype).name for name, (dtype, _) in SHARD_COLUMNS.items()},
+            'shards': self.shards,
+        }
+        tmp_path = os.path.join(self.out_dir, MANIFEST_NAME + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.out_dir, MANIFEST_NAME))
+        return manifest
+
+    def _flush(self, rows):
+        X = np.concatenate(self._pending_X) if len(self._pending_X) > 1 else self._pending_X[0]
+        y = np.concatenate(self._pending_y) if len(self._pending_y) > 1 else self._pending_y[0]
+        X_out, X_rest = X[:rows], X[rows:]
+        y_out, y_rest = y[:rows], y[rows:]
+
+        name = f"shard_{len(self.shards):05d}"
+        columns = {
+            'answers': X_out[:, :10],
+            'age': X_out[:, 10],
+            'gender': X_out[:, 11],
+            'label': y_out,
+        }
+        for column, values in columns.items():
+            dtype = SHARD_COLUMNS[column][0]
+            np.save(os.path.join(self.out_dir, f"{name}_{column}.npy"),
+                    np.ascontiguousarray(values, dtype=dtype))
+        self.shards.append({'name': name, 'rows': int(rows), 'positives': int(y_out.sum())})
+
+        self._pending_X = [X_rest] if len(X_rest) else []
+        self._pending_y = [y_rest] if len(y_rest) else []
+        self._pending_rows = len(X_rest)
+
+
+def write_synthetic_shards(spec, n_samples, out_dir, shard_size=DEFAULT_SHARD_SIZE, seed=42):
+    """Stream a synthetic cohort to disk one shard at a time.
+
+    Every shard draws from its own child of SeedSequence(seed), so the dataset is
+    reproducible and never needs more than one shard in memory.
+    """
+    writer = ShardWriter(out_dir, shard_size, spec=spec, seed=seed)
+    n_shards = -(-n_samples // shard_size)
+    buffer = np.empty((min(shard_size, n_samples), 12), dtype=np.int8)
+    for i, child in enumerate(np.random.SeedSequence(seed).spawn(n_shards)):
+        rows = min(shard_size, n_samples - i * shard_size)
+        # Full shards are flushed inside append, so the buffer can be reused next round
+        X, y = generate_cohort(spec, rows, seed=child, out=buffer[:rows])
+        writer.append(X, y)
+    return writer.close()
+
+
+def write_dataframe_shards(df, out_dir, shard_size=DEFAULT_SHARD_SIZE, label_column='Label',
+                           chunk_size=100_000):
+    """Ingest an in-memory DataFrame (as returned by generate_synthetic_data) into shards"""
+    writer = ShardWriter(out_dir, shard_size)
+    features = df.drop(columns=[label_column])
+    for start in range(0, len(df), chunk_size):
+        stop = start + chunk_size
+        writer.append(features.iloc[start:stop].to_numpy(), df[label_column].iloc[start:stop].to_numpy())
+    return writer.close()
+
+
+class ShardedDataset:
+    """Read-only view over a shard directory backed by memory-mapped arrays"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format_version') != SHARD_FORMAT_VERSION:
+            raise ValueError(f"Unsupported shard format in {path}")
+        self.shards = self.manifest['shards']
+        self.offsets = np.cumsum([0] + [shard['rows'] for shard in self.shards])
+        spec = self.manifest.get('spec')
+        self.spec = CohortSpec.from_dict(spec) if spec else None
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def feature_names(self):
+        return self.spec.feature_names if self.spec is not None else AQ10_SPEC.feature_names
+
+    def open_shard(self, index):
+        """Memory-map one shard's column files; nothing is read until sliced"""
+        name = self.shards[index]['name']
+        return {
+            column: np.load(os.path.join(self.path, f"{name}_{column}.npy"), mmap_mode='r')
+            for column in SHARD_COLUMNS
+        }
+
+    def validate(self):
+        """Check every shard against the manifest; returns a list of problems (empty if valid)"""
+        problems = []
+        for i, shard in enumerate(self.shards):
+            try:
+                arrays = self.open_shard(i)
+            except (OSError, ValueError) as e:
+                problems.append(f"{shard['name']}: {e}")
+                continue
+            layout_ok = True
+            for column, (dtype, shape) in SHARD_COLUMNS.items():
+                array = arrays[column]
+                if array.dtype != dtype or array.shape != (shard['rows'],) + shape:
+                    problems.append(f"{shard['name']}_{column}: unexpected dtype/shape "
+                                    f"{array.dtype}{array.shape}")
+                    layout_ok = False
+            if not layout_ok:
+                continue
+            if int(arrays['answers'].max(initial=0)) > 1 or int(arrays['answers'].min(initial=0)) < 0:
+                problems.append(f"{shard['name']}: answers outside 0/1")
+            if int(arrays['gender'].max(initial=0)) > 1:
+                problems.append(f"{shard['name']}: gender outside 0/1")
+            positives = int(np.count_nonzero(arrays['label']))
+            if positives != shard['positives']:
+                problems.append(f"{shard['name']}: {positives} positives, manifest says {shard['positives']}")
+        return problems
+
+    def iter_batches(self, batch_size=DEFAULT_SHARD_SIZE):
+        """Yield (X, y) int8/uint8 batches in storage order"""
+        for i in range(len(self.shards)):
+            arrays = self.open_shard(i)
+            for start in range(0, self.shards[i]['rows'], batch_size):
+                stop = start + batch_size
+                yield self._gather(arrays, slice(start, stop)), np.array(arrays['label'][start:stop])
+
+    def sample(self, n_rows, seed=42):
+        """Draw a uniform subsample without replacement, touching only the selected rows"""
+        n_rows = min(int(n_rows), len(self))
+        rng = np.random.default_rng(seed)
+        indices = np.sort(rng.choice(len(self), size=n_rows, replace=False))
+        X = np.empty((n_rows, 12), dtype=np.int8)
+        y = np.empty(n_rows, dtype=np.uint8)
+        bounds = np.searchsorted(indices, self.offsets)
+        for i in range(len(self.shards)):
+            lo, hi = bounds[i], bounds[i + 1]
+            if lo == hi:
+                continue
+            arrays = self.open_shard(i)
+            local = indices[lo:hi] - self.offsets[i]
+            X[lo:hi] = self._gather(arrays, local)
+            y[lo:hi] = arrays['label'][local]
+        return X, y
+
+    def sample_dataframe(self, n_rows, seed=42, label_column='Label'):
+        X, y = self.sample(n_rows, seed)
+        df = pd.DataFrame(X, columns=self.feature_names, copy=False)
+        df[label_column] = y
+        return df
+
+    @staticmethod
+    def _gather(arrays, rows):
+        answers = arrays['answers'][rows]
+        X = np.empty((len(answers), 12), dtype=np.int8)
+        X[:, :10] = answers
+        X[:, 10] = arrays['age'][rows]
+        X[:, 11] = arrays['gender'][rows]
+        return X
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or validate sharded screening datasets")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help="Stream a synthetic cohort to a shard directory")
+    gen.add_argument('out_dir')
+    gen.add_argument('--rows', type=int, default=1_000_000)
+    gen.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE)
+    gen.add_argument('--spec', choices=sorted(SPECS), default=AQ10_SPEC.name)
+    gen.add_argument('--seed', type=int, default=42)
+
+    val = sub.add_parser('validate', help="Check shards against their manifest")
+    val.add_argument('path')
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        manifest = write_synthetic_shards(SPECS[args.spec], args.rows, args.out_dir,
+                                          args.shard_size, args.seed)
+        print(f"Wrote {manifest['n_samples']} rows in {len(manifest['shards'])} shards to {args.out_dir}")
+    else:
+        problems = ShardedDataset(args.path).validate()
+        for problem in problems:
+            print(problem)
+        print("Dataset OK" if not problems else f"{len(problems)} problem(s) found")
+        raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import joblib
-import os
+from synthetic_data import AQ10_SPEC
+from training import train_model
+from model_registry import SCREENING_MODEL, publish
+from predictor import get_predictor
 
 st.set_page_config(page_title="Autism Detection", page_icon="🧠")
 
@@ -36,13 +37,14 @@ if page == "Screening":
         submit = st.form_submit_button("Get Prediction")
         
         if submit:
-            if os.path.exists("model.pkl"):
-                model = joblib.load("model.pkl")
+            predictor = get_predictor(SCREENING_MODEL)
+            if predictor is not None:
                 gender_code = 1 if gender == "Male" else 0
-                data = [[q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, age, gender_code]]
+                data = [q1, q2, q3, q4, q5, q6, q7, q8, q9, q10, age, gender_code]
                 
-                pred = model.predict(data)[0]
-                prob = model.predict_proba(data)[0]
+                result = predictor.predict(data)
+                pred = result.label
+                prob = result.probabilities
                 
                 if pred == 1:
                     st.error(f"⚠️ High autism likelihood ({prob[1]:.1%} confidence)")
@@ -59,52 +61,11 @@ elif page == "Train Model":
     if st.button("Generate Data & Train"):
         with st.spinner("Training..."):
             # Generate synthetic data
-            np.random.seed(42)
-            data, labels = [], []
-            
-            for _ in range(1000):
-                autism = np.random.choice([0, 1], p=[0.7, 0.3])
-                
-                if autism:
-                    features = [
-                        np.random.choice([0, 1], p=[0.3, 0.7]),  # sounds
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # details
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # multitask
-                        np.random.choice([0, 1], p=[0.7, 0.3]),  # switching
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # reading lines
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # boredom
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # intentions
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # collecting
-                        np.random.choice([0, 1], p=[0.8, 0.2]),  # faces
-                        np.random.choice([0, 1], p=[0.2, 0.8]),  # people
-                        np.random.randint(3, 60),  # age
-                        np.random.choice([0, 1])   # gender
-                    ]
-                else:
-                    features = [
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.randint(3, 60),
-                        np.random.choice([0, 1])
-                    ]
-                
-                data.append(features)
-                labels.append(autism)
-            
             # Train model
-            model = RandomForestClassifier(n_estimators=50, random_state=42)
-            model.fit(data, labels)
+            result = train_model(AQ10_SPEC, n_samples=1000, test_size=0, n_estimators=50, seed=42)
             
             # Save model
-            joblib.dump(model, "model.pkl")
+            publish(result, SCREENING_MODEL)
             
             st.success("✅ Model trained successfully!")
             st.info("📊 Ready for predictions")
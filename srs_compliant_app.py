@@ -4,6 +4,7 @@ import json
 import hashlib
 from datetime import datetime
 import re
+from assessment_store import get_store
 
 # SRS-Compliant Page Configuration
 st.set_page_config(
@@ -83,8 +84,6 @@ st.markdown("""
 
 # Initialize Session State (Data Storage - Section 3.2)
 def init_session_state():
-    if 'users' not in st.session_state:
-        st.session_state.users = {}
     if 'current_user' not in st.session_state:
         st.session_state.current_user = None
     if 'user_data' not in st.session_state:
@@ -123,6 +122,35 @@ def log_action(action, user_email=None):
     }
     st.session_state.system_logs.append(log_entry)
 
+# User store (Data Storage - Section 3.2): users and assessments persist in the
+# assessment database, looked up through its email and per-child indexes
+USER_PREFIX = "srs_user:"
+ASSESSMENT_TYPE = 'srs_assessment'
+
+def find_user(email):
+    """Stored user with its profile fields, or None"""
+    user = get_store().get_user(email)
+    if user is None:
+        return None
+    return dict(user['data'], id=user['id'], email=user['email'], full_name=user['name'], role=user['role'])
+
+def user_child_id(email):
+    child = get_store().get_child(external_id=f"{USER_PREFIX}{email}")
+    return child['id'] if child else None
+
+def user_assessments(email, limit=None):
+    """A user's assessments, oldest first; with limit, only the most recent ones"""
+    child_id = user_child_id(email)
+    if child_id is None:
+        return []
+    rows = get_store().history('questionnaire_results', child_id, limit=limit, newest_first=limit is not None)
+    assessments = [row['data'] for row in rows]
+    return assessments[::-1] if limit is not None else assessments
+
+def assessment_count(email):
+    child_id = user_child_id(email)
+    return get_store().counts(child_id)['questionnaire_results'] if child_id else 0
+
 # Header (3.1.1 User Interface - Navigation)
 st.markdown("""
 <div class="main-header">
@@ -213,7 +241,7 @@ if page == "📝 Register":
             if not terms_accepted:
                 errors.append("You must accept the terms and conditions")
             
-            if email in st.session_state.users:
+            if find_user(email) is not None:
                 errors.append("Email already registered")
             
             if errors:
@@ -222,22 +250,24 @@ if page == "📝 Register":
             else:
                 # Create user account (FR1)
                 user_data = {
-                    'email': sanitize_input(email),
                     'password_hash': hash_password(password),
-                    'full_name': sanitize_input(full_name),
                     'phone': sanitize_input(phone),
-                    'role': role,
                     'child_name': sanitize_input(child_name),
                     'child_age': child_age,
-                    'registration_date': datetime.now().isoformat(),
-                    'assessments': []
+                    'registration_date': datetime.now().isoformat()
                 }
                 
-                st.session_state.users[email] = user_data
-                log_action("User Registration", email)
-                
-                st.markdown('<div class="success-message">✅ Account created successfully! Please login.</div>', unsafe_allow_html=True)
-                st.balloons()
+                user_id = get_store().create_user(email, sanitize_input(full_name), role, user_data,
+                                                  user_data['registration_date'])
+                if user_id is None:
+                    st.markdown('<div class="error-message">❌ Email already registered</div>', unsafe_allow_html=True)
+                else:
+                    get_store().add_child(user_data['child_name'] or "Child", child_age, user_id=user_id,
+                                          external_id=f"{USER_PREFIX}{email}")
+                    log_action("User Registration", email)
+                    
+                    st.markdown('<div class="success-message">✅ Account created successfully! Please login.</div>', unsafe_allow_html=True)
+                    st.balloons()
     
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -257,9 +287,11 @@ elif page == "🔐 Login":
         login_submitted = st.form_submit_button("🔐 Login")
         
         if login_submitted:
-            if email in st.session_state.users:
-                stored_user = st.session_state.users[email]
-                if stored_user['password_hash'] == hash_password(password):
+            stored_user = find_user(email)
+            if stored_user is not None:
+                # Users imported by other apps have no password here and cannot log in
+                password_hash = stored_user.get('password_hash')
+                if password_hash and password_hash == hash_password(password):
                     st.session_state.current_user = email
                     log_action("User Login", email)
                     st.success("✅ Login successful!")
@@ -309,7 +341,7 @@ elif page == "📊 Dashboard":
     if not st.session_state.current_user:
         st.error("Please login to access the dashboard")
     else:
-        user_data = st.session_state.users[st.session_state.current_user]
+        user_data = find_user(st.session_state.current_user)
         
         st.markdown('<div class="content-card">', unsafe_allow_html=True)
         st.markdown(f"### 📊 Welcome, {user_data['full_name']}!")
@@ -320,7 +352,7 @@ elif page == "📊 Dashboard":
         with col1:
             st.markdown(f"""
             <div class="dashboard-metric">
-                <h3>{len(user_data.get('assessments', []))}</h3>
+                <h3>{assessment_count(st.session_state.current_user)}</h3>
                 <p>Assessments</p>
             </div>
             """, unsafe_allow_html=True)
@@ -353,8 +385,9 @@ elif page == "📊 Dashboard":
         
         # Recent activity
         st.markdown("#### 📈 Recent Activity")
-        if user_data.get('assessments'):
-            for assessment in user_data['assessments'][-3:]:
+        recent = user_assessments(st.session_state.current_user, limit=3)
+        if recent:
+            for assessment in recent:
                 st.info(f"Assessment completed on {assessment['date']} - Score: {assessment.get('score', 'N/A')}")
         else:
             st.info("No assessments completed yet. Start with the 'Submit Assessment' page.")
@@ -417,10 +450,13 @@ elif page == "📝 Submit Assessment":
                 
                 # Add to user's assessments
                 user_email = st.session_state.current_user
-                if 'assessments' not in st.session_state.users[user_email]:
-                    st.session_state.users[user_email]['assessments'] = []
-                
-                st.session_state.users[user_email]['assessments'].append(assessment_data)
+                child_id = user_child_id(user_email)
+                if child_id is None:
+                    user = find_user(user_email)
+                    child_id = get_store().add_child(user.get('child_name') or "Child", user.get('child_age'),
+                                                     user_id=user['id'], external_id=f"{USER_PREFIX}{user_email}")
+                get_store().add_result('questionnaire_results', child_id, ASSESSMENT_TYPE, total_score,
+                                       assessment_data, assessment_data['date'])
                 log_action("Assessment Submitted", user_email)
                 
                 st.markdown('<div class="success-message">✅ Assessment submitted successfully!</div>', unsafe_allow_html=True)
@@ -444,20 +480,20 @@ elif page == "📋 My Data":
     if not st.session_state.current_user:
         st.error("Please login to view your data")
     else:
-        user_data = st.session_state.users[st.session_state.current_user]
+        assessments = user_assessments(st.session_state.current_user)
         
         st.markdown('<div class="content-card">', unsafe_allow_html=True)
         st.markdown("### 📋 My Assessment Data")
         
-        if user_data.get('assessments'):
+        if assessments:
             # Create DataFrame for display
-            assessments_df = pd.DataFrame(user_data['assessments'])
+            assessments_df = pd.DataFrame(assessments)
             assessments_df['date'] = pd.to_datetime(assessments_df['date']).dt.strftime('%Y-%m-%d %H:%M')
             
             st.dataframe(assessments_df[['date', 'child_age', 'score', 'percentage']], use_container_width=True)
             
             # Show trend
-            if len(user_data['assessments']) > 1:
+            if len(assessments) > 1:
                 st.line_chart(assessments_df.set_index('date')['percentage'])
         else:
             st.info("No assessment data available. Complete an assessment to see your data here.")
@@ -473,8 +509,9 @@ elif page == "👑 Admin Panel":
         st.markdown("### 👑 Admin Dashboard")
         
         # System statistics
-        total_users = len(st.session_state.users)
-        total_assessments = sum(len(user.get('assessments', [])) for user in st.session_state.users.values())
+        # The database is shared with other apps; per-app counters hold only this app's users and assessments
+        total_users = get_store().count_children(USER_PREFIX)
+        total_assessments = get_store().type_count('questionnaire_results', ASSESSMENT_TYPE)
         
         col1, col2, col3 = st.columns(3)
         
@@ -487,15 +524,16 @@ elif page == "👑 Admin Panel":
         
         # All user data
         st.markdown("#### 📊 All User Data")
-        if st.session_state.users:
+        users = get_store().list_users(limit=100, prefix=USER_PREFIX)
+        if users:
             users_data = []
-            for email, data in st.session_state.users.items():
+            for user in users:
                 users_data.append({
-                    'Email': email,
-                    'Name': data['full_name'],
-                    'Role': data['role'],
-                    'Assessments': len(data.get('assessments', [])),
-                    'Registration': data['registration_date'][:10]
+                    'Email': user['email'],
+                    'Name': user['name'],
+                    'Role': user['role'],
+                    'Assessments': user['assessments'],
+                    'Registration': user['created_at'][:10]
                 })
             
             users_df = pd.DataFrame(users_data)
@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import joblib
-import os
 import time
+from synthetic_data import KIDS_SPEC
+from training import train_model
+from model_registry import SCREENING_MODEL, get_model, publish
+from predictor import get_predictor
+from page_metrics import PageTimer
 
 # Super kid-friendly config
 st.set_page_config(
@@ -317,13 +319,18 @@ elif page == "🎯 Fun Question Game":
             submitted = st.form_submit_button("✨ Show Me My Magic Results!", use_container_width=True)
         
         if submitted:
-            if os.path.exists("model.pkl"):
-                model = joblib.load("model.pkl")
+            timer = PageTimer("super_kids_app")
+            predictor = get_predictor(SCREENING_MODEL)
+            timer.lap('model_resolution')
+            if predictor is not None:
                 gender_code = 1 if child_gender == "Awesome Boy" else 0
-                data = [answers + [child_age, gender_code]]
+                data = answers + [child_age, gender_code]
+                timer.lap('feature_encoding')
                 
-                prediction = model.predict(data)[0]
-                probability = model.predict_proba(data)[0]
+                result = predictor.predict(data)
+                timer.lap('inference')
+                prediction = result.label
+                probability = result.probabilities
                 
                 st.markdown("---")
                 st.markdown("### 🎊 Your Super Special Magic Results!")
@@ -370,6 +377,8 @@ elif page == "🎯 Fun Question Game":
                     st.markdown("🎉 WOW! You got lots of stars! You're incredible!")
                 else:
                     st.markdown("🎈 Great job answering all the questions! You're amazing!")
+                timer.lap('rendering')
+                timer.finish(result.model_version)
                 
             else:
                 st.error("🤖 Oops! Our magic robot friend needs to learn first! Let's go teach it!")
@@ -382,7 +391,7 @@ elif page == "🤖 Train Magic Robot":
     
     col1, col2 = st.columns(2)
     with col1:
-        if os.path.exists("model.pkl"):
+        if get_model(SCREENING_MODEL) is not None:
             st.success("✅ **Robot Status:** Super smart and ready!")
             st.info("🧠 **Robot Brain:** Fully charged with knowledge!")
         else:
@@ -416,58 +425,17 @@ elif page == "🤖 Train Magic Robot":
             "💾 Saving robot's new superpowers..."
         ]
         
-        np.random.seed(42)
-        training_data, labels = [], []
-        
         for i, message in enumerate(messages):
             status_text.text(message)
             progress_bar.progress((i + 1) * 15)
             time.sleep(0.5)
         
-        for _ in range(1000):
-            special_kid = np.random.choice([0, 1], p=[0.7, 0.3])
-            
-            if special_kid:
-                features = [
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.randint(2, 18),
-                    np.random.choice([0, 1])
-                ]
-            else:
-                features = [
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.3, 0.7]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.choice([0, 1], p=[0.7, 0.3]),
-                    np.random.choice([0, 1], p=[0.2, 0.8]),
-                    np.random.choice([0, 1], p=[0.8, 0.2]),
-                    np.random.randint(2, 18),
-                    np.random.choice([0, 1])
-                ]
-            
-            training_data.append(features)
-            labels.append(special_kid)
-        
         progress_bar.progress(90)
         status_text.text("🎉 Robot graduated from school!")
         
-        model = RandomForestClassifier(n_estimators=50, random_state=42)
-        model.fit(training_data, labels)
+        result = train_model(KIDS_SPEC, n_samples=1000, test_size=0, n_estimators=50, seed=42)
         
-        joblib.dump(model, "model.pkl")
+        publish(result, SCREENING_MODEL)
         
         progress_bar.progress(100)
         status_text.text("🎊 Robot is now your super smart friend!")
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+FEATURE_NAMES = [f'Q{i+1}' for i in range(10)] + ['Age', 'Gender']
+
+ML_FEATURE_NAMES = ['sensory_sensitivity', 'detail_focus', 'multitasking', 'task_switching',
+                    'social_communication', 'social_awareness', 'theory_of_mind', 'special_interests',
+                    'facial_recognition', 'social_intentions', 'age', 'gender']
+
+
+class CohortSpec:
+    """Table of per-class answer probabilities used to simulate screening cohorts"""
+
+    def __init__(self, name, positive_probs, negative_probs, age_range=(3, 60),
+                 prior=0.3, gender_prob=0.5, feature_names=FEATURE_NAMES):
+        if len(positive_probs) != 10 or len(negative_probs) != 10:
+            raise ValueError("positive_probs and negative_probs need one entry per question")
+        if not 0.0 <= prior <= 1.0:
+            raise ValueError("prior must be between 0 and 1")
+        if age_range[1] <= age_range[0] or age_range[1] > 128:
+            raise ValueError("age_range must be a non-empty [low, high) range below 128")
+        self.name = name
+        # Row 0 holds P(answer == 1 | neurotypical), row 1 P(answer == 1 | autism)
+        self.answer_probs = np.array([negative_probs, positive_probs], dtype=np.float64)
+        self.age_range = (int(age_range[0]), int(age_range[1]))
+        self.prior = float(prior)
+        self.gender_prob = float(gender_prob)
+        self.feature_names = list(feature_names)
+
+    def to_dict(self):
+        """Plain-JSON description of the spec"""
+        return {
+            'name': self.name,
+            'positive_probs': self.answer_probs[1].tolist(),
+            'negative_probs': self.answer_probs[0].tolist(),
+            'age_range': list(self.age_range),
+            'prior': self.prior,
+            'gender_prob': self.gender_prob,
+            'feature_names': self.feature_names,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['positive_probs'], data['negative_probs'],
+                   tuple(data['age_range']), data['prior'], data['gender_prob'],
+                   data['feature_names'])
+
+
+# AQ-10 patterns shared by app.py, model_trainer.py, medical_app.py, simple_app.py and ui_app.py
+AQ10_SPEC = CohortSpec(
+    'aq10',
+    positive_probs=[0.7, 0.3, 0.3, 0.3, 0.2, 0.2, 0.8, 0.8, 0.2, 0.8],
+    negative_probs=[0.3, 0.7, 0.7, 0.7, 0.8, 0.8, 0.2, 0.3, 0.8, 0.2],
+    age_range=(3, 60),
+)
+
+# Same answer patterns for the children's apps (kids_app.py, super_kids_app.py)
+KIDS_SPEC = CohortSpec(
+    'aq10_kids',
+    positive_probs=AQ10_SPEC.answer_probs[1],
+    negative_probs=AQ10_SPEC.answer_probs[0],
+    age_range=(2, 18),
+)
+
+# Behavioural indicator patterns used by ml_autism_app.py
+ML_SPEC = CohortSpec(
+    'behavioural',
+    positive_probs=[0.8, 0.4, 0.2, 0.2, 0.1, 0.1, 0.9, 0.9, 0.1, 0.9],
+    negative_probs=[0.2, 0.6, 0.8, 0.8, 0.9, 0.9, 0.1, 0.3, 0.9, 0.1],
+    age_range=(3, 60),
+    feature_names=ML_FEATURE_NAMES,
+)
+
+
+def generate_cohort(spec, n_samples, seed=42, out=None):
+    """Sample a cohort column by column into an int8 (n_samples, 12) array.
+
+    Returns (X, y). The draw order is fixed (labels, Q1..Q10, age, gender) so the
+    same spec, n_samples and seed always give identical arrays.
+    """
+    rng = np.random.default_rng(seed)
+    if out is None:
+        out = np.empty((n_samples, 12), dtype=np.int8)
+    elif out.shape != (n_samples, 12) or out.dtype != np.int8:
+        raise ValueError("out must be an int8 array of shape (n_samples, 12)")
+
+    y = (rng.random(n_samples) < spec.prior).view(np.int8)
+    for j in range(10):
+        # Per-row threshold picked from the class table, compared against uniform draws
+        thresholds = spec.answer_probs[:, j].take(y)
+        np.less(rng.random(n_samples), thresholds, out=out[:, j], casting='unsafe')
+    out[:, 10] = rng.integers(spec.age_range[0], spec.age_range[1], size=n_samples, dtype=np.int8)
+    np.less(rng.random(n_samples), spec.gender_prob, out=out[:, 11], casting='unsafe')
+    return out, y
+
+
+def cohort_dataframe(spec, n_samples, seed=42, label_column='Label'):
+    """Generate a cohort and wrap it in a DataFrame with the spec's column names"""
+    X, y = generate_cohort(spec, n_samples, seed)
+    df = pd.DataFrame(X, columns=spec.feature_names, copy=False)
+    df[label_column] = y
+    return df
@@ -0,0 +1,73 @@
+from assessment_store import AssessmentStore, record_report
+
+
+def _store(tmp_path):
+    return AssessmentStore(str(tmp_path / "assessments.db"))
+
+
+def test_child_upsert_updates_by_external_id_and_create_child_never_does(tmp_path):
+    store = _store(tmp_path)
+    child_id = store.add_child("Sam", 6, external_id="srs_user:1")
+    assert store.add_child("Sam", 7, external_id="srs_user:1") == child_id
+    assert store.get_child(child_id)['age'] == 7
+    assert store.create_child("Sam", 6, external_id="detection:a:1") != store.create_child("Sam", 6)
+    assert store.counter('children') == 3
+
+
+def test_user_upsert_merges_data(tmp_path):
+    store = _store(tmp_path)
+    assert store.create_user("a@example.com", "A", "Researcher", {'password_hash': 'h'}) is not None
+    assert store.create_user("a@example.com", "B") is None
+    store.add_user("a@example.com", "Imported", data={'child_name': 'Sam'})
+    user = store.get_user("a@example.com")
+    assert user['role'] == "Researcher"
+    assert user['data'] == {'password_hash': 'h', 'child_name': 'Sam'}
+    assert store.counter('users') == 1
+
+
+def test_reports_of_same_named_children_stay_apart(tmp_path):
+    store = _store(tmp_path)
+    first = record_report(store, {'child_profile': {'child_name': "Sam", 'profile_id': 'p1'}})
+    second = record_report(store, {'child_profile': {'child_name': "Sam", 'profile_id': 'p2'}})
+    assert first != second
+    assert store.count_children("srs:") == 2
+
+
+def test_counters_follow_inserts_and_cascade_deletes(tmp_path):
+    store = _store(tmp_path)
+    kept = store.add_child("Kim", external_id="srs_user:1")
+    deleted = store.add_child("Sam", external_id="srs_user:2")
+    other = store.add_child("Lee", external_id="detection:abc:1")
+    for child_id in (kept, deleted, deleted):
+        store.add_result('questionnaire_results', child_id, 'srs_assessment', 1.0)
+    store.add_result('questionnaire_results', other, 'asd_questionnaire', 1.0)
+    store.add_result('game_results', deleted, 'memory', 0.5)
+
+    store.delete_child(deleted)
+
+    assert store.count_children() == 2
+    assert store.count_children("srs_user:") == 1
+    assert store.count_children("detection:abc:") == 1
+    assert store.type_count('questionnaire_results', 'srs_assessment') == 1
+    assert store.type_count('questionnaire_results', 'asd_questionnaire') == 1
+    assert store.counter('questionnaire_results') == 2
+    assert store.counter('game_results') == 0
+    assert store.counts(deleted) == {table: 0 for table in store.counts(deleted)}
+    # The counters agree with a fresh count of the rows
+    conn = store.connection()
+    assert store.counter('questionnaire_results') == conn.execute(
+        "SELECT COUNT(*) FROM questionnaire_results").fetchone()[0]
+
+
+def test_counters_are_seeded_when_opening_an_older_database(tmp_path):
+    store = _store(tmp_path)
+    child_id = store.add_child("Kim", external_id="srs_user:1")
+    store.add_result('questionnaire_results', child_id, 'srs_assessment', 1.0)
+    with store.connection() as conn:
+        conn.execute("DELETE FROM counters")
+        conn.execute("PRAGMA user_version = 1")
+
+    reopened = _store(tmp_path)
+    assert reopened.count_children("srs_user:") == 1
+    assert reopened.type_count('questionnaire_results', 'srs_assessment') == 1
+    assert reopened.counter('children') == 1
@@ -0,0 +1,50 @@
+import asyncio
+import json
+
+from model_registry import AQ10_MODEL, publish
+from predictor import ScreeningResult
+from scoring_service import MicroBatcher, ScoringService, row_error
+from training import train_model
+
+GOOD_ROW = [0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 30, 1]
+
+
+def _publish(tmp_path, monkeypatch):
+    # The batcher resolves models from ./model_registry
+    monkeypatch.chdir(tmp_path)
+    publish(train_model(n_samples=300, n_estimators=5, cache_dir=str(tmp_path / "cache")), AQ10_MODEL)
+
+
+def test_one_bad_row_does_not_fail_its_micro_batch(tmp_path, monkeypatch):
+    _publish(tmp_path, monkeypatch)
+
+    async def run():
+        batcher = MicroBatcher(max_wait_ms=50)
+        task = asyncio.create_task(batcher.run())
+        try:
+            return await asyncio.gather(batcher.submit(AQ10_MODEL, GOOD_ROW),
+                                        batcher.submit(AQ10_MODEL, GOOD_ROW[:5]),
+                                        batcher.submit(AQ10_MODEL, GOOD_ROW),
+                                        return_exceptions=True), batcher.batch_size.count
+        finally:
+            task.cancel()
+
+    results, batches = asyncio.run(run())
+    assert batches == 1
+    assert isinstance(results[0], ScreeningResult)
+    assert isinstance(results[1], Exception)
+    assert isinstance(results[2], ScreeningResult)
+
+
+def test_predict_rejects_non_finite_and_out_of_range_rows():
+    service = ScoringService()
+    for row in ([float('nan')] + GOOD_ROW[1:], GOOD_ROW[:10] + [float('inf'), 1],
+                GOOD_ROW[:10] + [1e9, 1], [2] + GOOD_ROW[1:], GOOD_ROW[:11] + [3]):
+        body = json.dumps({'features': row}).encode('utf-8')
+        status, payload = asyncio.run(service._route('POST', '/predict', body))
+        assert status == 400, row
+        assert payload['error']
+
+
+def test_row_error_accepts_questionnaire_rows():
+    assert row_error([float(value) for value in GOOD_ROW]) is None
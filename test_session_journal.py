@@ -0,0 +1,58 @@
+import os
+
+from session_journal import SessionJournal, SessionView, write_snapshot
+
+
+def _journal(tmp_path, **kwargs):
+    # A long flush interval so only explicit flushes write
+    return SessionJournal(str(tmp_path / "session.json"), flush_interval=60, **kwargs)
+
+
+def test_replay_after_compaction_matches_the_written_state(tmp_path):
+    journal = _journal(tmp_path)
+    journal.set('user_profile', 'user_1', {'email': 'a@example.com'})
+    journal.append('assessment_history', {'id': 'a1'})
+    journal.flush()
+    journal.compact()
+    journal.set('user_profile', 'user_1', {'email': 'b@example.com'})
+    journal.delete('child_data', 'missing')
+    journal.append('assessment_history', {'id': 'a2'})
+    journal.close()
+
+    assert journal.compactions == 1
+    assert journal._generations() == []
+    state = SessionJournal(journal.path).load()
+    assert state['user_profile'] == {'user_1': {'email': 'b@example.com'}}
+    assert state['assessment_history'] == [{'id': 'a1'}, {'id': 'a2'}]
+    view = SessionView(SessionJournal(journal.path))
+    view.refresh()
+    assert view.section('assessment_history') == state['assessment_history']
+    assert view.size('user_profile') == 1
+
+
+def test_generation_left_behind_by_a_crash_is_not_replayed_twice(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append('assessment_history', {'id': 'a1'})
+    journal.flush()
+    # Rotate and fold into the snapshot, then "crash" before deleting the generation
+    os.replace(journal.journal_path, f"{journal.journal_path}.1")
+    write_snapshot(journal.path, journal.load(), 1)
+
+    assert os.path.exists(f"{journal.journal_path}.1")
+    assert SessionJournal(journal.path).load()['assessment_history'] == [{'id': 'a1'}]
+
+
+def test_rapid_saves_coalesce_into_one_write(tmp_path):
+    journal = _journal(tmp_path)
+    for score in range(50):
+        journal.set('game_scores', 'memory', {'score': score})
+    journal.append('assessment_history', {'id': 'a1'})
+    journal.append('assessment_history', {'id': 'a2'})
+
+    # The 50 saves of one entry collapse to the last; appends are all kept
+    assert journal.flush() == 3
+    assert journal.writes == 1
+    state = journal.load()
+    assert state['game_scores'] == {'memory': {'score': 49}}
+    assert len(state['assessment_history']) == 2
+    journal.close()
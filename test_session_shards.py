@@ -0,0 +1,47 @@
+import multiprocessing
+import os
+
+from session_journal import SessionJournal
+from session_shards import ShardIndex
+
+WRITERS = 4
+EVENTS = 25
+
+
+def _register_and_write(shard_dir, shared_path, writer):
+    index = ShardIndex(shard_dir, legacy_path=os.path.join(shard_dir, "no_legacy.json"))
+    user_id, shard = index.register({'email': f"family{writer}@example.com"})
+    own = SessionJournal(shard, flush_interval=60)
+    # A tiny compaction threshold, so rotations and compactions race the other writers
+    shared = SessionJournal(shared_path, flush_interval=60, compact_bytes=512)
+    for i in range(EVENTS):
+        own.append('assessment_history', {'id': f"{user_id}:{i}"})
+        shared.append('assessment_history', {'writer': writer, 'i': i})
+        # Flush often, so the processes' appends interleave on the shared journal
+        shared.flush()
+    own.close()
+    shared.close()
+
+
+def test_concurrent_writers_keep_every_family_and_event(tmp_path):
+    shard_dir = str(tmp_path / "shards")
+    shared_path = str(tmp_path / "shared.json")
+    ShardIndex(shard_dir, legacy_path=os.path.join(shard_dir, "no_legacy.json"))
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_register_and_write, args=(shard_dir, shared_path, writer))
+                 for writer in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    users = ShardIndex(shard_dir).users()
+    assert len(users) == WRITERS
+    assert len({entry['shard'] for entry in users.values()}) == WRITERS
+    for user_id, entry in users.items():
+        history = SessionJournal(entry['shard']).load()['assessment_history']
+        assert history == [{'id': f"{user_id}:{i}"} for i in range(EVENTS)]
+    shared = SessionJournal(shared_path).load()['assessment_history']
+    assert sorted((event['writer'], event['i']) for event in shared) == \
+        [(writer, i) for writer in range(WRITERS) for i in range(EVENTS)]
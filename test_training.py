@@ -0,0 +1,54 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from lookup_engine import input_space
+from synthetic_data import AQ10_SPEC, generate_cohort
+from training import clear_memory_cache, cross_validate_folds, fold_scaler, merge_forests, train_model
+
+
+def _scaled_forest(n_estimators=25, seed=3):
+    X, y = generate_cohort(AQ10_SPEC, 2000, seed=seed)
+    scaler = StandardScaler()
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=seed)
+    model.fit(scaler.fit_transform(X), y)
+    return model, scaler, X, y
+
+
+def _assert_folded_matches(model, scaler, folded):
+    # Every reachable questionnaire input; the apps scale float64 rows
+    X = input_space().astype(np.float64)
+    expected = model.predict_proba(scaler.transform(X))
+    actual = folded.predict_proba(X)
+    assert np.abs(expected - actual).max() <= 1e-9
+    assert np.array_equal(expected.argmax(axis=1), actual.argmax(axis=1))
+
+
+def test_folded_forest_matches_scaler_and_model():
+    model, scaler, _, _ = _scaled_forest()
+    _assert_folded_matches(model, scaler, fold_scaler(model, scaler))
+
+
+def test_folded_fold_ensemble_matches_scaler_and_model():
+    model, scaler, X, y = _scaled_forest(n_estimators=10)
+    folds = cross_validate_folds(model, scaler.transform(X), y, cv=3, n_jobs=1)
+    ensemble = merge_forests(folds['estimators'])
+    _assert_folded_matches(ensemble, scaler, fold_scaler(ensemble, scaler))
+
+
+def test_fold_scaler_leaves_the_original_untouched():
+    model, scaler, _, _ = _scaled_forest(n_estimators=5)
+    before = [estimator.tree_.threshold.copy() for estimator in model.estimators_]
+    fold_scaler(model, scaler)
+    assert all(np.array_equal(b, e.tree_.threshold) for b, e in zip(before, model.estimators_))
+
+
+def test_memory_cache_hits_do_not_mutate_the_first_result(tmp_path):
+    clear_memory_cache()
+    first = train_model(n_samples=300, n_estimators=5, cache_dir=str(tmp_path))
+    second = train_model(n_samples=300, n_estimators=5, cache_dir=str(tmp_path))
+    assert not first.cached
+    assert second.cached
+    assert second is not first
+    assert second.model is first.model
+    clear_memory_cache()
@@ -0,0 +1,291 @@
+import copy
+import hashlib
+import json
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import cross_validate, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from compiled_forest import save_compiled
+from lookup_engine import LookupEngine
+from synthetic_data import AQ10_SPEC, generate_cohort
+
+CACHE_DIR = "model_cache"
+TRAINING_FORMAT_VERSION = 5
+
+_memory_cache = {}
+_key_locks = {}
+_locks_guard = threading.Lock()
+
+
+class TrainingResult:
+    """A fitted model together with its metrics and the spec that produced it"""
+
+    def __init__(self, key, spec, model, metrics, scaler=None, cached=False, artifact_dir=None,
+                 ensemble=None):
+        self.key = key
+        self.spec = spec
+        self.model = model
+        self.metrics = metrics
+        self.scaler = scaler
+        self.ensemble = ensemble
+        self.cached = cached
+        self.artifact_dir = artifact_dir
+
+    @property
+    def model_path(self):
+        return os.path.join(self.artifact_dir, "model.joblib")
+
+    @property
+    def compiled_path(self):
+        return os.path.join(self.artifact_dir, "model.forest")
+
+    @property
+    def lookup_path(self):
+        return os.path.join(self.artifact_dir, "model.lut.npz")
+
+    @property
+    def ensemble_path(self):
+        return os.path.join(self.artifact_dir, "ensemble.joblib")
+
+
+def training_spec(cohort_spec=AQ10_SPEC, n_samples=1000, test_size=0.2, n_estimators=100,
+                  max_depth=None, seed=42, class_weight=None, stratify=False, cv_folds=0,
+                  scale_features=False):
+    """Everything that determines a trained artifact, as a JSON-serializable dict"""
+    return {
+        'format_version': TRAINING_FORMAT_VERSION,
+        'generator': cohort_spec.to_dict(),
+        'n_samples': int(n_samples),
+        'test_size': float(test_size),
+        'n_estimators': int(n_estimators),
+        'max_depth': None if max_depth is None else int(max_depth),
+        'seed': int(seed),
+        'class_weight': class_weight,
+        'stratify': bool(stratify),
+        'cv_folds': int(cv_folds),
+        'scale_features': bool(scale_features),
+        'versions': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'joblib': joblib.__version__,
+        },
+    }
+
+
+def spec_key(spec):
+    """Content address of a training spec"""
+    canonical = json.dumps(spec, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:24]
+
+
+def train_model(cohort_spec=AQ10_SPEC, n_samples=1000, test_size=0.2, n_estimators=100,
+                max_depth=None, seed=42, class_weight=None, stratify=False, cv_folds=0,
+                scale_features=False, cache_dir=CACHE_DIR):
+    """Train a RandomForest for the given spec, reusing a cached artifact when one exists.
+
+    test_size=0 fits on the whole cohort and skips evaluation, matching the
+    pages that only need a model to predict with.
+    """
+    spec = training_spec(cohort_spec, n_samples, test_size, n_estimators, max_depth, seed,
+                         class_weight, stratify, cv_folds, scale_features)
+    key = spec_key(spec)
+    if key in _memory_cache:
+        return _cache_hit(_memory_cache[key])
+
+    # One trainer per key per process; concurrent clicks wait for the first one
+    with _locks_guard:
+        lock = _key_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key in _memory_cache:
+            return _cache_hit(_memory_cache[key])
+        artifact_dir = os.path.join(cache_dir, key)
+        result = _load_artifact(key, artifact_dir)
+        if result is None:
+            result = _fit(key, spec, cohort_spec)
+            _store_artifact(result, cache_dir)
+        _memory_cache[key] = result
+        return result
+
+
+def _cache_hit(result):
+    """Shallow copy flagged as cached, so callers never see the shared entry change"""
+    hit = copy.copy(result)
+    hit.cached = True
+    return hit
+
+
+def clear_memory_cache():
+    _memory_cache.clear()
+
+
+def cross_validate_folds(estimator, X, y, cv=5, n_jobs=None):
+    """Fit the CV folds in parallel and keep each fold's estimator and timings"""
+    n_jobs = n_jobs or min(cv, os.cpu_count() or 1)
+    results = cross_validate(estimator, X, y, cv=cv, n_jobs=n_jobs, return_estimator=True)
+    return {
+        'scores': results['test_score'],
+        'fit_seconds': results['fit_time'],
+        'score_seconds': results['score_time'],
+        'estimators': list(results['estimator']),
+    }
+
+
+def merge_forests(forests):
+    """Combine fitted forests into one RandomForestClassifier over all their trees.
+
+    Forests of equal size average to exactly the soft-voting (bagged) ensemble
+    of the originals, so the result can be deployed like any single model.
+    """
+    classes = forests[0].classes_
+    for forest in forests[1:]:
+        if not np.array_equal(forest.classes_, classes):
+            raise ValueError("Cannot merge forests trained on different classes")
+    merged = copy.deepcopy(forests[0])
+    merged.estimators_ = [tree for forest in forests for tree in forest.estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def fold_scaler(model, scaler):
+    """Copy of a forest fit on StandardScaler output that takes raw features instead.
+
+    The split z <= t on z = (x - mean) / scale is the split x <= t * scale + mean
+    (scale is always positive), so rewriting every threshold removes the scaler
+    from inference without changing a single decision.
+    """
+    folded = copy.deepcopy(model)
+    for estimator in folded.estimators_:
+        tree = estimator.tree_
+        split = tree.children_left != -1
+        features = tree.feature[split]
+        # tree_.threshold is a view of the node array, so this edits the tree in place
+        tree.threshold[split] = _raw_thresholds(tree.threshold[split], scaler.mean_[features],
+                                                scaler.scale_[features])
+    return folded
+
+
+def _raw_thresholds(threshold, mean, scale):
+    # Trees compare float32 inputs, and thresholds can sit exactly on a training value,
+    # so t * scale + mean alone can land a hair on the wrong side of it. Snap each one
+    # to the largest float32 raw value that the scaled model still sends left.
+    def goes_left(x):
+        return ((x.astype(np.float64) - mean) / scale).astype(np.float32) <= threshold
+
+    raw = (threshold * scale + mean).astype(np.float32)
+    for _ in range(64):
+        down = ~goes_left(raw)
+        raw[down] = np.nextafter(raw[down], np.float32(-np.inf))
+        up = ~down & goes_left(np.nextafter(raw, np.float32(np.inf)))
+        raw[up] = np.nextafter(raw[up], np.float32(np.inf))
+        if not (down.any() or up.any()):
+            break
+    return raw.astype(np.float64)
+
+
+def _fit(key, spec, cohort_spec):
+    X, y = generate_cohort(cohort_spec, spec['n_samples'], seed=spec['seed'])
+    metrics = {'n_samples': len(y), 'positives': int(y.sum())}
+
+    if spec['test_size'] > 0:
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=spec['test_size'], random_state=spec['seed'],
+            stratify=y if spec['stratify'] else None
+        )
+    else:
+        X_train, X_test, y_train, y_test = X, None, y, None
+
+    scaler = None
+    if spec['scale_features']:
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X_train)
+        if X_test is not None:
+            X_test = scaler.transform(X_test)
+
+    model = RandomForestClassifier(
+        n_estimators=spec['n_estimators'],
+        max_depth=spec['max_depth'],
+        random_state=spec['seed'],
+        class_weight=spec['class_weight']
+    )
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    metrics['fit_seconds'] = time.perf_counter() - start
+    metrics['n_train'] = len(y_train)
+    metrics['feature_importance'] = dict(zip(cohort_spec.feature_names, model.feature_importances_.tolist()))
+
+    if X_test is not None:
+        y_pred = model.predict(X_test)
+        metrics['n_test'] = len(y_test)
+        metrics['accuracy'] = float(accuracy_score(y_test, y_pred))
+        metrics['confusion_matrix'] = confusion_matrix(y_test, y_pred).tolist()
+        metrics['classification_report'] = classification_report(y_test, y_pred, output_dict=True)
+
+    ensemble = None
+    if spec['cv_folds']:
+        folds = cross_validate_folds(model, X_train, y_train, cv=spec['cv_folds'])
+        metrics['cv_scores'] = folds['scores'].tolist()
+        metrics['cv_mean'] = float(folds['scores'].mean())
+        metrics['cv_std'] = float(folds['scores'].std())
+        metrics['cv_fit_seconds'] = folds['fit_seconds'].tolist()
+        metrics['cv_score_seconds'] = folds['score_seconds'].tolist()
+        ensemble = merge_forests(folds['estimators'])
+        if X_test is not None:
+            metrics['ensemble_accuracy'] = float(accuracy_score(y_test, ensemble.predict(X_test)))
+
+    if scaler is not None:
+        # Publish one artifact that takes raw inputs; the scaler only existed for training
+        # (test_training.py checks the folding is exact over the whole input space)
+        model = fold_scaler(model, scaler)
+        if ensemble is not None:
+            ensemble = fold_scaler(ensemble, scaler)
+
+    return TrainingResult(key, spec, model, metrics, ensemble=ensemble)
+
+
+def _store_artifact(result, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{result.key}-", dir=cache_dir)
+    joblib.dump(result.model, os.path.join(tmp_dir, "model.joblib"))
+    save_compiled(result.model, os.path.join(tmp_dir, "model.forest"),
+                  feature_names=result.spec['generator']['feature_names'],
+                  metadata={'key': result.key})
+    # Models always take raw Q1..Q10/Age/Gender inputs: precompute the whole response space
+    LookupEngine.build(result.model, metadata={'key': result.key}).save(
+        os.path.join(tmp_dir, "model.lut.npz"))
+    if result.ensemble is not None:
+        joblib.dump(result.ensemble, os.path.join(tmp_dir, "ensemble.joblib"))
+    with open(os.path.join(tmp_dir, "metrics.json"), 'w') as f:
+        json.dump({'key': result.key, 'spec': result.spec, 'metrics': result.metrics}, f, indent=2)
+
+    artifact_dir = os.path.join(cache_dir, result.key)
+    try:
+        os.rename(tmp_dir, artifact_dir)
+    except OSError:
+        # Another process published the same key first; its artifact is identical
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    result.artifact_dir = artifact_dir
+
+
+def _load_artifact(key, artifact_dir):
+    metrics_path = os.path.join(artifact_dir, "metrics.json")
+    if not os.path.exists(metrics_path):
+        return None
+    with open(metrics_path) as f:
+        stored = json.load(f)
+    model = joblib.load(os.path.join(artifact_dir, "model.joblib"))
+    ensemble_path = os.path.join(artifact_dir, "ensemble.joblib")
+    ensemble = joblib.load(ensemble_path) if os.path.exists(ensemble_path) else None
+    return TrainingResult(key, stored['spec'], model, stored['metrics'], cached=True,
+                          artifact_dir=artifact_dir, ensemble=ensemble)
@@ -1,9 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-import joblib
-import os
+from synthetic_data import AQ10_SPEC
+from training import train_model
+from model_registry import SCREENING_MODEL, get_model, publish
+from predictor import get_predictor
 
 # Page config
 st.set_page_config(
@@ -177,13 +178,14 @@ elif page == "📋 Screening":
         submitted = st.form_submit_button("🔍 Get Assessment", use_container_width=True)
         
         if submitted:
-            if os.path.exists("model.pkl"):
-                model = joblib.load("model.pkl")
+            predictor = get_predictor(SCREENING_MODEL)
+            if predictor is not None:
                 gender_code = 1 if gender == "Male" else 0
-                data = [answers + [age, gender_code]]
+                data = answers + [age, gender_code]
                 
-                pred = model.predict(data)[0]
-                prob = model.predict_proba(data)[0]
+                result = predictor.predict(data)
+                pred = result.label
+                prob = result.probabilities
                 
                 st.markdown("---")
                 st.markdown("### 📊 Assessment Results")
@@ -229,7 +231,7 @@ elif page == "🤖 Train Model":
         """)
     
     with col2:
-        if os.path.exists("model.pkl"):
+        if get_model(SCREENING_MODEL) is not None:
             st.success("✅ Model Ready")
         else:
             st.warning("⚠️ No Model Found")
@@ -243,58 +245,17 @@ elif page == "🤖 Train Model":
             status_text.text("Generating synthetic data...")
             progress_bar.progress(25)
             
-            np.random.seed(42)
-            data, labels = [], []
-            
-            for _ in range(1000):
-                autism = np.random.choice([0, 1], p=[0.7, 0.3])
-                
-                if autism:
-                    features = [
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.randint(3, 60),
-                        np.random.choice([0, 1])
-                    ]
-                else:
-                    features = [
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.3, 0.7]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.choice([0, 1], p=[0.7, 0.3]),
-                        np.random.choice([0, 1], p=[0.2, 0.8]),
-                        np.random.choice([0, 1], p=[0.8, 0.2]),
-                        np.random.randint(3, 60),
-                        np.random.choice([0, 1])
-                    ]
-                
-                data.append(features)
-                labels.append(autism)
-            
             progress_bar.progress(50)
             status_text.text("Training model...")
             
             # Train model
-            model = RandomForestClassifier(n_estimators=50, random_state=42)
-            model.fit(data, labels)
+            result = train_model(AQ10_SPEC, n_samples=1000, test_size=0, n_estimators=50, seed=42)
             
             progress_bar.progress(75)
             status_text.text("Saving model...")
             
             # Save model
-            joblib.dump(model, "model.pkl")
+            publish(result, SCREENING_MODEL)
             
             progress_bar.progress(100)
             status_text.text("Training complete!")
@@ -0,0 +1,162 @@
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from model_registry import AQ10_MODEL, BEHAVIOURAL_MODEL, SCREENING_MODEL, get_model, load_stats, publish
+from page_metrics import render_text
+from predictor import cache_stats, get_predictor
+from synthetic_data import AQ10_SPEC, generate_cohort
+from training import train_model
+
+MODEL_LINES = (AQ10_MODEL, SCREENING_MODEL, BEHAVIOURAL_MODEL)
+WARMUP_ROWS = 32
+READINESS_PORT_ENV = "READINESS_PORT"
+DEFAULT_READINESS_PORT = 8502
+# The line each app cannot predict without; warm-up fails while it has nothing published
+APP_MODELS = {'app.py': AQ10_MODEL, 'medical_app.py': SCREENING_MODEL, 'ml_autism_app.py': BEHAVIOURAL_MODEL}
+# Page settings used by --publish-missing to train a required line that has nothing published
+BOOTSTRAP_TRAINING = {
+    AQ10_MODEL: {'n_samples': 1000, 'test_size': 0.2, 'n_estimators': 100, 'seed': 42},
+    SCREENING_MODEL: {'n_samples': 1000, 'test_size': 0, 'n_estimators': 100, 'max_depth': 10, 'seed': 42},
+}
+
+_state = {'status': 'starting', 'models': {}, 'warmup_seconds': None, 'error': None}
+_lock = threading.Lock()
+
+
+def warm_up(names=MODEL_LINES, n_rows=WARMUP_ROWS, required=()):
+    """Load each model line, push synthetic rows through it and record what happened.
+
+    Loading goes through the same per-process registry and predictor caches the
+    pages use, so the first real submission finds everything resident. Lines with
+    nothing published are reported as such; warm-up fails if one of them is in
+    required.
+    """
+    start = time.perf_counter()
+    models = {}
+    try:
+        X, _ = generate_cohort(AQ10_SPEC, n_rows, seed=0)
+        for name in names:
+            line_start = time.perf_counter()
+            if get_model(name) is None:
+                if name in required:
+                    raise LookupError(f"No model published for required line '{name}'")
+                models[name] = {'version': None}
+                continue
+            predictor = get_predictor(name)
+            for row in X:
+                predictor.predict(row)
+            predictor.predict_batch(X)
+            models[name] = {
+                'version': predictor.model_version,
+                'engine': type(predictor.scorer).__name__,
+                'warmup_ms': (time.perf_counter() - line_start) * 1000,
+            }
+        status, error = 'ready', None
+    except Exception as exc:
+        status, error = 'failed', f"{type(exc).__name__}: {exc}"
+    with _lock:
+        _state.update(status=status, models=models, error=error,
+                      warmup_seconds=time.perf_counter() - start)
+    return readiness()[1]
+
+
+def readiness():
+    """(ready, report) with model versions, warm-up timings and cache counters"""
+    with _lock:
+        report = json.loads(json.dumps(_state))
+    report['loads'] = load_stats()
+    report['prediction_caches'] = {'/'.join(str(part) for part in key): stats
+                                   for key, stats in cache_stats().items()}
+    return report['status'] == 'ready', report
+
+
+class _ReadinessHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/ready':
+            ready, report = readiness()
+            self._send(200 if ready else 503, report)
+        elif self.path == '/live':
+            self._send(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            data = render_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send(404, {'error': f"Unknown path {self.path}"})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def publish_missing(name):
+    """Train and publish a line with its page's settings if nothing is published; True if it did"""
+    if get_model(name) is not None or name not in BOOTSTRAP_TRAINING:
+        return False
+    publish(train_model(AQ10_SPEC, **BOOTSTRAP_TRAINING[name]), name)
+    return True
+
+
+def start_readiness_server(port=None, host="0.0.0.0"):
+    """Serve GET /ready (503 until warm-up succeeds), /live and /metrics from a daemon thread.
+
+    If the port is taken (another app on the host), falls back to a free one; the
+    bound port is server.server_address[1].
+    """
+    port = int(port or os.environ.get(READINESS_PORT_ENV, DEFAULT_READINESS_PORT))
+    try:
+        server = ThreadingHTTPServer((host, port), _ReadinessHandler)
+    except OSError as exc:
+        print(f"Readiness port {port} unavailable ({exc}); using a free port", file=sys.stderr)
+        server = ThreadingHTTPServer((host, 0), _ReadinessHandler)
+    threading.Thread(target=server.serve_forever, name="readiness", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    # Usage: python warmup.py [--publish-missing] <app.py> [streamlit run options...]
+    # Warms the models in this process, then runs Streamlit in the same process so
+    # its sessions share the warmed caches. Streamlit's /_stcore/health only answers
+    # once warm-up has finished, which keeps platform traffic off cold instances;
+    # a failed warm-up exits non-zero instead of starting an instance that would
+    # pass the health check without a working model.
+    args = sys.argv[1:]
+    bootstrap = bool(args) and args[0] == "--publish-missing"
+    if bootstrap:
+        args = args[1:]
+    if not args:
+        print("Usage: python warmup.py [--publish-missing] <app.py> [streamlit options]")
+        raise SystemExit(2)
+    required = tuple(line for line in [APP_MODELS.get(os.path.basename(args[0]))] if line)
+    server = start_readiness_server()
+    if bootstrap:
+        for name in required:
+            if publish_missing(name):
+                print(f"Published a freshly trained '{name}' model", flush=True)
+    report = warm_up(required=required)
+    print(f"Warm-up {report['status']} in {report['warmup_seconds']:.2f}s: "
+          f"{ {name: model['version'] for name, model in report['models'].items()} } "
+          f"(readiness on port {server.server_address[1]})", flush=True)
+    if report['status'] != 'ready':
+        print(f"Warm-up failed: {report['error']}", file=sys.stderr)
+        server.shutdown()
+        raise SystemExit(1)
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run"] + args
+    raise SystemExit(stcli.main())